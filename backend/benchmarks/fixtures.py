@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import os
+import random
+import shlex
+import shutil
+import subprocess
+import tempfile
+from collections import Counter
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Tuple
+
+PsRow = Tuple[int, int, str, str, float, int, str]
+
+_FILLER_COMMANDS = (
+    "/usr/sbin/sshd -D",
+    "/usr/bin/python3 -m http.server 8000",
+    "node /srv/app/server.js --port 3000 --token=abcdef123456",
+    "/usr/lib/postgresql/15/bin/postgres -D /var/lib/postgresql",
+    "/usr/bin/vim README.md",
+    "/bin/bash -l",
+    "make -j8 build",
+    "cc1 -quiet main.c -o /tmp/ccX.s",
+)
+_SSH_TUNNEL_FLAGS = ("-L 8080:localhost:80", "-R 9000:localhost:9000", "-D 1080", "-W db.internal:5432")
+
+
+@dataclass(frozen=True)
+class FixtureSpec:
+    sessions: int = 4
+    windows: int = 4
+    panes: int = 4
+    scrollback_lines: int = 2000
+    processes: int = 2000
+    children_per_pane: int = 3
+    listeners: int = 200
+    ssh_tunnels: int = 20
+    seed: int = 1
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+def _etime(rng: random.Random) -> str:
+    seconds = rng.randrange(1, 5 * 86400)
+    days, rest = divmod(seconds, 86400)
+    hours, rest = divmod(rest, 3600)
+    minutes, seconds = divmod(rest, 60)
+    clock = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+    return f"{days}-{clock}" if days else clock
+
+
+def generate_ps_rows(pane_pids: List[int], spec: FixtureSpec) -> List[PsRow]:
+    rng = random.Random(spec.seed)
+    rows: List[PsRow] = [(1, 0, "root", "00:00:01", 0.0, 4096, "/sbin/init")]
+    used = {1, *pane_pids}
+    next_pid = max(used) + 1000
+
+    def new_pid() -> int:
+        nonlocal next_pid
+        next_pid += rng.randrange(1, 7)
+        return next_pid
+
+    # Real pane pids head a small synthetic tree so per-pane attribution has work to do.
+    for pane_pid in pane_pids:
+        rows.append((pane_pid, 1, "bench", _etime(rng), round(rng.random(), 1), rng.randrange(2000, 9000), "-bash"))
+        parent = pane_pid
+        for _ in range(spec.children_per_pane):
+            pid = new_pid()
+            command = rng.choice(_FILLER_COMMANDS)
+            rows.append((pid, parent, "bench", _etime(rng), round(rng.random() * 40, 1), rng.randrange(4000, 400000), command))
+            parent = pid
+
+    for idx in range(spec.ssh_tunnels):
+        command = f"ssh -N {_SSH_TUNNEL_FLAGS[idx % len(_SSH_TUNNEL_FLAGS)]} bench@host{idx}.example.com"
+        rows.append((new_pid(), 1, "bench", _etime(rng), 0.1, 7000, command))
+
+    while len(rows) < spec.processes:
+        command = rng.choice(_FILLER_COMMANDS)
+        ppid = rng.choice(rows)[0]
+        rows.append((new_pid(), ppid, rng.choice(("root", "bench", "www-data")), _etime(rng), 0.0, rng.randrange(1000, 90000), command))
+    return rows
+
+
+def format_ps_full(rows: List[PsRow]) -> str:
+    return "".join(
+        f"{pid:>7} {ppid:>7} {user:<8} {etime:>11} {cpu:>5.1f} {rss:>8} {command}\n"
+        for pid, ppid, user, etime, cpu, rss, command in rows
+    )
+
+
+def format_ps_short(rows: List[PsRow]) -> str:
+    return "".join(f"{pid:>7} {ppid:>7} {user:<8} {command}\n" for pid, ppid, user, _, _, _, command in rows)
+
+
+def generate_lsof_output(rows: List[PsRow], spec: FixtureSpec) -> str:
+    rng = random.Random(spec.seed + 1)
+    lines = ["COMMAND     PID  USER   FD   TYPE             DEVICE SIZE/OFF NODE NAME"]
+    candidates = [row for row in rows if row[6] != "-bash"] or rows
+    for idx in range(spec.listeners):
+        pid, _, user, _, _, _, command = rng.choice(candidates)
+        name = os.path.basename(command.split()[0])[:9]
+        address = f"{rng.choice(('127.0.0.1', '*', '[::1]'))}:{10000 + idx}"
+        lines.append(f"{name:<9} {pid:>6} {user:<6} {idx + 3}u  IPv4 0x{rng.getrandbits(48):012x}      0t0  TCP {address} (LISTEN)")
+    return "\n".join(lines) + "\n"
+
+
+_TMUX_SHIM = """#!/bin/sh
+echo tmux >> "$BENCH_SPAWN_LOG"
+exec {tmux} -L {socket} -f /dev/null "$@"
+"""
+
+_PS_SHIM = """#!/bin/sh
+echo ps >> "$BENCH_SPAWN_LOG"
+case "$*" in
+  *etime=*) exec cat {fixtures}/ps-full.txt ;;
+  *) exec cat {fixtures}/ps-short.txt ;;
+esac
+"""
+
+_LSOF_SHIM = """#!/bin/sh
+echo lsof >> "$BENCH_SPAWN_LOG"
+exec cat {fixtures}/lsof.txt
+"""
+
+
+class FakeEnvironment:
+    # A private tmux server plus canned ps/lsof, reached by the collectors through PATH shims
+    # that also log every spawn.
+    def __init__(self, spec: FixtureSpec) -> None:
+        self.spec = spec
+        self.root = ""
+        self.socket = f"tmux-dashboard-bench-{os.getpid()}"
+        self._tmux = shutil.which("tmux") or "tmux"
+        self._saved_env: Dict[str, str | None] = {}
+
+    def __enter__(self) -> "FakeEnvironment":
+        self.root = tempfile.mkdtemp(prefix="tmux-dashboard-bench-")
+        os.makedirs(os.path.join(self.root, "bin"))
+        try:
+            self._start_tmux()
+            self._write_fixtures()
+            self._write_shims()
+        except BaseException:
+            self.__exit__(None, None, None)
+            raise
+        self._saved_env = {key: os.environ.get(key) for key in ("PATH", "BENCH_SPAWN_LOG", "TMUX")}
+        os.environ["PATH"] = os.path.join(self.root, "bin") + os.pathsep + os.environ.get("PATH", "")
+        os.environ["BENCH_SPAWN_LOG"] = os.path.join(self.root, "spawns.log")
+        # Running the benchmark from inside tmux must not leak the outer server into the shims.
+        os.environ.pop("TMUX", None)
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        for key, value in self._saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        self._saved_env = {}
+        subprocess.run([self._tmux, "-L", self.socket, "kill-server"], check=False, capture_output=True)
+        if self.root:
+            shutil.rmtree(self.root, ignore_errors=True)
+
+    def tmux(self, *args: str) -> str:
+        completed = subprocess.run(
+            [self._tmux, "-L", self.socket, "-f", "/dev/null", *args], check=True, capture_output=True, text=True
+        )
+        return completed.stdout
+
+    def _start_tmux(self) -> None:
+        fill = shlex.quote(f"seq 1 {self.spec.scrollback_lines}; exec cat")
+        for s in range(self.spec.sessions):
+            for w in range(self.spec.windows):
+                if w == 0:
+                    self.tmux("new-session", "-d", "-s", f"bench{s}", "-x", "400", "-y", "200", f"sh -c {fill}")
+                else:
+                    self.tmux("new-window", "-d", "-t", f"bench{s}", f"sh -c {fill}")
+                target = f"bench{s}:{w}"
+                for _ in range(self.spec.panes - 1):
+                    self.tmux("split-window", "-d", "-t", target, f"sh -c {fill}")
+                    self.tmux("select-layout", "-t", target, "tiled")
+
+    def _write_fixtures(self) -> None:
+        pane_pids = [int(pid) for pid in self.tmux("list-panes", "-a", "-F", "#{pane_pid}").split()]
+        rows = generate_ps_rows(pane_pids, self.spec)
+        fixtures = {
+            "ps-full.txt": format_ps_full(rows),
+            "ps-short.txt": format_ps_short(rows),
+            "lsof.txt": generate_lsof_output(rows, self.spec),
+        }
+        for name, content in fixtures.items():
+            with open(os.path.join(self.root, name), "w", encoding="utf-8") as f:
+                f.write(content)
+
+    def _write_shims(self) -> None:
+        shims = {
+            "tmux": _TMUX_SHIM.format(tmux=shlex.quote(self._tmux), socket=shlex.quote(self.socket)),
+            "ps": _PS_SHIM.format(fixtures=shlex.quote(self.root)),
+            "lsof": _LSOF_SHIM.format(fixtures=shlex.quote(self.root)),
+        }
+        for name, content in shims.items():
+            path = os.path.join(self.root, "bin", name)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.chmod(path, 0o755)
+
+    def pane_ids(self) -> List[str]:
+        return self.tmux("list-panes", "-a", "-F", "#{pane_id}").split()
+
+    def spawn_counts(self) -> Counter:
+        path = os.environ.get("BENCH_SPAWN_LOG", "")
+        if not path or not os.path.exists(path):
+            return Counter()
+        with open(path, encoding="utf-8") as f:
+            return Counter(line.strip() for line in f if line.strip())
+
+    def reset_spawns(self) -> None:
+        path = os.environ.get("BENCH_SPAWN_LOG", "")
+        if path and os.path.exists(path):
+            os.unlink(path)
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+from .run import percentile
+
+DEFAULT_BASE_URL = "http://127.0.0.1:10323"
+POLL_INTERVAL_SEC = 3.0
+REQUEST_TIMEOUT_SEC = 30
+SPAWN_METRIC = "tmux_dashboard_subprocess_duration_seconds_count"
+
+
+class _Stats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.bytes = 0
+
+    def add(self, name: str, latency: float, ok: bool, size: int) -> None:
+        with self._lock:
+            self.latencies[name].append(latency)
+            self.bytes += size
+            if not ok:
+                self.errors[name] += 1
+
+
+class _Client:
+    def __init__(self, base_url: str, stats: _Stats) -> None:
+        self._base_url = base_url.rstrip("/")
+        self._stats = stats
+        self.token = ""
+
+    def request(self, name: str, method: str, path: str, body: Dict[str, Any] | None = None) -> Tuple[int, bytes]:
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        req = urllib.request.Request(self._base_url + path, data=data, method=method)
+        if data is not None:
+            req.add_header("Content-Type", "application/json")
+        if self.token:
+            req.add_header("Authorization", f"Bearer {self.token}")
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=REQUEST_TIMEOUT_SEC) as resp:
+                status, payload = resp.status, resp.read()
+        except urllib.error.HTTPError as e:
+            status, payload = e.code, e.read()
+        except (urllib.error.URLError, OSError):
+            status, payload = 0, b""
+        self._stats.add(name, time.perf_counter() - started, 200 <= status < 300, len(payload))
+        return status, payload
+
+    def login(self, user: str, password: str) -> None:
+        status, payload = self.request("login", "POST", "/api/auth/login", {"user": user, "password": password})
+        if status != 200:
+            raise RuntimeError(f"login failed with status {status}")
+        self.token = json.loads(payload)["token"]
+
+
+def _dashboard_client(client: _Client, interval: float, stop: threading.Event) -> None:
+    # app/page.tsx: one snapshot per interval.
+    while not stop.wait(interval):
+        client.request("snapshot", "GET", "/api/snapshot")
+
+
+def _pane_client(client: _Client, pane_id: str, interval: float, stop: threading.Event) -> None:
+    # app/pane/[paneId]/page.tsx: pane detail with the previous capture token plus a snapshot per interval.
+    path = f"/api/panes/{urllib.parse.quote(pane_id, safe='')}"
+    capture_token = ""
+    while not stop.wait(interval):
+        query = f"?since={urllib.parse.quote(capture_token)}" if capture_token else ""
+        status, payload = client.request("pane_detail", "GET", path + query)
+        if status == 200:
+            capture_token = str(json.loads(payload).get("capture_token", "") or "")
+        client.request("snapshot", "GET", "/api/snapshot")
+
+
+def _send_keys_client(client: _Client, pane_id: str, every: float, burst: int, stop: threading.Event) -> None:
+    while not stop.wait(every):
+        for _ in range(burst):
+            client.request(
+                "send_keys", "POST", "/api/actions/send_keys", {"target_pane": pane_id, "keys": ["-l", ""]}
+            )
+
+
+def parse_spawn_count(text: str) -> float:
+    total = 0.0
+    for line in text.splitlines():
+        if line.startswith(SPAWN_METRIC):
+            total += float(line.rsplit(" ", 1)[1])
+    return total
+
+
+def scrape_spawns(base_url: str, token: str, attempts: int) -> Dict[str, float]:
+    # Each gunicorn worker keeps its own counters; scrape until every worker answered at least once.
+    per_worker: Dict[str, float] = {}
+    for _ in range(attempts):
+        req = urllib.request.Request(base_url.rstrip("/") + "/api/metrics")
+        req.add_header("Authorization", f"Bearer {token}")
+        try:
+            with urllib.request.urlopen(req, timeout=REQUEST_TIMEOUT_SEC) as resp:
+                worker = resp.headers.get("X-Dashboard-Worker", "")
+                per_worker[worker] = parse_spawn_count(resp.read().decode("utf-8"))
+        except (urllib.error.URLError, OSError):
+            continue
+    return per_worker
+
+
+def spawn_delta(before: Dict[str, float], after: Dict[str, float]) -> float:
+    return sum(value - before.get(worker, 0.0) for worker, value in after.items())
+
+
+def _pick_pane(client: _Client) -> str:
+    status, payload = client.request("snapshot", "GET", "/api/snapshot")
+    if status != 200:
+        raise RuntimeError(f"snapshot failed with status {status}")
+    for session in json.loads(payload).get("tmux", {}).get("sessions", []):
+        for window in session.get("windows", []):
+            for pane in window.get("panes", []):
+                return str(pane["id"])
+    raise RuntimeError("no tmux pane available to poll")
+
+
+def build_report(stats: _Stats, elapsed: float, spawns: float | None) -> Dict[str, Any]:
+    endpoints = {}
+    total = 0
+    for name, latencies in sorted(stats.latencies.items()):
+        total += len(latencies)
+        endpoints[name] = {
+            "requests": len(latencies),
+            "errors": stats.errors.get(name, 0),
+            "throughput_rps": round(len(latencies) / elapsed, 3) if elapsed else 0.0,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        }
+    return {
+        "elapsed_sec": round(elapsed, 3),
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 3) if elapsed else 0.0,
+        "response_bytes": stats.bytes,
+        "subprocess_spawns": spawns,
+        "subprocess_spawns_per_sec": round(spawns / elapsed, 3) if spawns is not None and elapsed else None,
+        "endpoints": endpoints,
+    }
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Simulate polling dashboard clients against a running backend.")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL)
+    parser.add_argument("--user", default=os.getenv("DASHBOARD_AUTH_USER", ""))
+    parser.add_argument("--password", default=os.getenv("DASHBOARD_AUTH_PASSWORD", ""))
+    parser.add_argument("--clients", type=int, default=10, help="dashboard (snapshot-only) clients")
+    parser.add_argument("--pane-clients", type=int, default=5, help="pane page clients")
+    parser.add_argument("--pane", default="", help="pane id polled by pane clients (default: first pane)")
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL_SEC)
+    parser.add_argument("--duration", type=float, default=60.0)
+    parser.add_argument("--send-keys-pane", default="", help="enables send_keys bursts against this pane")
+    parser.add_argument("--send-keys-every", type=float, default=10.0)
+    parser.add_argument("--send-keys-burst", type=int, default=20)
+    parser.add_argument("--metrics-scrapes", type=int, default=8, help="scrapes used to reach every worker")
+    parser.add_argument("--output", default="")
+    args = parser.parse_args(argv)
+    if not args.user or not args.password:
+        parser.error("--user/--password (or DASHBOARD_AUTH_USER/PASSWORD) are required")
+
+    stats = _Stats()
+    admin = _Client(args.base_url, stats)
+    admin.login(args.user, args.password)
+    pane_id = args.pane or (_pick_pane(admin) if args.pane_clients else "")
+    spawns_before = scrape_spawns(args.base_url, admin.token, args.metrics_scrapes)
+
+    stop = threading.Event()
+    threads: List[threading.Thread] = []
+
+    def spawn(target, *extra: Any) -> None:
+        client = _Client(args.base_url, stats)
+        client.login(args.user, args.password)
+        thread = threading.Thread(target=target, args=(client, *extra, stop), daemon=True)
+        threads.append(thread)
+
+    for _ in range(max(args.clients, 0)):
+        spawn(_dashboard_client, args.interval)
+    for _ in range(max(args.pane_clients, 0)):
+        spawn(_pane_client, pane_id, args.interval)
+    if args.send_keys_pane:
+        spawn(_send_keys_client, args.send_keys_pane, args.send_keys_every, max(args.send_keys_burst, 1))
+
+    # Login traffic is setup, not steady-state load.
+    stats.latencies.pop("login", None)
+    stats.latencies.pop("snapshot", None)
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+        # Spread clients across the interval like independently opened browser tabs.
+        time.sleep(random.uniform(0, args.interval / max(len(threads), 1)))
+    stop.wait(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=REQUEST_TIMEOUT_SEC)
+    elapsed = time.perf_counter() - started
+
+    spawns_after = scrape_spawns(args.base_url, admin.token, args.metrics_scrapes)
+    spawns = spawn_delta(spawns_before, spawns_after) if spawns_after else None
+    report = build_report(stats, elapsed, spawns)
+    payload = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(payload + "\n")
+    else:
+        print(payload)
+    print(
+        f"[load] {report['requests']} requests in {report['elapsed_sec']}s, "
+        f"{report['throughput_rps']} req/s, spawns/s={report['subprocess_spawns_per_sec']}",
+        file=sys.stderr,
+    )
+    return 1 if any(stats.errors.values()) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
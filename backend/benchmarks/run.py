@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List
+
+from .fixtures import FakeEnvironment, FixtureSpec
+
+REPORT_VERSION = 1
+DEFAULT_THRESHOLD = 0.25
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(latencies: List[float], spawns: Counter, iterations: int) -> Dict[str, Any]:
+    return {
+        "iterations": iterations,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p90_ms": round(percentile(latencies, 90) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+        "max_ms": round(max(latencies, default=0.0) * 1000, 3),
+        "spawns_per_call": round(sum(spawns.values()) / iterations, 3) if iterations else 0.0,
+        "spawns_by_command": {name: round(count / iterations, 3) for name, count in sorted(spawns.items())},
+    }
+
+
+def measure(env: FakeEnvironment, fn: Callable[[], object], iterations: int, warmup: int) -> Dict[str, Any]:
+    for _ in range(warmup):
+        fn()
+    env.reset_spawns()
+    latencies: List[float] = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - started)
+    return summarize(latencies, env.spawn_counts(), iterations)
+
+
+def _scenarios(env: FakeEnvironment) -> Dict[str, Callable[[], object]]:
+    # The package builds a module-level app on import, so credentials must exist first.
+    os.environ.setdefault("DASHBOARD_AUTH_USER", "bench")
+    os.environ.setdefault("DASHBOARD_AUTH_PASSWORD", "bench")
+    from tmux_dashboard import collectors
+    from tmux_dashboard.app import create_app
+
+    pane_id = env.pane_ids()[0]
+    fingerprint, _, _ = str(collectors.collect_pane_detail(pane_id)["capture_token"]).rpartition("@")
+
+    def unchanged_since() -> str:
+        # Re-minted per call so the token never ages past PANE_CAPTURE_MAX_AGE_SEC mid-run.
+        return collectors._capture_token(fingerprint, time.time())
+
+    client = create_app().test_client()
+    login = client.post(
+        "/api/auth/login",
+        json={"user": os.environ["DASHBOARD_AUTH_USER"], "password": os.environ["DASHBOARD_AUTH_PASSWORD"]},
+    )
+    headers = {"Authorization": f"Bearer {login.get_json()['token']}"}
+
+    def get(path: str) -> Callable[[], object]:
+        def call() -> object:
+            resp = client.get(path, headers=headers)
+            if resp.status_code != 200:
+                raise RuntimeError(f"{path} returned {resp.status_code}")
+            return resp.get_data()
+
+        return call
+
+    encoded = pane_id.replace("%", "%25")
+    return {
+        "collect_tmux_state": collectors.collect_tmux_state,
+        "collect_network_state": collectors.collect_network_state,
+        "collect_pane_detail": lambda: collectors.collect_pane_detail(pane_id),
+        "collect_pane_detail_unchanged": lambda: collectors.collect_pane_detail(pane_id, since=unchanged_since()),
+        "route_snapshot": get("/api/snapshot"),
+        "route_pane_detail": get(f"/api/panes/{encoded}"),
+        "route_search": get("/api/search?q=1999"),
+    }
+
+
+def run(spec: FixtureSpec, iterations: int, warmup: int, only: List[str]) -> Dict[str, Any]:
+    with FakeEnvironment(spec) as env:
+        scenarios = _scenarios(env)
+        results = {
+            name: measure(env, fn, iterations, warmup)
+            for name, fn in scenarios.items()
+            if not only or name in only
+        }
+        tmux_version = env.tmux("display-message", "-p", "#{version}").strip()
+    return {
+        "version": REPORT_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "tmux": tmux_version,
+        },
+        "fixture": spec.as_dict(),
+        "scenarios": results,
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[str]:
+    regressions: List[str] = []
+    if baseline.get("fixture") != current.get("fixture"):
+        regressions.append("fixture differs from baseline; latencies are not comparable")
+    for name, result in current.get("scenarios", {}).items():
+        before = baseline.get("scenarios", {}).get(name)
+        if before is None:
+            continue
+        for key in ("p50_ms", "p99_ms"):
+            if before[key] > 0 and result[key] > before[key] * (1 + threshold):
+                regressions.append(f"{name}: {key} {before[key]} -> {result[key]}")
+        # Spawn counts are deterministic, so any increase is a regression.
+        if result["spawns_per_call"] > before["spawns_per_call"]:
+            regressions.append(f"{name}: spawns_per_call {before['spawns_per_call']} -> {result['spawns_per_call']}")
+    return regressions
+
+
+def _print_table(report: Dict[str, Any]) -> None:
+    print(f"{'scenario':<32} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'spawns':>7}", file=sys.stderr)
+    for name, result in report["scenarios"].items():
+        print(
+            f"{name:<32} {result['p50_ms']:>9.2f} {result['p90_ms']:>9.2f} {result['p99_ms']:>9.2f} "
+            f"{result['spawns_per_call']:>7.2f}",
+            file=sys.stderr,
+        )
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark tmux-dashboard collectors and routes against a synthetic tmux server.")
+    parser.add_argument("--sessions", type=int, default=FixtureSpec.sessions)
+    parser.add_argument("--windows", type=int, default=FixtureSpec.windows)
+    parser.add_argument("--panes", type=int, default=FixtureSpec.panes, help="panes per window")
+    parser.add_argument("--scrollback-lines", type=int, default=FixtureSpec.scrollback_lines)
+    parser.add_argument("--processes", type=int, default=FixtureSpec.processes, help="rows in the canned ps output")
+    parser.add_argument("--listeners", type=int, default=FixtureSpec.listeners, help="rows in the canned lsof output")
+    parser.add_argument("--ssh-tunnels", type=int, default=FixtureSpec.ssh_tunnels)
+    parser.add_argument("--seed", type=int, default=FixtureSpec.seed)
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--only", action="append", default=[], help="run only the named scenario (repeatable)")
+    parser.add_argument("--output", default="", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", default="", help="baseline report to check for regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed latency growth ratio")
+    args = parser.parse_args(argv)
+
+    spec = FixtureSpec(
+        sessions=args.sessions,
+        windows=args.windows,
+        panes=args.panes,
+        scrollback_lines=args.scrollback_lines,
+        processes=args.processes,
+        listeners=args.listeners,
+        ssh_tunnels=args.ssh_tunnels,
+        seed=args.seed,
+    )
+    report = run(spec, max(args.iterations, 1), max(args.warmup, 0), args.only)
+    _print_table(report)
+
+    payload = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(payload + "\n")
+    else:
+        print(payload)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.threshold)
+        for line in regressions:
+            print(f"[bench][regression] {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
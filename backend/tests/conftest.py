@@ -11,9 +11,23 @@ if str(ROOT) not in sys.path:
 
 os.environ.setdefault("DASHBOARD_AUTH_USER", "test-user")
 os.environ.setdefault("DASHBOARD_AUTH_PASSWORD", "test-password")
+# App tests stub the lsof/ps collector; the /proc collector has its own tests.
+os.environ.setdefault("DASHBOARD_NETWORK_COLLECTOR", "lsof")
 
 
 @pytest.fixture(autouse=True)
 def _auth_env_defaults(monkeypatch):
     monkeypatch.setenv("DASHBOARD_AUTH_USER", "test-user")
     monkeypatch.setenv("DASHBOARD_AUTH_PASSWORD", "test-password")
+    monkeypatch.setenv("DASHBOARD_NETWORK_COLLECTOR", "lsof")
+
+
+@pytest.fixture(autouse=True)
+def _reset_breakers():
+    from tmux_dashboard import breaker, collectors
+
+    breaker.reset_breakers()
+    collectors.reset_shared_reads()
+    yield
+    breaker.reset_breakers()
+    collectors.reset_shared_reads()
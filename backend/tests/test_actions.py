@@ -20,3 +20,63 @@ def test_send_keys_requires_target_pane():
     result = execute_action("send_keys", {"keys": ["-l", "abc"]})
     assert result["ok"] is False
     assert result["error"] == "target_pane is required"
+
+
+def test_split_window_returns_affected_session_and_refreshes_listings(monkeypatch):
+    from tmux_dashboard import breaker, collectors
+
+    captured = {}
+    marker = collectors.OUTPUT_MARKER
+
+    def fake_run_tmux(args):
+        captured["args"] = args
+        stdout = "\n".join(
+            [
+                "$1\t@2\t%5",
+                f"{marker}:sessions",
+                "$0\tother\t1\t0",
+                "$1\twork\t1\t1",
+                f"{marker}:windows",
+                "other\t@0\t0\tbash\t1\t1",
+                "work\t@2\t0\tvim\t1\t2",
+                f"{marker}:panes",
+                "other\t@0\t%0\t0\t1\t100\tbash\t/tmp\tt\t0:0:0:1",
+                "work\t@2\t%4\t0\t0\t200\tvim\t/src\tt\t0:0:0:1",
+                "work\t@2\t%5\t1\t1\t300\tbash\t/src\tt\t0:0:0:1",
+            ]
+        )
+        return {"ok": True, "stdout": stdout, "stderr": "", "returncode": 0}
+
+    monkeypatch.setattr("tmux_dashboard.actions._run_tmux", fake_run_tmux)
+
+    result = execute_action("split_window", {"target_pane": "%4", "direction": "horizontal"})
+
+    assert captured["args"][:5] == ["split-window", "-P", "-F", collectors.TARGET_IDS_FORMAT, "-h"]
+    assert result["ok"] is True
+    assert result["stdout"] == ""
+    state = result["state"]
+    assert (state["session_id"], state["window_id"], state["pane_id"]) == ("$1", "@2", "%5")
+    assert state["session"]["name"] == "work"
+    assert [pane["id"] for pane in state["session"]["windows"][0]["panes"]] == ["%4", "%5"]
+    assert breaker.recall_stale(["tmux", "list-sessions", "-F", collectors.SESSION_ROW_FORMAT]).endswith("work\t1\t1")
+
+
+def test_kill_of_last_session_is_reported_as_success(monkeypatch):
+    from tmux_dashboard import collectors
+
+    captured = {}
+
+    def fake_run_tmux(args):
+        captured["args"] = args
+        # The listings after the kill find no server, which fails the chain with returncode 1.
+        stdout = f"$0\t@0\t%0\n{collectors.OUTPUT_MARKER}:sessions"
+        return {"ok": False, "stdout": stdout, "stderr": "no current target", "returncode": 1}
+
+    monkeypatch.setattr("tmux_dashboard.actions._run_tmux", fake_run_tmux)
+
+    result = execute_action("kill_session", {"target_session": "main"})
+
+    assert captured["args"][:6] == ["display-message", "-p", "-t", "main", collectors.TARGET_IDS_FORMAT, ";"]
+    assert result["ok"] is True
+    assert result["state"]["session_id"] == "$0"
+    assert result["state"]["session"] is None
@@ -0,0 +1,54 @@
+import threading
+
+import pytest
+
+from tmux_dashboard.admission import AdmissionController, parse_limits
+from tmux_dashboard.routes import admission_class_for
+
+
+def test_queued_request_takes_the_released_slot_and_overflow_is_shed():
+    admission = AdmissionController({"snapshot": (1, 1)})
+    assert admission.acquire("snapshot") == (True, 0)
+
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(admission.acquire("snapshot")))
+    waiter.start()
+    while not admission._classes["snapshot"].waiting:
+        pass
+
+    admitted, retry_after = admission.acquire("snapshot")
+    assert admitted is False
+    assert retry_after >= 1
+
+    admission.release("snapshot", 0.2)
+    waiter.join(timeout=2)
+    assert results == [(True, 0)]
+
+
+def test_lower_class_is_shed_while_a_higher_class_is_queued():
+    now = [0.0]
+    admission = AdmissionController({"pane": (1, 1), "snapshot": (1, 1)}, now=lambda: now[0])
+    assert admission.acquire("pane")[0] is True
+    assert admission.acquire("snapshot")[0] is True
+    admission._classes["pane"].waiting = 1
+
+    assert admission.acquire("snapshot")[0] is False
+    assert admission.acquire("interactive") == (True, 0)
+
+
+def test_parse_limits_overrides_listed_classes():
+    limits = parse_limits("snapshot=4:2, network=2")
+    assert limits["snapshot"] == (4, 2)
+    assert limits["network"] == (2, 0)
+    assert limits["pane"] == (2, 1)
+    with pytest.raises(ValueError):
+        parse_limits("interactive=1:0")
+
+
+def test_downloads_are_limited_and_recording_writes_stay_interactive():
+    assert admission_class_for("pane_history", "GET") == "pane"
+    assert admission_class_for("recordings", "GET") == "pane"
+    assert admission_class_for("pane_recording", "GET") == "pane"
+    assert admission_class_for("pane_recording", "POST") == "interactive"
+    assert admission_class_for("actions", "OPTIONS") is None
+    assert admission_class_for("health", "GET") is None
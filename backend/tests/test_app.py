@@ -1,3 +1,4 @@
+import threading
 from types import SimpleNamespace
 
 from tmux_dashboard.app import create_app
@@ -133,6 +134,9 @@ def test_auth_session_and_snapshot_with_token(monkeypatch):
     snapshot_resp = client.get("/api/snapshot", headers=headers)
     assert snapshot_resp.status_code == 200
     assert snapshot_resp.get_json()["tmux"]["available"] is True
+    assert 1000 <= snapshot_resp.get_json()["next_poll_ms"] <= 15000
+    assert snapshot_resp.get_json()["network"]["event_seq"] == 0
+    assert client.get("/api/snapshot?since=x", headers=headers).status_code == 400
 
 
 def test_disabled_action_returns_403(monkeypatch):
@@ -183,7 +187,7 @@ def test_pane_detail_requires_auth():
 
 
 def test_pane_detail_returns_404_when_not_found(monkeypatch):
-    monkeypatch.setattr("tmux_dashboard.app.collect_pane_detail", lambda pane_id: None)
+    monkeypatch.setattr("tmux_dashboard.app.collect_pane_detail", lambda pane_id, since="": None)
     app = create_app()
     client = app.test_client()
     token = _login_and_get_token(client)
@@ -196,7 +200,7 @@ def test_pane_detail_returns_404_when_not_found(monkeypatch):
 def test_pane_detail_returns_detail(monkeypatch):
     monkeypatch.setattr(
         "tmux_dashboard.app.collect_pane_detail",
-        lambda pane_id: {
+        lambda pane_id, since="": {
             "session": {"name": "s0", "attached": True},
             "window": {"id": "@1", "index": 0, "name": "w0", "active": True},
             "pane": {
@@ -222,6 +226,7 @@ def test_pane_detail_returns_detail(monkeypatch):
     assert payload["ok"] is True
     assert payload["pane"]["id"] == "%1"
     assert "line1" in payload["output"]
+    assert isinstance(payload["next_poll_ms"], int)
 
 
 def test_auth_secret_is_auto_generated_when_missing(monkeypatch):
@@ -309,3 +314,253 @@ def test_resolve_client_ip_ignores_forwarded_headers_for_non_loopback():
         headers={"X-Forwarded-For": "198.51.100.40", "X-Real-IP": "198.51.100.41"},
     )
     assert _resolve_client_ip(req) == "203.0.113.9"
+
+
+def test_pane_history_streams_attachment(monkeypatch):
+    calls = {}
+
+    def fake_stream(pane_id, compress=False):
+        calls["args"] = (pane_id, compress)
+        return iter([b"line1\n", b"line2\n"])
+
+    monkeypatch.setattr("tmux_dashboard.app.stream_pane_history", fake_stream)
+    app = create_app()
+    client = app.test_client()
+    token = _login_and_get_token(client)
+
+    resp = client.get("/api/panes/%251/history?gzip=1", headers={"Authorization": f"Bearer {token}"})
+    assert resp.status_code == 200
+    assert resp.data == b"line1\nline2\n"
+    assert resp.mimetype == "application/gzip"
+    assert 'filename="pane-1-history.txt.gz"' in resp.headers["Content-Disposition"]
+    assert calls["args"] == ("%1", True)
+
+
+def test_pane_history_returns_404_when_not_found(monkeypatch):
+    monkeypatch.setattr("tmux_dashboard.app.stream_pane_history", lambda pane_id, compress=False: None)
+    app = create_app()
+    client = app.test_client()
+    token = _login_and_get_token(client)
+
+    resp = client.get("/api/panes/%251/history", headers={"Authorization": f"Bearer {token}"})
+    assert resp.status_code == 404
+    assert resp.get_json()["ok"] is False
+
+
+def test_search_requires_query(monkeypatch):
+    app = create_app()
+    client = app.test_client()
+    token = _login_and_get_token(client)
+
+    resp = client.get("/api/search?q=", headers={"Authorization": f"Bearer {token}"})
+    assert resp.status_code == 400
+
+
+def test_search_rejects_invalid_regex(monkeypatch):
+    monkeypatch.setattr("tmux_dashboard.collectors.collect_pane_fingerprints", lambda: {})
+    app = create_app()
+    client = app.test_client()
+    token = _login_and_get_token(client)
+
+    resp = client.get("/api/search?q=(&regex=1", headers={"Authorization": f"Bearer {token}"})
+    assert resp.status_code == 400
+    assert resp.get_json()["error"] == "invalid regular expression"
+
+
+def test_pane_recording_returns_404_when_recorder_disabled(monkeypatch):
+    monkeypatch.delenv("DASHBOARD_RECORDER_DIR", raising=False)
+    app = create_app()
+    client = app.test_client()
+    token = _login_and_get_token(client)
+
+    resp = client.post("/api/panes/%251/recording", json={"enabled": True}, headers={"Authorization": f"Bearer {token}"})
+    assert resp.status_code == 404
+    assert resp.get_json()["error"] == "recorder is disabled"
+
+
+def test_logout_revokes_token():
+    app = create_app()
+    client = app.test_client()
+    token = _login_and_get_token(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/api/auth/session", headers=headers).status_code == 200
+
+    resp = client.post("/api/auth/logout", headers=headers)
+    assert resp.status_code == 200
+    assert client.get("/api/auth/session", headers=headers).status_code == 401
+
+
+def test_metrics_requires_auth_and_reports_routes():
+    app = create_app()
+    client = app.test_client()
+    assert client.get("/api/metrics").status_code == 401
+
+    token = _login_and_get_token(client)
+    client.get("/api/health")
+    resp = client.get("/api/metrics", headers={"Authorization": f"Bearer {token}"})
+    assert resp.status_code == 200
+    assert resp.mimetype == "text/plain"
+    body = resp.get_data(as_text=True)
+    assert "# TYPE tmux_dashboard_http_request_duration_seconds histogram" in body
+    assert 'route="/api/health",method="GET",status="200"' in body
+    assert resp.headers["X-Dashboard-Worker"].isdigit()
+
+
+def test_metrics_accepts_static_scrape_token(monkeypatch):
+    monkeypatch.setenv("DASHBOARD_METRICS_TOKEN", "scrape-secret")
+    app = create_app()
+    client = app.test_client()
+
+    assert client.get("/api/metrics", headers={"Authorization": "Bearer scrape-secret"}).status_code == 200
+    assert client.get("/api/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+
+
+def test_pane_batch_validates_and_dedupes_request(monkeypatch):
+    received = []
+
+    def fake_batch(targets):
+        received.append(targets)
+        return {"panes": [{"pane": {"id": "%1", "fingerprint": "f"}, "output": "x\n", "unchanged": False}], "missing": ["%2"]}
+
+    monkeypatch.setattr("tmux_dashboard.app.collect_pane_batch", fake_batch)
+    app = create_app()
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {_login_and_get_token(client)}"}
+
+    assert client.post("/api/panes/batch", json={"panes": ["%1"]}).status_code == 401
+    assert client.post("/api/panes/batch", json={"panes": []}, headers=headers).status_code == 400
+    assert client.post("/api/panes/batch", json={"panes": ["%1"] * 33}, headers=headers).status_code == 400
+    assert client.post("/api/panes/batch", json={"panes": [{"id": "%1", "lines": "x"}]}, headers=headers).status_code == 400
+
+    resp = client.post(
+        "/api/panes/batch",
+        json={"panes": ["%1", {"id": "%2", "lines": 99999, "since": "fp"}, "%1"]},
+        headers=headers,
+    )
+    assert resp.status_code == 200
+    payload = resp.get_json()
+    assert payload["ok"] is True
+    assert payload["missing"] == ["%2"]
+    assert "next_poll_ms" in payload
+    assert received == [[{"id": "%1", "lines": 200, "since": ""}, {"id": "%2", "lines": 2000, "since": "fp"}]]
+
+
+def test_port_lookup_returns_owning_pane(monkeypatch):
+    monkeypatch.setenv("DASHBOARD_AUTH_USER", "tester")
+    monkeypatch.setenv("DASHBOARD_AUTH_PASSWORD", "pass123")
+    server = {"command": "node", "pid": "300", "user": "me", "address": "*:3000", "port": 3000, "pane": {"pane_id": "%1"}}
+    monkeypatch.setattr(
+        "tmux_dashboard.app.collect_network_state",
+        lambda: {"listening_servers": [server], "ssh_connections": [], "ssh_tunnels": []},
+    )
+
+    app = create_app()
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {_login_and_get_token(client, 'tester', 'pass123')}"}
+
+    resp = client.get("/api/ports/3000", headers=headers)
+    assert resp.status_code == 200
+    assert resp.get_json()["listeners"][0]["pane"]["pane_id"] == "%1"
+    assert client.get("/api/ports/4000", headers=headers).status_code == 404
+
+
+def test_saturated_snapshot_class_is_shed_while_actions_still_run(monkeypatch):
+    monkeypatch.setenv("DASHBOARD_ADMISSION_LIMITS", "snapshot=1:0")
+    started = threading.Event()
+    unblock = threading.Event()
+
+    def slow_tmux_state():
+        started.set()
+        unblock.wait(timeout=5)
+        return {"available": True, "running": True, "error": "", "sessions": []}
+
+    monkeypatch.setattr("tmux_dashboard.app.collect_tmux_state", slow_tmux_state)
+    monkeypatch.setattr(
+        "tmux_dashboard.app.collect_network_state",
+        lambda: {"listening_servers": [], "ssh_connections": [], "ssh_tunnels": []},
+    )
+    monkeypatch.setattr("tmux_dashboard.app.execute_action", lambda action, payload: {"ok": True})
+    app = create_app()
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {_login_and_get_token(client)}"}
+
+    first = threading.Thread(target=lambda: app.test_client().get("/api/snapshot", headers=headers))
+    first.start()
+    assert started.wait(timeout=5)
+    try:
+        shed = client.get("/api/snapshot", headers=headers)
+        assert shed.status_code == 503
+        assert int(shed.headers["Retry-After"]) >= 1
+        # Without a valid token the request never competes for a slot.
+        assert client.get("/api/snapshot").status_code == 401
+        assert client.post("/api/actions/select_pane", json={"target_pane": "%1"}, headers=headers).status_code == 200
+    finally:
+        unblock.set()
+        first.join(timeout=5)
+    assert client.get("/api/snapshot", headers=headers).status_code == 200
+
+
+def test_profile_header_returns_server_timing_and_feeds_folded_export(monkeypatch):
+    monkeypatch.setenv("DASHBOARD_PROFILE_SAMPLE_EVERY", "0")
+    monkeypatch.setattr(
+        "tmux_dashboard.app.collect_tmux_state",
+        lambda: {"available": True, "running": True, "error": "", "sessions": []},
+    )
+    monkeypatch.setattr(
+        "tmux_dashboard.app.collect_network_state",
+        lambda: {"listening_servers": [], "ssh_connections": [], "ssh_tunnels": []},
+    )
+    app = create_app()
+    client = app.test_client()
+    token = _login_and_get_token(client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    # Without the header and with sampling off nothing is traced.
+    assert "Server-Timing" not in client.get("/api/snapshot", headers=headers).headers
+    assert client.get("/api/snapshot", headers={"X-Dashboard-Profile": "1"}).status_code == 401
+
+    resp = client.get("/api/snapshot", headers={**headers, "X-Dashboard-Profile": "1"})
+    assert resp.status_code == 200
+    timing = resp.headers["Server-Timing"]
+    assert timing.startswith("total;dur=")
+    assert 'desc="tmux_state"' in timing and 'desc="json encode"' in timing
+
+    assert client.get("/api/profile").status_code == 401
+    report = client.get("/api/profile", headers=headers).get_json()
+    assert [item["route"] for item in report["requests"]] == ["GET /api/snapshot"]
+    assert report["requests"][0]["forced"] is True
+    stacks = client.get("/api/profile?format=folded", headers=headers).get_data(as_text=True)
+    assert "GET /api/snapshot;tmux_state " in stacks
+    assert "GET /api/snapshot;json encode " in stacks
+
+
+def test_archive_reconstructs_a_killed_pane(monkeypatch, tmp_path):
+    monkeypatch.setenv("DASHBOARD_ARCHIVE_DIR", str(tmp_path))
+    panes = [{"id": "%1", "current_command": "vim"}, {"id": "%2", "current_command": "python"}]
+    window = {"id": "@1", "index": 0, "name": "main", "active": True, "panes": panes}
+    monkeypatch.setattr(
+        "tmux_dashboard.app.collect_tmux_state",
+        lambda: {"available": True, "running": True, "error": "", "sessions": [{"name": "work", "windows": [window]}]},
+    )
+    monkeypatch.setattr(
+        "tmux_dashboard.app.collect_network_state",
+        lambda: {"listening_servers": [], "ssh_connections": [], "ssh_tunnels": []},
+    )
+    app = create_app()
+    client = app.test_client()
+    token = _login_and_get_token(client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert client.get("/api/archive?ago=0").status_code == 401
+    assert client.get("/api/snapshot", headers=headers).status_code == 200
+    del panes[1]
+
+    stats = client.get("/api/archive", headers=headers).get_json()
+    assert stats["records"] == 1
+    resp = client.get("/api/archive?ago=0&pane=%252", headers=headers)
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body["pane"]["current_command"] == "python"
+    assert body["session"]["name"] == "work"
+    assert client.get(f"/api/archive?at={stats['first'] - 1}", headers=headers).status_code == 404
+    assert client.get("/api/archive?at=yesterday", headers=headers).status_code == 400
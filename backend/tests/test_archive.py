@@ -0,0 +1,100 @@
+import copy
+import os
+
+from tmux_dashboard.archive import SnapshotArchive
+
+
+def _state(panes, cpu="0.0"):
+    return {
+        "available": True,
+        "running": True,
+        "error": "",
+        "sessions": [
+            {
+                "name": "work",
+                "attached": True,
+                "windows": [
+                    {
+                        "id": "@1",
+                        "index": 0,
+                        "name": "main",
+                        "active": True,
+                        "panes": [
+                            {"id": pane_id, "current_command": command, "process": {"cpu_percent": cpu}, "tags": []}
+                            for pane_id, command in panes
+                        ],
+                    }
+                ],
+            }
+        ],
+    }
+
+
+NETWORK = {"listening_servers": [], "ssh_connections": [], "ssh_tunnels": [], "events": [{"kind": "x"}]}
+
+
+def test_reconstructs_each_recorded_snapshot_with_bounded_deltas(tmp_path):
+    archive = SnapshotArchive(str(tmp_path), interval_sec=10, keyframe_every=3)
+    recorded = {}
+    for step in range(8):
+        panes = [("%1", "vim"), ("%2", "python")] if step < 5 else [("%1", "vim")]
+        tmux_state = _state(panes, cpu=f"{step}.0")
+        assert archive.record(tmux_state, NETWORK, now_ts=1000.0 + step * 10)
+        recorded[1000.0 + step * 10] = copy.deepcopy(tmux_state)
+    # Inside the interval nothing is written.
+    assert not archive.record(_state([]), NETWORK, now_ts=1075.0)
+
+    for ts, tmux_state in recorded.items():
+        snapshot = archive.at(ts + 5)
+        assert snapshot["recorded_at"] == ts
+        assert snapshot["tmux"] == tmux_state
+        assert snapshot["network"] == {"listening_servers": [], "ssh_connections": [], "ssh_tunnels": []}
+        assert snapshot["deltas_applied"] <= 3
+    assert archive.at(999.0) is None
+    # The pane killed after step 4 is still there in the past.
+    panes = archive.at(1040.0)["tmux"]["sessions"][0]["windows"][0]["panes"]
+    assert [pane["id"] for pane in panes] == ["%1", "%2"]
+
+    stats = archive.stats()
+    assert stats["records"] == 8 and stats["keyframes"] == 2
+    assert (stats["first"], stats["last"]) == (1000.0, 1070.0)
+
+
+def test_static_server_deltas_stay_small(tmp_path):
+    archive = SnapshotArchive(str(tmp_path), interval_sec=1, keyframe_every=1000)
+    panes = [(f"%{index}", "bash") for index in range(50)]
+    archive.record(_state(panes), NETWORK, now_ts=0.0)
+    keyframe_bytes = archive.stats()["bytes"]
+    for step in range(1, 101):
+        archive.record(_state(panes), NETWORK, now_ts=float(step))
+
+    assert archive.stats()["bytes"] - keyframe_bytes < 100 * 32
+
+
+def test_workers_share_one_chain(tmp_path):
+    first = SnapshotArchive(str(tmp_path), interval_sec=10, keyframe_every=100)
+    second = SnapshotArchive(str(tmp_path), interval_sec=10, keyframe_every=100)
+    writers = [first, second, second, first, second]
+    for step, writer in enumerate(writers):
+        assert writer.record(_state([("%1", f"cmd{step}")]), NETWORK, now_ts=100.0 + step * 10)
+    # The other worker already recorded this interval.
+    assert not first.record(_state([("%1", "late")]), NETWORK, now_ts=145.0)
+
+    assert first.stats()["keyframes"] == 1
+    for step in range(len(writers)):
+        pane = first.at(100.0 + step * 10)["tmux"]["sessions"][0]["windows"][0]["panes"][0]
+        assert pane["current_command"] == f"cmd{step}"
+
+
+def test_rotation_drops_whole_keyframe_groups(tmp_path):
+    archive = SnapshotArchive(str(tmp_path), interval_sec=1, max_segments=2, keyframe_every=4, segment_bytes=1)
+    for step in range(12):
+        archive.record(_state([("%1", f"cmd{step}")]), NETWORK, now_ts=float(step))
+
+    segments = sorted(name for name in os.listdir(tmp_path) if name.startswith("snapshots-"))
+    assert len(segments) == 2
+    stats = archive.stats()
+    assert stats["first"] > 0.0 and stats["last"] == 11.0
+    assert archive.at(0.0) is None
+    pane = archive.at(11.0)["tmux"]["sessions"][0]["windows"][0]["panes"][0]
+    assert pane["current_command"] == "cmd11"
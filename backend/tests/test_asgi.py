@@ -0,0 +1,190 @@
+import asyncio
+import json
+
+from tmux_dashboard import async_collectors
+from tmux_dashboard.asgi import create_asgi_app
+from tmux_dashboard.singleflight import AsyncSingleFlight
+
+
+async def _call(app, method: str, path: str, body: bytes = b"", headers=None, query: bytes = b""):
+    status, _headers, payload = await _call_with_headers(app, method, path, body, headers, query)
+    return status, payload
+
+
+async def _call_with_headers(app, method: str, path: str, body: bytes = b"", headers=None, query: bytes = b""):
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": query,
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 10323),
+    }
+    await app(scope, receive, send)
+    status = sent[0]["status"]
+    response_headers = {name.decode(): value.decode() for name, value in sent[0]["headers"]}
+    payload = b"".join(message.get("body", b"") for message in sent[1:])
+    return status, response_headers, payload
+
+
+async def _login(app) -> dict:
+    status, payload = await _call(
+        app,
+        "POST",
+        "/api/auth/login",
+        body=json.dumps({"user": "test-user", "password": "test-password"}).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    assert status == 200
+    return {"Authorization": f"Bearer {json.loads(payload)['token']}"}
+
+
+def test_asgi_serves_health_and_requires_auth():
+    app = create_asgi_app()
+
+    async def scenario():
+        assert await _call(app, "GET", "/api/health") == (200, b'{"ok":true}\n')
+        status, _ = await _call(app, "GET", "/api/snapshot")
+        assert status == 401
+
+    asyncio.run(scenario())
+
+
+def test_asgi_snapshot_and_pane_detail_use_async_collectors(monkeypatch):
+    calls = []
+
+    async def fake_tmux_state():
+        calls.append("tmux")
+        return {"available": True, "running": True, "sessions": [], "error": ""}
+
+    async def fake_network_state():
+        return {"listening_servers": [], "ssh_connections": [], "ssh_tunnels": []}
+
+    async def fake_pane_detail(pane_id, since=""):
+        if pane_id != "%1":
+            return None
+        return {"session": {}, "window": {}, "pane": {"id": pane_id, "fingerprint": "f"}, "unchanged": since == "f"}
+
+    monkeypatch.setattr("tmux_dashboard.asgi.collect_tmux_state_async", fake_tmux_state)
+    monkeypatch.setattr("tmux_dashboard.asgi.collect_network_state_async", fake_network_state)
+    monkeypatch.setattr("tmux_dashboard.asgi.collect_pane_detail_async", fake_pane_detail)
+    app = create_asgi_app()
+
+    async def scenario():
+        headers = await _login(app)
+        status, payload = await _call(app, "GET", "/api/snapshot", headers=headers)
+        assert status == 200
+        assert json.loads(payload)["tmux"]["running"] is True
+
+        status, payload = await _call(app, "GET", "/api/panes/%1", headers=headers, query=b"since=f")
+        assert status == 200
+        assert json.loads(payload)["unchanged"] is True
+
+        status, _ = await _call(app, "GET", "/api/panes/%9", headers=headers)
+        assert status == 404
+
+    asyncio.run(scenario())
+    assert calls == ["tmux"]
+
+
+def test_asgi_native_snapshot_goes_through_admission(monkeypatch):
+    monkeypatch.setenv("DASHBOARD_ADMISSION_LIMITS", "snapshot=1:0")
+    release = asyncio.Event()
+
+    async def slow_tmux_state():
+        await release.wait()
+        return {"available": True, "running": True, "sessions": [], "error": ""}
+
+    async def fake_network_state():
+        return {"listening_servers": [], "ssh_connections": [], "ssh_tunnels": []}
+
+    monkeypatch.setattr("tmux_dashboard.asgi.collect_tmux_state_async", slow_tmux_state)
+    monkeypatch.setattr("tmux_dashboard.asgi.collect_network_state_async", fake_network_state)
+    app = create_asgi_app()
+
+    async def scenario():
+        headers = await _login(app)
+        first = asyncio.ensure_future(_call(app, "GET", "/api/snapshot", headers=headers))
+        await asyncio.sleep(0.2)
+        status, payload = await _call(app, "GET", "/api/snapshot", headers=headers)
+        assert status == 503
+        assert json.loads(payload)["code"] == "OVERLOADED"
+        assert (await _call(app, "GET", "/api/snapshot"))[0] == 401
+        release.set()
+        assert (await first)[0] == 200
+        assert (await _call(app, "GET", "/api/snapshot", headers=headers))[0] == 200
+
+    asyncio.run(scenario())
+
+
+def test_asgi_profile_header_traces_native_snapshot(monkeypatch):
+    monkeypatch.setenv("DASHBOARD_PROFILE_SAMPLE_EVERY", "0")
+
+    async def fake_tmux_state():
+        return {"available": True, "running": True, "sessions": [], "error": ""}
+
+    async def fake_network_state():
+        return {"listening_servers": [], "ssh_connections": [], "ssh_tunnels": []}
+
+    monkeypatch.setattr("tmux_dashboard.asgi.collect_tmux_state_async", fake_tmux_state)
+    monkeypatch.setattr("tmux_dashboard.asgi.collect_network_state_async", fake_network_state)
+    app = create_asgi_app()
+
+    async def scenario():
+        headers = await _login(app)
+        status, plain, _ = await _call_with_headers(app, "GET", "/api/snapshot", headers=headers)
+        assert status == 200
+        assert "server-timing" not in plain
+        status, traced, _ = await _call_with_headers(
+            app, "GET", "/api/snapshot", headers={**headers, "X-Dashboard-Profile": "1"}
+        )
+        assert status == 200
+        assert "tmux_state" in traced["server-timing"]
+        assert "json encode" in traced["server-timing"]
+
+        status, _, payload = await _call_with_headers(app, "GET", "/api/profile", headers=headers)
+        assert [trace["route"] for trace in json.loads(payload)["requests"]] == ["GET /api/snapshot"]
+
+    asyncio.run(scenario())
+
+
+def test_run_command_async_kills_on_timeout(monkeypatch):
+    monkeypatch.setattr("tmux_dashboard.async_collectors.COMMAND_TIMEOUT_SEC", 0.2)
+
+    async def scenario():
+        assert await async_collectors._run_command_async(["sh", "-c", "echo ' hi '"]) == "hi"
+        assert await async_collectors._run_command_async(["sh", "-c", "exit 3"]) == ""
+        assert await async_collectors._run_command_async(["sleep", "5"]) == ""
+        assert await async_collectors._run_command_async(["/nonexistent/binary"]) == ""
+
+    asyncio.run(scenario())
+
+
+def test_async_single_flight_shares_one_call():
+    flights = AsyncSingleFlight()
+    started = []
+
+    async def collect(value):
+        started.append(value)
+        await asyncio.sleep(0.05)
+        return value * 2
+
+    async def scenario():
+        return await asyncio.gather(*(flights.do("k", collect, 21) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == [42] * 5
+    assert started == [21]
+    assert flights.executed == 1
+    assert flights.shared == 4
@@ -0,0 +1,65 @@
+from tmux_dashboard.auth import AuthService
+from tmux_dashboard.config import load_config
+from tmux_dashboard.throttle import SqliteThrottleStore
+
+
+def _service(monkeypatch, **env):
+    monkeypatch.setenv("DASHBOARD_AUTH_SECRET", "fixed-secret-for-tests")
+    for key, value in env.items():
+        monkeypatch.setenv(key, value)
+    return AuthService(load_config())
+
+
+def test_verified_tokens_are_served_from_cache(monkeypatch):
+    auth = _service(monkeypatch)
+    header = f"Bearer {auth.issue_token('alice')}"
+    assert auth.authenticate_bearer_token(header) == "alice"
+
+    calls = []
+    original = auth._serializer.loads
+    monkeypatch.setattr(auth._serializer, "loads", lambda *a, **kw: calls.append(1) or original(*a, **kw))
+    for _ in range(5):
+        assert auth.authenticate_bearer_token(header) == "alice"
+    assert calls == []
+
+
+def test_cached_token_still_expires_after_ttl(monkeypatch):
+    auth = _service(monkeypatch, DASHBOARD_AUTH_TOKEN_TTL_SEC="60")
+    header = f"Bearer {auth.issue_token('alice')}"
+    assert auth.authenticate_bearer_token(header) == "alice"
+
+    real_now = auth.now()
+    monkeypatch.setattr(auth, "now", lambda: real_now + 120)
+    monkeypatch.setattr("itsdangerous.timed.time.time", lambda: real_now + 120)
+    assert auth.authenticate_bearer_token(header) is None
+
+
+def test_token_cache_is_bounded(monkeypatch):
+    auth = _service(monkeypatch, DASHBOARD_AUTH_TOKEN_CACHE_SIZE="2")
+    for user in ("a", "b", "c"):
+        assert auth.authenticate_bearer_token(f"Bearer {auth.issue_token(user)}") == user
+    assert len(auth._token_cache) == 2
+
+
+def test_revoked_token_is_rejected(monkeypatch):
+    auth = _service(monkeypatch)
+    header = f"Bearer {auth.issue_token('alice')}"
+    assert auth.authenticate_bearer_token(header) == "alice"
+
+    assert auth.revoke_token(header) is True
+    assert auth.authenticate_bearer_token(header) is None
+    assert auth.revoke_token("Bearer not-a-token") is False
+
+
+def test_revocation_is_shared_between_workers(monkeypatch, tmp_path):
+    monkeypatch.setenv("DASHBOARD_AUTH_SECRET", "fixed-secret-for-tests")
+    path = str(tmp_path / "throttle.sqlite3")
+    worker_a = AuthService(load_config(), SqliteThrottleStore(path))
+    worker_b = AuthService(load_config(), SqliteThrottleStore(path))
+    header = f"Bearer {worker_a.issue_token('alice')}"
+    assert worker_a.authenticate_bearer_token(header) == "alice"
+    assert worker_b.authenticate_bearer_token(header) == "alice"
+
+    assert worker_a.revoke_token(header) is True
+    assert worker_b.authenticate_bearer_token(header) is None
+    assert worker_a.authenticate_bearer_token(header) is None
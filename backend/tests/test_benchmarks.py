@@ -0,0 +1,43 @@
+from benchmarks.fixtures import FixtureSpec, format_ps_full, generate_lsof_output, generate_ps_rows
+from benchmarks.loadtest import parse_spawn_count, spawn_delta
+from benchmarks.run import compare, percentile
+
+
+def test_generated_ps_rows_are_deterministic_and_parseable():
+    spec = FixtureSpec(processes=50, children_per_pane=2, ssh_tunnels=4, listeners=5)
+    rows = generate_ps_rows([4000, 4100], spec)
+    assert rows == generate_ps_rows([4000, 4100], spec)
+    assert len(rows) == 50
+    assert sum(1 for row in rows if row[6].startswith("ssh -N")) == 4
+
+    for line in format_ps_full(rows).splitlines():
+        assert len(line.split(None, 6)) == 7
+    lsof_lines = generate_lsof_output(rows, spec).splitlines()
+    assert len(lsof_lines) == 6
+    assert all(len(line.split()) >= 9 for line in lsof_lines[1:])
+
+
+def test_percentile_interpolates():
+    assert percentile([], 50) == 0.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.5
+    assert percentile([1.0, 2.0, 3.0, 4.0], 100) == 4.0
+
+
+def test_compare_flags_latency_and_spawn_regressions():
+    fixture = FixtureSpec().as_dict()
+    baseline = {"fixture": fixture, "scenarios": {"snap": {"p50_ms": 10.0, "p99_ms": 20.0, "spawns_per_call": 4.0}}}
+    current = {"fixture": fixture, "scenarios": {"snap": {"p50_ms": 11.0, "p99_ms": 30.0, "spawns_per_call": 5.0}}}
+
+    regressions = compare(baseline, current, threshold=0.25)
+    assert regressions == ["snap: p99_ms 20.0 -> 30.0", "snap: spawns_per_call 4.0 -> 5.0"]
+
+
+def test_loadtest_sums_spawns_across_workers():
+    text = (
+        "# TYPE tmux_dashboard_subprocess_duration_seconds histogram\n"
+        'tmux_dashboard_subprocess_duration_seconds_bucket{command="ps",le="+Inf"} 7\n'
+        'tmux_dashboard_subprocess_duration_seconds_count{command="ps"} 7\n'
+        'tmux_dashboard_subprocess_duration_seconds_count{command="tmux list-panes"} 5\n'
+    )
+    assert parse_spawn_count(text) == 12.0
+    assert spawn_delta({"10": 12.0, "11": 3.0}, {"10": 20.0, "11": 4.0, "12": 2.0}) == 11.0
@@ -0,0 +1,116 @@
+import subprocess
+import threading
+from types import SimpleNamespace
+
+from tmux_dashboard import breaker
+from tmux_dashboard.actions import execute_action
+from tmux_dashboard.breaker import TIMEOUT_MIN_SAMPLES, TIMEOUT_MIN_SEC, CircuitBreaker
+from tmux_dashboard.collectors import collect_network_state
+
+
+def test_breaker_trips_after_consecutive_timeouts_and_probe_closes_it():
+    probed = threading.Event()
+
+    def probe(args, timeout):
+        probed.set()
+        return True
+
+    guard = CircuitBreaker("lsof", 5.0, failure_threshold=2, reset_sec=0.01, probe=probe)
+    guard.record_timeout(["lsof"])
+    guard.record_success(0.1)
+    guard.record_timeout(["lsof"])
+    assert guard.allow()
+
+    guard.record_timeout(["lsof", "-nP"])
+    assert not guard.allow()
+    assert probed.wait(2)
+    guard._probe_thread.join(2)
+    assert guard.allow()
+
+
+def test_breaker_adapts_timeout_to_observed_latency():
+    guard = CircuitBreaker("ps", 5.0)
+    assert guard.timeout() == 5.0
+    for _ in range(TIMEOUT_MIN_SAMPLES):
+        guard.record_success(0.01)
+    assert guard.timeout() == TIMEOUT_MIN_SEC
+    for _ in range(TIMEOUT_MIN_SAMPLES):
+        guard.record_success(0.4)
+    assert guard.timeout() == 1.6
+
+
+def test_breaker_learns_latency_per_sub_command():
+    guard = CircuitBreaker("tmux", 5.0)
+    listing = ["tmux", "list-sessions", "-F", "#{session_id}"]
+    for _ in range(TIMEOUT_MIN_SAMPLES):
+        guard.record_success(0.01, listing)
+    assert guard.timeout(listing) == TIMEOUT_MIN_SEC
+    assert guard.timeout(["tmux", "list-panes", "-a", ";", "capture-pane", "-p", "-t", "%1"]) == 5.0
+    assert guard.timeout(["tmux", "capture-pane", "-p", "-t", "%1", "-S", "-"]) == 5.0
+
+    kill = ["tmux", "display-message", "-p", "-t", "%1", "#{pane_id}", ";", "kill-pane", "-t", "%1"]
+    for _ in range(TIMEOUT_MIN_SAMPLES):
+        guard.record_success(0.01, kill)
+    assert guard.timeout(kill) == 5.0
+
+
+def test_collectors_serve_last_good_output_marked_stale(monkeypatch):
+    state = {"hang": False}
+
+    def fake_run(args, **kwargs):
+        if state["hang"]:
+            raise subprocess.TimeoutExpired(args, kwargs.get("timeout"))
+        if args[0] == "lsof":
+            return SimpleNamespace(returncode=0, stdout="COMMAND PID USER FD TYPE DEVICE SIZE NODE NAME\nnode 10 me 3u IPv4 0x1 0t0 TCP *:3000 (LISTEN)\n")
+        return SimpleNamespace(returncode=0, stdout="")
+
+    monkeypatch.setattr("tmux_dashboard.collectors.subprocess.run", fake_run)
+    guard = breaker.breaker_for(["lsof"], 5)
+    monkeypatch.setattr(guard, "_probe", lambda args, timeout: False)
+    fresh = collect_network_state()
+    assert "stale" not in fresh
+
+    state["hang"] = True
+    stale = collect_network_state()
+    assert stale["stale"] is True
+    assert stale["listening_servers"] == fresh["listening_servers"]
+
+    for _ in range(2):
+        collect_network_state()
+    assert guard.is_open
+
+    calls = []
+    monkeypatch.setattr("tmux_dashboard.collectors.subprocess.run", lambda args, **_kw: calls.append(args))
+    short_circuited = collect_network_state()
+    assert short_circuited["stale"] is True
+    assert short_circuited["listening_servers"] == fresh["listening_servers"]
+    assert not any(args[0] == "lsof" for args in calls)
+
+
+def test_only_snapshot_listings_are_kept_as_last_good_output():
+    listing = ["tmux", "list-sessions", "-F", "#{session_id}", ";", "list-panes", "-a"]
+    capture = ["tmux", "list-panes", "-a", ";", "capture-pane", "-p", "-t", "%1"]
+    breaker.remember(listing, "$1")
+    breaker.remember(["ps", "-axo", "pid="], "1")
+    breaker.remember(capture, "password=hunter2")
+    breaker.remember(["tmux", "capture-pane", "-p", "-t", "%1"], "password=hunter2")
+
+    assert breaker.recall_stale(listing) == "$1"
+    assert breaker.recall_stale(["ps", "-axo", "pid="]) == "1"
+    assert breaker.recall_stale(capture) == ""
+    assert breaker.recall_stale(["tmux", "capture-pane", "-p", "-t", "%1"]) == ""
+
+
+def test_actions_fail_fast_while_tmux_breaker_is_open(monkeypatch):
+    guard = breaker.breaker_for(["tmux"], 5)
+    monkeypatch.setattr(guard, "_probe", lambda args, timeout: False)
+    for _ in range(3):
+        guard.record_timeout(["tmux", "list-panes"])
+
+    def fail_run(*_args, **_kwargs):
+        raise AssertionError("tmux must not be spawned while the breaker is open")
+
+    monkeypatch.setattr("tmux_dashboard.actions.subprocess.run", fail_run)
+    result = execute_action("select_pane", {"target_pane": "%1"})
+    assert result["ok"] is False
+    assert result["code"] == "TMUX_UNAVAILABLE"
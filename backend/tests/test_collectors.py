@@ -1,4 +1,18 @@
-from tmux_dashboard.collectors import _mask_sensitive_text, collect_pane_detail
+import gzip
+import os
+import time
+from types import SimpleNamespace
+
+from tmux_dashboard.collectors import (
+    OUTPUT_MARKER,
+    PANE_CAPTURE_MAX_AGE_SEC,
+    _mask_sensitive_text,
+    collect_pane_batch,
+    collect_network_state,
+    collect_pane_detail,
+    collect_tmux_state,
+    stream_pane_history,
+)
 
 
 def test_mask_sensitive_text_redacts_secret_like_values():
@@ -73,3 +87,261 @@ def test_collect_pane_detail_returns_none_when_tmux_has_no_target(monkeypatch):
     monkeypatch.setattr("tmux_dashboard.collectors._capture_pane_output", lambda *_args, **_kwargs: "ignored")
 
     assert collect_pane_detail("%404") is None
+
+
+def test_stream_pane_history_reads_saved_buffer_in_chunks(monkeypatch):
+    saved = {}
+
+    def fake_run(args, **_kwargs):
+        path = args[args.index("save-buffer") + 3]
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("".join(f"line {i}\n" for i in range(20000)))
+        saved["path"] = path
+        return SimpleNamespace(returncode=0, stdout="", stderr="")
+
+    monkeypatch.setattr("tmux_dashboard.collectors.subprocess.run", fake_run)
+    monkeypatch.setattr("tmux_dashboard.collectors.HISTORY_READ_CHUNK_BYTES", 4096)
+
+    stream = stream_pane_history("%1", compress=True)
+    # The scrollback copy is gone before the first chunk, so a dropped response leaves nothing behind.
+    assert not os.path.exists(saved["path"])
+    chunks = list(stream)
+    assert len(chunks) > 1
+    text = gzip.decompress(b"".join(chunks)).decode("utf-8")
+    assert text.startswith("line 0\n")
+    assert text.endswith("line 19999\n")
+    assert not os.path.exists(saved["path"])
+
+
+def test_stream_pane_history_returns_none_when_capture_fails(monkeypatch):
+    monkeypatch.setattr(
+        "tmux_dashboard.collectors.subprocess.run",
+        lambda args, **_kwargs: SimpleNamespace(returncode=1, stdout="", stderr="can't find pane"),
+    )
+
+    assert stream_pane_history("%404") is None
+
+
+def test_stream_pane_history_rejects_targets_that_are_not_pane_ids(monkeypatch):
+    calls = []
+    monkeypatch.setattr("tmux_dashboard.collectors.subprocess.run", lambda args, **_kwargs: calls.append(args))
+
+    assert stream_pane_history("work:0") is None
+    assert stream_pane_history("%1;kill-server") is None
+    assert calls == []
+
+
+def test_collect_pane_detail_skips_capture_when_fingerprint_unchanged(monkeypatch):
+    row = "s0\t1\t@1\t0\tw0\t1\t%1\t0\t1\t123\tzsh\t/tmp\ttitle\t10:0:5:1700000000"
+    captured = []
+
+    def fake_run_command(args):
+        if args[:2] == ["tmux", "display-message"]:
+            return row
+        return ""
+
+    monkeypatch.setattr("tmux_dashboard.collectors._run_command", fake_run_command)
+    monkeypatch.setattr(
+        "tmux_dashboard.collectors._capture_pane_output",
+        lambda *args, **_kwargs: captured.append(args) or "fresh\n",
+    )
+
+    monkeypatch.setattr("tmux_dashboard.collectors.time.time", lambda: 1700000005.0)
+
+    unchanged = collect_pane_detail("%1", since="10:0:5:1700000000@1700000000")
+    assert unchanged["unchanged"] is True
+    assert "output" not in unchanged
+    assert unchanged["capture_token"] == "10:0:5:1700000000@1700000000"
+    assert captured == []
+
+    changed = collect_pane_detail("%1", since="9:0:4:1699999999@1700000000")
+    assert changed["unchanged"] is False
+    assert changed["output"] == "fresh\n"
+    assert changed["pane"]["fingerprint"] == "10:0:5:1700000000"
+    assert changed["capture_token"] == "10:0:5:1700000000@1700000005"
+
+
+def test_collect_pane_detail_recaptures_once_the_skipped_capture_is_stale(monkeypatch):
+    row = "s0\t1\t@1\t0\tw0\t1\t%1\t0\t1\t123\tzsh\t/tmp\ttitle\t10:0:5:1700000000"
+    monkeypatch.setattr("tmux_dashboard.collectors._run_command", lambda _args: row)
+    monkeypatch.setattr("tmux_dashboard.collectors._capture_pane_output", lambda *_args, **_kwargs: "redrawn\n")
+    monkeypatch.setattr(
+        "tmux_dashboard.collectors.time.time", lambda: 1700000000.0 + PANE_CAPTURE_MAX_AGE_SEC
+    )
+
+    # Same fingerprint, but an in-place redraw inside one second would not have moved it.
+    stale = collect_pane_detail("%1", since="10:0:5:1700000000@1700000000")
+    assert stale["unchanged"] is False
+    assert stale["output"] == "redrawn\n"
+
+    # A bare fingerprint carries no capture time and is never trusted.
+    assert collect_pane_detail("%1", since="10:0:5:1700000000")["unchanged"] is False
+
+
+def test_collect_tmux_state_attributes_descendant_usage_to_panes(monkeypatch):
+    outputs = {
+        "list-sessions": "$1\ts0\t1\t1",
+        "list-windows": "s0\t@1\t0\tw0\t1\t2",
+        "list-panes": "s0\t@1\t%1\t0\t1\t100\tzsh\t/tmp\tt1\t0:0:0:0\ns0\t@1\t%2\t1\t0\t200\tzsh\t/tmp\tt2\t0:0:0:0",
+        "ps": "\n".join(
+            [
+                "  1     0 root  10:00  0.0  100 launchd",
+                "100     1 me    05:00  0.1 1000 -zsh",
+                "101   100 me    04:00 350.0 90000 cc1 -O2 main.c",
+                "102   101 me    04:00 400.0 80000 ld password=hunter2",
+                "200     1 me    05:00  0.0 1200 -zsh",
+            ]
+        ),
+    }
+    monkeypatch.setattr("tmux_dashboard.collectors.shutil.which", lambda _name: "/usr/bin/tmux")
+    monkeypatch.setattr(
+        "tmux_dashboard.collectors._run_command",
+        lambda args: outputs.get(args[1] if args[0] == "tmux" else "ps", ""),
+    )
+
+    state = collect_tmux_state()
+    panes = state["sessions"][0]["windows"][0]["panes"]
+    busy = next(pane for pane in panes if pane["id"] == "%1")
+    assert busy["process"]["command"] == "-zsh"
+    assert busy["resources"]["cpu_percent"] == 750.1
+    assert busy["resources"]["rss_kb"] == 171000
+    assert busy["resources"]["descendants"] == 2
+    assert busy["resources"]["top_command"] == "ld password=[REDACTED]"
+    assert [item["pane_id"] for item in state["top_panes"]] == ["%1", "%2"]
+
+
+def test_snapshot_network_collection_reuses_the_tmux_process_table_and_panes(monkeypatch):
+    calls = []
+    outputs = {
+        "list-sessions": "$1\ts0\t1\t1",
+        "list-windows": "s0\t@1\t3\tw0\t1\t1",
+        "list-panes": "s0\t@1\t%7\t2\t1\t100\tzsh\t/tmp\tt1\t0:0:0:0",
+        "lsof": "COMMAND PID USER FD TYPE DEVICE SIZE NODE NAME\nnode 101 me 3u IPv4 0x1 0t0 TCP *:3000 (LISTEN)",
+        "ps": "100 1 me 05:00 0.1 1000 -zsh\n101 100 me 04:00 2.0 9000 node server.js\n102 100 me 01:00 0.0 800 ssh -N -L 8080:localhost:80 db",
+    }
+
+    def fake_run_command(args):
+        calls.append(args)
+        return outputs.get(args[1] if args[0] == "tmux" else args[0], "")
+
+    monkeypatch.setattr("tmux_dashboard.collectors.shutil.which", lambda _name: "/usr/bin/tmux")
+    monkeypatch.setattr("tmux_dashboard.collectors._run_command", fake_run_command)
+
+    collect_tmux_state()
+    network = collect_network_state()
+
+    assert [args[0] for args in calls].count("ps") == 1
+    assert sum(1 for args in calls if args[:2] == ["tmux", "list-panes"]) == 1
+    owner = {"pane_id": "%7", "session": "s0", "window_id": "@1", "window_index": 3, "pane_index": 2}
+    assert network["listening_servers"][0]["pane"] == owner
+    assert network["ssh_tunnels"][0]["pane"] == owner
+
+    # A network collection on its own still reads ps and the pane list itself.
+    monkeypatch.setattr("tmux_dashboard.collectors.SHARED_READS_MAX_AGE_SEC", -1.0)
+    calls.clear()
+    outputs["ps"] = "100 1 me -zsh\n101 100 me node server.js"
+    outputs["list-panes"] = "100\t%7\ts0\t@1\t3\t2"
+    assert collect_network_state()["listening_servers"][0]["pane"] == owner
+    assert [args[0] for args in calls] == ["lsof", "ps", "tmux"]
+
+
+def test_collect_pane_batch_captures_changed_panes_in_one_chained_call(monkeypatch):
+    rows = "\n".join(
+        f"s0\t1\t@1\t0\tw0\t1\t%{index}\t{index}\t0\t12{index}\tzsh\t/tmp\ttitle\t{index}0:0:5:1700000000"
+        for index in range(1, 4)
+    )
+    calls = []
+
+    def fake_run_command(args):
+        calls.append(args)
+        if args[:3] == ["tmux", "list-panes", "-a"]:
+            return rows
+        if args[0] == "ps":
+            return "121 1 me 00:01 0.0 100 zsh"
+        chained = [args[index + 3] for index, arg in enumerate(args) if arg == "capture-pane"]
+        assert chained == ["%1", "%3"]
+        return f"{OUTPUT_MARKER}:0\none\n  two  \n\n{OUTPUT_MARKER}:1\nthree\n{OUTPUT_MARKER}:end"
+
+    monkeypatch.setattr("tmux_dashboard.collectors._run_command", fake_run_command)
+
+    result = collect_pane_batch(
+        [
+            {"id": "%1", "lines": 200, "since": ""},
+            {"id": "%2", "lines": 200, "since": f"20:0:5:1700000000@{int(time.time())}"},
+            {"id": "%3", "lines": 0, "since": "stale"},
+            {"id": "%9", "lines": 200, "since": ""},
+        ]
+    )
+
+    assert len(calls) == 3
+    assert calls[2][calls[2].index("%3") + 2] == "0"
+    assert [pane["pane"]["id"] for pane in result["panes"]] == ["%1", "%2", "%3"]
+    assert result["panes"][0]["output"] == "one\n  two  \n\n"
+    assert result["panes"][0]["pane"]["process"]["command"] == "zsh"
+    assert result["panes"][1]["unchanged"] is True
+    assert result["panes"][2]["output"] == "three\n"
+    assert result["missing"] == ["%9"]
+
+
+def test_collect_pane_batch_retries_without_panes_closed_mid_batch(monkeypatch):
+    rows = "\n".join(
+        f"s0\t1\t@1\t0\tw0\t1\t%{index}\t{index}\t0\t12{index}\tzsh\t/tmp\ttitle\t1:0:0:1" for index in (1, 2)
+    )
+    captures = []
+
+    def fake_run_command(args):
+        if args[:3] == ["tmux", "list-panes", "-a"]:
+            return "%2" if args[4] == "#{pane_id}" else rows
+        if args[0] == "ps":
+            return ""
+        targets = [args[index + 3] for index, arg in enumerate(args) if arg == "capture-pane"]
+        captures.append(targets)
+        if "%1" in targets:
+            return ""
+        return f"{OUTPUT_MARKER}:0\nstill here\n{OUTPUT_MARKER}:end"
+
+    monkeypatch.setattr("tmux_dashboard.collectors._run_command", fake_run_command)
+
+    result = collect_pane_batch([{"id": "%1", "lines": 10, "since": ""}, {"id": "%2", "lines": 10, "since": ""}])
+
+    assert captures == [["%1", "%2"], ["%2"]]
+    assert [pane["pane"]["id"] for pane in result["panes"]] == ["%2"]
+    assert result["panes"][0]["output"] == "still here\n"
+    assert result["missing"] == ["%1"]
+
+
+def test_collect_network_state_links_listeners_and_ssh_to_owning_pane(monkeypatch):
+    def fake_run_command(args):
+        if args[0] == "lsof":
+            return (
+                "COMMAND PID USER FD TYPE DEVICE SIZE/OFF NODE NAME\n"
+                "node 300 me 20u IPv6 0x1 0t0 TCP *:3000 (LISTEN)\n"
+                "nginx 50 root 6u IPv4 0x2 0t0 TCP 127.0.0.1:8080 (LISTEN)"
+            )
+        if args[0] == "ps":
+            # 300 -> 200 (npm) -> 100 (pane shell); 400 is an ssh tunnel started from another pane.
+            return "\n".join(
+                [
+                    "1 0 root init",
+                    "50 1 root nginx",
+                    "100 1 me zsh",
+                    "200 100 me npm run dev",
+                    "300 200 me node server.js",
+                    "110 1 me bash",
+                    "400 110 me ssh -N -L 5432:db:5432 bastion",
+                ]
+            )
+        assert args[:3] == ["tmux", "list-panes", "-a"]
+        return "100\t%1\tdev\t@1\t0\t0\n110\t%2\tops\t@2\t1\t1"
+
+    monkeypatch.setattr("tmux_dashboard.collectors.shutil.which", lambda _name: "/usr/bin/tmux")
+    monkeypatch.setattr("tmux_dashboard.collectors._run_command", fake_run_command)
+
+    state = collect_network_state()
+
+    node, nginx = state["listening_servers"]
+    assert node["port"] == 3000
+    assert node["pane"] == {"pane_id": "%1", "session": "dev", "window_id": "@1", "window_index": 0, "pane_index": 0}
+    assert nginx["pane"] is None
+    assert state["ssh_tunnels"][0]["pane"]["pane_id"] == "%2"
+    assert state["ssh_connections"][0]["pane"]["session"] == "ops"
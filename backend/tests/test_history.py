@@ -0,0 +1,57 @@
+from tmux_dashboard.history import MetricsHistory
+
+
+def _tmux(cpu):
+    return {
+        "sessions": [
+            {
+                "name": "s0",
+                "windows": [{"panes": [{"id": "%1", "process": {"cpu_percent": str(cpu), "rss_kb": "2048"}}]}],
+            }
+        ]
+    }
+
+
+def _network(ports, tunnels=()):
+    return {
+        "listening_servers": [{"command": "node", "pid": "10", "user": "u", "address": addr} for addr in ports],
+        "ssh_tunnels": [{"pid": pid, "user": "u", "command": "ssh -L 1:a:2 host", "kind": "tunnel"} for pid in tunnels],
+    }
+
+
+def test_ring_buffer_keeps_fixed_number_of_samples():
+    history = MetricsHistory(capacity=3, min_interval_sec=0)
+    for idx in range(5):
+        history.record(_tmux(idx), _network([]), now_ts=1000.0 + idx)
+
+    result = history.query(60, prefix="pane.%1.cpu", now_ts=1005.0)
+    assert result["resolution"] == "raw"
+    assert result["series"]["pane.%1.cpu_percent"] == [[1002.0, 2.0], [1003.0, 3.0], [1004.0, 4.0]]
+
+
+def test_records_port_and_tunnel_changes_as_events():
+    history = MetricsHistory(min_interval_sec=0)
+    history.record(_tmux(0), _network(["*:3000"]), now_ts=1000.0)
+    history.record(_tmux(0), _network(["*:4000"], tunnels=["77"]), now_ts=1010.0)
+
+    kinds = sorted(event["kind"] for event in history.query(60, now_ts=1020.0)["events"])
+    assert kinds == ["port_closed", "port_opened", "tunnel_up"]
+
+
+def test_samples_are_throttled_by_min_interval():
+    history = MetricsHistory(min_interval_sec=5)
+    assert history.record(_tmux(1), _network([]), now_ts=1000.0) is True
+    assert history.record(_tmux(2), _network([]), now_ts=1002.0) is False
+
+
+def test_old_windows_are_served_from_minute_rollups(tmp_path):
+    history = MetricsHistory(str(tmp_path), capacity=2, min_interval_sec=0)
+    for minute in range(4):
+        history.record(_tmux(minute * 10), _network([]), now_ts=60.0 * minute + 1)
+        history.record(_tmux(minute * 10 + 2), _network([]), now_ts=60.0 * minute + 31)
+
+    result = history.query(3600, prefix="pane.%1.cpu", now_ts=300.0)
+    assert result["resolution"] == "1m"
+    points = result["series"]["pane.%1.cpu_percent"]
+    assert points[0] == [0.0, 1.0, 2.0]
+    assert len(points) == 3
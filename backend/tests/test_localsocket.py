@@ -0,0 +1,178 @@
+import json
+import os
+import socket
+import stat
+
+from tmux_dashboard import create_app, metrics
+from tmux_dashboard.localsocket import LocalSubscriptionServer
+
+
+def _connect(path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(5)
+    sock.connect(path)
+    return sock, sock.makefile("r", encoding="utf-8")
+
+
+def _send(sock, message):
+    sock.sendall((json.dumps(message) + "\n").encode("utf-8"))
+
+
+def _server(path, **overrides):
+    collect = {
+        "collect_tmux_state_fn": lambda: {"running": True, "sessions": []},
+        "collect_network_state_fn": lambda: {"listening_servers": []},
+        "collect_pane_batch_fn": lambda targets: {"panes": [], "missing": []},
+        "interval_sec": 0.05,
+        "refresh_sec": 60.0,
+    }
+    collect.update(overrides)
+    server = LocalSubscriptionServer(path, **collect)
+    server.start()
+    assert server.wait_serving(5)
+    return server
+
+
+def test_snapshot_subscribers_share_one_collection(tmp_path):
+    path = str(tmp_path / "dashboard.sock")
+    calls = []
+
+    def collect_tmux_state():
+        calls.append(1)
+        return {"running": True, "sessions": []}
+
+    server = _server(path, collect_tmux_state_fn=collect_tmux_state)
+    try:
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+        first, first_lines = _connect(path)
+        second, second_lines = _connect(path)
+        _send(first, {"subscribe": "snapshot"})
+        _send(second, {"subscribe": "snapshot"})
+        received = [json.loads(first_lines.readline()), json.loads(second_lines.readline())]
+        assert [message["type"] for message in received] == ["snapshot", "snapshot"]
+        assert received[0]["tmux"] == {"running": True, "sessions": []}
+        assert len(calls) <= 2
+
+        # An HTTP snapshot with a new layout reaches subscribers without another collection.
+        collected = len(calls)
+        sessions = [{"name": "work", "windows": [{"id": "@1", "panes": [{"id": "%1", "current_command": "vim"}]}]}]
+        server.publish_snapshot({"running": True, "sessions": sessions}, {"listening_servers": []})
+        update = json.loads(first_lines.readline())
+        assert update["tmux"]["sessions"] == sessions
+        assert json.loads(second_lines.readline())["tmux"] == update["tmux"]
+        assert len(calls) - collected <= 1
+
+        _send(first, {"subscribe": "bogus"})
+        assert json.loads(first_lines.readline())["type"] == "error"
+        first.close()
+        second.close()
+    finally:
+        server.stop()
+    assert not os.path.exists(path)
+
+
+def test_pane_subscription_streams_changes_and_closure(tmp_path):
+    path = str(tmp_path / "dashboard.sock")
+    batches = []
+    outputs = iter(["$ make\n", None, "$ make\nok\n"])
+
+    def collect_pane_batch(targets):
+        batches.append(targets)
+        output = next(outputs, "gone")
+        if output == "gone":
+            return {"panes": [], "missing": ["%3"]}
+        pane = {"id": "%3", "fingerprint": f"f{len(batches)}"}
+        token = f"f{len(batches)}@1700000000"
+        if output is None:
+            return {"panes": [{"pane": pane, "unchanged": True, "capture_token": token}], "missing": []}
+        return {"panes": [{"pane": pane, "output": output, "unchanged": False, "capture_token": token}], "missing": []}
+
+    server = _server(path, collect_pane_batch_fn=collect_pane_batch)
+    try:
+        sock, lines = _connect(path)
+        _send(sock, {"subscribe": "pane", "pane_id": "%3"})
+        messages = [json.loads(lines.readline()) for _ in range(3)]
+        assert [message["type"] for message in messages] == ["pane", "pane", "pane_closed"]
+        assert [message.get("output") for message in messages[:2]] == ["$ make\n", "$ make\nok\n"]
+        # The capture token from each poll is sent back so unchanged panes are not re-captured.
+        assert batches[0][0]["since"] == "" and batches[1][0]["since"] == "f1@1700000000"
+        sock.close()
+    finally:
+        server.stop()
+
+
+def test_recaptured_pane_with_identical_output_is_not_streamed_again(tmp_path):
+    path = str(tmp_path / "dashboard.sock")
+    batches = []
+    # The second capture is the age-limit recapture of an idle pane: a new token, the same output.
+    outputs = ["$ top\n", "$ top\n", "$ top\nload 1\n"]
+
+    def collect_pane_batch(targets):
+        batches.append(targets)
+        index = min(len(batches), len(outputs)) - 1
+        pane = {"id": "%4", "fingerprint": "f"}
+        token = f"f@{1700000000 + 10 * index}"
+        if len(batches) > len(outputs) and targets[0]["since"]:
+            return {"panes": [{"pane": pane, "unchanged": True, "capture_token": token}], "missing": []}
+        return {"panes": [{"pane": pane, "output": outputs[index], "unchanged": False, "capture_token": token}], "missing": []}
+
+    server = _server(path, collect_pane_batch_fn=collect_pane_batch)
+    try:
+        first, first_lines = _connect(path)
+        _send(first, {"subscribe": "pane", "pane_id": "%4"})
+        messages = [json.loads(first_lines.readline()) for _ in range(2)]
+        assert [message["output"] for message in messages] == ["$ top\n", "$ top\nload 1\n"]
+        assert batches[1][0]["since"] == "f@1700000000"
+
+        # A late subscriber still gets the current output even though it has not changed.
+        second, second_lines = _connect(path)
+        _send(second, {"subscribe": "pane", "pane_id": "%4"})
+        assert json.loads(second_lines.readline())["output"] == "$ top\nload 1\n"
+        first.close()
+        second.close()
+    finally:
+        server.stop()
+
+
+def test_failed_collection_is_counted_and_the_socket_stays_up(tmp_path):
+    path = str(tmp_path / "dashboard.sock")
+    attempts = []
+
+    def broken_tmux_state():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("tmux exploded")
+        return {"running": True, "sessions": []}
+
+    before = metrics.LOCAL_SOCKET_POLL_FAILURES.value()
+    server = _server(path, collect_tmux_state_fn=broken_tmux_state)
+    try:
+        sock, lines = _connect(path)
+        _send(sock, {"subscribe": "snapshot"})
+        assert json.loads(lines.readline())["type"] == "snapshot"
+        assert metrics.LOCAL_SOCKET_POLL_FAILURES.value() == before + 1
+        sock.close()
+    finally:
+        server.stop()
+
+
+def test_apps_in_one_process_share_a_server_fed_by_the_latest_app(monkeypatch, tmp_path):
+    path = str(tmp_path / "dashboard.sock")
+    monkeypatch.setenv("DASHBOARD_SOCKET_PATH", path)
+    monkeypatch.setattr("tmux_dashboard.localsocket._servers", {})
+    monkeypatch.setattr("tmux_dashboard.app.collect_network_state", lambda: {"listening_servers": []})
+    monkeypatch.setattr("tmux_dashboard.app.collect_tmux_state", lambda: {"running": True, "sessions": [], "app": "first"})
+    first = create_app()
+    monkeypatch.setattr("tmux_dashboard.app.collect_tmux_state", lambda: {"running": True, "sessions": [], "app": "second"})
+    second = create_app()
+    server = second.extensions["tmux_dashboard"]["local_socket"]
+    assert first.extensions["tmux_dashboard"]["local_socket"] is server
+    try:
+        assert server.wait_serving(5)
+        sock, lines = _connect(path)
+        _send(sock, {"subscribe": "snapshot"})
+        assert json.loads(lines.readline())["tmux"]["app"] == "second"
+        sock.close()
+    finally:
+        server.stop()
+    assert not os.path.exists(path)
@@ -0,0 +1,42 @@
+import time
+
+from tmux_dashboard.metrics import SUBPROCESS_TIMEOUTS, Counter, Histogram, MetricsRegistry, command_label, observe_subprocess
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    hist = registry.histogram("demo_seconds", "Demo.", ("route",), buckets=(0.1, 1.0))
+    hist.observe(0.05, "/a")
+    hist.observe(0.1, "/a")
+    hist.observe(3.0, "/a")
+
+    lines = registry.render().splitlines()
+    assert 'demo_seconds_bucket{route="/a",le="0.1"} 2' in lines
+    assert 'demo_seconds_bucket{route="/a",le="1"} 2' in lines
+    assert 'demo_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'demo_seconds_count{route="/a"} 3' in lines
+    assert hist.count("/a") == 3
+
+
+def test_counter_escapes_label_values():
+    counter = Counter("demo_total", "Demo.", ("command",))
+    counter.inc('say "hi"\n', amount=2)
+    assert counter.render()[-1] == 'demo_total{command="say \\"hi\\"\\n"} 2'
+
+
+def test_command_label_keeps_cardinality_bounded():
+    assert command_label(["tmux", "capture-pane", "-p", "-t", "%1"]) == "tmux capture-pane"
+    assert command_label(["ps", "-axo", "pid="]) == "ps"
+    assert command_label([]) == ""
+
+
+def test_observe_subprocess_counts_timeouts():
+    before = SUBPROCESS_TIMEOUTS.value("tmux send-keys")
+    observe_subprocess(["tmux", "send-keys", "-t", "%1"], time.perf_counter(), "timeout")
+    assert SUBPROCESS_TIMEOUTS.value("tmux send-keys") == before + 1
+
+
+def test_histogram_without_labels():
+    hist = Histogram("plain_seconds", "Plain.", buckets=(1.0,))
+    hist.observe(0.5)
+    assert hist.render()[2] == 'plain_seconds_bucket{le="1"} 1'
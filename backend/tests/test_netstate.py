@@ -0,0 +1,102 @@
+import os
+
+from tmux_dashboard.netstate import NetworkTracker, ProcNetworkCollector
+from tmux_dashboard.sshargs import parse_forwards
+
+TCP_HEADER = "  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode\n"
+
+
+def _socket_row(address, state, inode):
+    return f"   0: {address} 00000000:0000 {state} 00000000:00000000 00:00000000 00000000  1000        0 {inode} 1 0 100 0 0 10 0\n"
+
+
+def _write_proc(root, sockets, processes):
+    (root / "net").mkdir(exist_ok=True)
+    (root / "net" / "tcp").write_text(TCP_HEADER + "".join(sockets))
+    for pid, (ppid, argv, inodes) in processes.items():
+        proc = root / pid
+        (proc / "fd").mkdir(parents=True, exist_ok=True)
+        (proc / "stat").write_text(f"{pid} ({os.path.basename(argv[0])}) S {ppid} 1 1 0 -1\n")
+        (proc / "cmdline").write_bytes(b"\0".join(arg.encode() for arg in argv) + b"\0")
+        for fd, inode in enumerate(inodes, start=3):
+            link = proc / "fd" / str(fd)
+            if not os.path.lexists(link):
+                os.symlink(f"socket:[{inode}]", link)
+
+
+def test_proc_collector_reads_only_new_processes_and_unknown_sockets(tmp_path, monkeypatch):
+    monkeypatch.setattr("tmux_dashboard.netstate.shutil.which", lambda _name: None)
+    _write_proc(
+        tmp_path,
+        # 0100007F:0BB8 is 127.0.0.1:3000; the ESTABLISHED (01) row is ignored.
+        [_socket_row("0100007F:0BB8", "0A", "111"), _socket_row("0100007F:0BB9", "01", "222")],
+        {
+            "10": ("1", ["node", "server.js"], ["111"]),
+            "20": ("1", ["ssh", "-N", "-L", "5432:db:5432", "bastion"], []),
+        },
+    )
+    collector = ProcNetworkCollector(str(tmp_path))
+
+    state = collector.collect()
+    assert [(item["pid"], item["address"], item["port"]) for item in state["listening_servers"]] == [
+        ("10", "127.0.0.1:3000", 3000)
+    ]
+    assert [item["pid"] for item in state["ssh_connections"]] == ["20"]
+    assert state["ssh_tunnels"][0]["forwards"] == [
+        {"kind": "local", "bind_address": "", "port": 5432, "target": "db:5432"}
+    ]
+
+    reads = []
+    original = collector._read_process
+    monkeypatch.setattr(collector, "_read_process", lambda pid: reads.append(pid) or original(pid))
+    scans = []
+    original_scan = collector._scan_holders
+    monkeypatch.setattr(collector, "_scan_holders", lambda inodes, pids: scans.append(list(pids)) or original_scan(inodes, pids))
+
+    collector.collect()
+    assert reads == [] and scans == []
+
+    # A forked worker inherits the listener: only the new pid is read and scanned.
+    _write_proc(tmp_path, [_socket_row("0100007F:0BB8", "0A", "111")], {"11": ("10", ["node", "worker.js"], ["111"])})
+    state = collector.collect()
+    assert reads == ["11"]
+    assert scans == [["11"]]
+    assert [item["pid"] for item in state["listening_servers"]] == ["10", "11"]
+
+
+def test_tracker_reports_added_and_removed_entries():
+    states = [
+        {"listening_servers": [{"pid": "1", "address": "*:80", "command": "nginx"}], "ssh_connections": []},
+        {
+            "listening_servers": [{"pid": "2", "address": "*:3000", "command": "node"}],
+            "ssh_connections": [{"pid": "9", "command": "ssh host"}],
+        },
+    ]
+    tracker = NetworkTracker("lsof")
+    collect = tracker.wrap(lambda: states.pop(0))
+
+    collect()
+    assert tracker.events_since(0) == {"events": [], "event_seq": 0}
+    collect()
+    feed = tracker.events_since(0)
+    assert [(event["kind"], event["pid"], event["seq"]) for event in feed["events"]] == [
+        ("listener_added", "2", 1),
+        ("listener_removed", "1", 2),
+        ("ssh_added", "9", 3),
+    ]
+    assert feed["event_seq"] == 3
+    # A client that polled after another one still reads the events from its own position.
+    assert [event["seq"] for event in tracker.events_since(2)["events"]] == [3]
+    assert tracker.events_since(3)["events"] == []
+    # A seq this worker never issued restarts the client from the oldest retained event.
+    assert len(tracker.events_since(99)["events"]) == 3
+
+
+def test_parse_forwards_handles_attached_and_bracketed_specs():
+    argv = ["/usr/bin/ssh", "-NfL8080:[::1]:80", "-R", "9000", "-D", "127.0.0.1:1080", "host", "cat", "-L", "1:a:2"]
+    assert parse_forwards(argv) == [
+        {"kind": "local", "bind_address": "", "port": 8080, "target": "[::1]:80"},
+        {"kind": "remote", "bind_address": "", "port": 9000, "target": ""},
+        {"kind": "dynamic", "bind_address": "127.0.0.1", "port": 1080, "target": ""},
+    ]
+    assert parse_forwards(["sshd:", "user@pts/0"]) == []
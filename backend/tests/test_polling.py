@@ -0,0 +1,79 @@
+from tmux_dashboard.polling import PollAdvisor, snapshot_signature
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_idle_key_backs_off_and_active_key_tightens():
+    clock = _Clock()
+    advisor = PollAdvisor(1000, 15000, now=clock)
+
+    first = advisor.advise("snapshot", "a", "token", 0.01)
+    assert 2000 <= first <= 4000
+    idle = first
+    for _ in range(20):
+        clock.now += idle / 1000
+        idle = advisor.advise("snapshot", "a", "token", 0.01)
+    assert idle == 15000
+
+    busy = advisor.advise("pane:%1", "fp-start", "token", 0.01)
+    for index in range(20):
+        clock.now += busy / 1000
+        busy = advisor.advise("pane:%1", f"fp-{index}", "token", 0.01)
+    assert busy == 1000
+
+
+def test_more_viewers_do_not_make_a_busy_key_look_idle():
+    def advised_interval(viewers):
+        clock = _Clock()
+        advisor = PollAdvisor(1000, 15000, now=clock)
+        next_poll = {f"client-{viewer}": viewer * 0.1 for viewer in range(viewers)}
+        intervals = []
+        # The pane changes every 3 seconds; each viewer polls on the interval it was last given.
+        while clock.now < 120:
+            client = min(next_poll, key=next_poll.get)
+            clock.now = next_poll[client]
+            interval = advisor.advise("pane:%1", f"fp-{int(clock.now // 3)}", client, 0.001)
+            next_poll[client] = clock.now + interval / 1000
+            intervals.append(interval)
+        return intervals[-1]
+
+    single = advised_interval(1)
+    assert single <= 1500
+    assert advised_interval(8) <= single
+
+
+def test_collector_cost_and_client_count_stretch_interval():
+    clock = _Clock()
+    advisor = PollAdvisor(1000, 15000, now=clock)
+    for index in range(20):
+        advisor.advise("pane:%1", f"fp-{index}", "token", 0.01)
+    assert advisor.advise("pane:%1", "fp-x", "token", 0.01) == 1000
+
+    for client in range(10):
+        interval = advisor.advise("pane:%1", f"fp-{client}", f"client-{client}", 0.2)
+    assert advisor.client_count() == 11
+    # 11 clients * ~0.2s collections must stay under a quarter of wall time.
+    assert interval >= 5000
+
+    clock.now = 60.0
+    advisor.advise("pane:%1", "fp-late", "token", 0.01)
+    assert advisor.client_count() == 1
+
+
+def test_snapshot_signature_ignores_resource_usage():
+    pane = {"id": "%1", "current_command": "zsh", "fingerprint": "10:0:0:1", "resources": {"cpu_percent": 1.0}}
+    state = {"running": True, "sessions": [{"name": "s", "windows": [{"id": "@1", "name": "w", "panes": [pane]}]}]}
+    network = {"listening_servers": [], "ssh_connections": [], "ssh_tunnels": []}
+    before = snapshot_signature(state, network)
+
+    pane["resources"] = {"cpu_percent": 50.0}
+    assert snapshot_signature(state, network) == before
+
+    pane["fingerprint"] = "11:0:1:2"
+    assert snapshot_signature(state, network) != before
@@ -0,0 +1,57 @@
+import time
+
+from tmux_dashboard.profiling import Profiler, folded, span
+
+
+def test_spans_outside_a_trace_are_free_no_ops():
+    with span("tmux list-panes"):
+        pass
+    profiler = Profiler(sample_every=0, keep=5)
+
+    assert profiler.start("GET /api/snapshot") is None
+    assert profiler.slowest() == []
+
+
+def test_nested_spans_fold_into_self_time_stacks():
+    profiler = Profiler(sample_every=1, keep=5)
+    trace = profiler.start("GET /api/snapshot")
+    with span("tmux_state"):
+        with span("tmux list-panes"):
+            time.sleep(0.01)
+        for _ in range(3):
+            with span("mask"):
+                pass
+    profiler.finish(trace, 200)
+
+    spans = {item["stack"]: item for item in trace.to_dict()["spans"]}
+    assert set(spans) == {"tmux_state", "tmux_state;tmux list-panes", "tmux_state;mask"}
+    assert spans["tmux_state;mask"]["calls"] == 3
+    assert spans["tmux_state"]["ms"] >= spans["tmux_state;tmux list-panes"]["ms"] >= 10
+
+    lines = dict(line.rsplit(" ", 1) for line in folded([trace]).splitlines())
+    assert set(lines) == {
+        "GET /api/snapshot",
+        "GET /api/snapshot;tmux_state",
+        "GET /api/snapshot;tmux_state;mask",
+        "GET /api/snapshot;tmux_state;tmux list-panes",
+    }
+    assert int(lines["GET /api/snapshot;tmux_state;tmux list-panes"]) >= 10_000
+    # Closing the trace detaches it, so later spans on this thread record nothing.
+    with span("after"):
+        pass
+    assert "after" not in {item["stack"] for item in trace.to_dict()["spans"]}
+
+
+def test_profiler_keeps_only_the_slowest_sampled_requests():
+    profiler = Profiler(sample_every=2, keep=2)
+    kept = []
+    for delay in (0.0, 0.004, 0.0, 0.001, 0.0, 0.008, 0.0, 0.002):
+        trace = profiler.start(f"GET /{delay}")
+        if trace is None:
+            continue
+        time.sleep(delay)
+        profiler.finish(trace, 200)
+        kept.append(trace.root)
+
+    assert kept == ["GET /0.004", "GET /0.001", "GET /0.008", "GET /0.002"]
+    assert [trace.root for trace in profiler.slowest()] == ["GET /0.008", "GET /0.004"]
@@ -0,0 +1,82 @@
+from tmux_dashboard.collectors import collect_tmux_state
+from tmux_dashboard.query import TmuxQuery, escape_format_value, list_panes_args, parse_query, parse_version
+
+OUTPUTS = {
+    "list-sessions": "$1\tbuild\t2\t1\n$2\tscratch\t1\t0",
+    "list-windows": "build\t@1\t0\tmake\t1\t2\nbuild\t@2\t1\tlogs\t0\t1\nscratch\t@3\t0\tsh\t1\t1",
+    "list-panes": "\n".join(
+        [
+            "build\t@1\t%1\t0\t1\t100\tmake\t/src\tt\t0:0:0:0",
+            "build\t@1\t%2\t1\t0\t101\tzsh\t/src\tt\t0:0:0:0",
+            "build\t@2\t%3\t0\t1\t102\ttail\t/src\tt\t0:0:0:0",
+            "scratch\t@3\t%4\t0\t1\t103\tmake\t/tmp\tt\t0:0:0:0",
+        ]
+    ),
+}
+
+
+def _fake_tmux(monkeypatch, version):
+    calls = []
+
+    def fake_run_command(args):
+        calls.append(args)
+        return OUTPUTS.get(args[1], "") if args[0] == "tmux" else ""
+
+    monkeypatch.setattr("tmux_dashboard.collectors.shutil.which", lambda _name: "/usr/bin/tmux")
+    monkeypatch.setattr("tmux_dashboard.collectors._run_command", fake_run_command)
+    monkeypatch.setattr("tmux_dashboard.query._version", version)
+    return calls
+
+
+def _pane_ids(state):
+    return [pane["id"] for session in state["sessions"] for window in session["windows"] for pane in window["panes"]]
+
+
+def test_parse_query_and_version():
+    assert parse_query({"session": " build ", "active": "1", "attached": "no"}) == TmuxQuery(
+        session="build", active_only=True
+    )
+    assert parse_query({}).is_empty
+    assert parse_version("tmux 3.3a") == (3, 3)
+    assert parse_version("tmux next-3.5") == (3, 5)
+    assert parse_version("tmux master") == (99, 0)
+
+
+def test_filters_are_escaped_and_combined():
+    assert escape_format_value("a,b}c#d") == "a#,b#}c##d"
+    args = list_panes_args(TmuxQuery(session="s", command="x,y", active_only=True), "#{pane_id}", filters=True)
+    assert args[:6] == ["tmux", "list-panes", "-s", "-t", "=s", "-F"]
+    assert args[-2:] == ["-f", "#{&&:#{window_active},#{&&:#{pane_active},#{==:#{pane_current_command},x#,y}}}"]
+    assert "-f" not in list_panes_args(TmuxQuery(command="x"), "#{pane_id}", filters=False)
+
+
+def test_query_is_pushed_down_to_tmux(monkeypatch):
+    calls = _fake_tmux(monkeypatch, (3, 3))
+
+    state = collect_tmux_state(TmuxQuery(session="build", command="make"))
+
+    panes_call = next(args for args in calls if args[1] == "list-panes")
+    assert panes_call[2:5] == ["-s", "-t", "=build"]
+    assert panes_call[-2:] == ["-f", "#{==:#{pane_current_command},make}"]
+    assert _pane_ids(state) == ["%1"]
+    assert [window["id"] for window in state["sessions"][0]["windows"]] == ["@1"]
+
+
+def test_old_tmux_filters_in_python(monkeypatch):
+    calls = _fake_tmux(monkeypatch, (3, 0))
+
+    state = collect_tmux_state(TmuxQuery(active_only=True, attached_only=True))
+
+    assert all("-f" not in args for args in calls)
+    assert [session["name"] for session in state["sessions"]] == ["build"]
+    assert _pane_ids(state) == ["%1"]
+
+
+def test_unknown_session_skips_window_and_pane_listing(monkeypatch):
+    calls = _fake_tmux(monkeypatch, None)
+
+    state = collect_tmux_state(TmuxQuery(session="missing"))
+
+    assert state["running"] is True
+    assert state["sessions"] == []
+    assert [args[1] for args in calls] == ["list-sessions", "-V"]
@@ -0,0 +1,65 @@
+from tmux_dashboard.screen import ScreenTracker, apply_sgr, parse_screen_lines
+
+
+def test_parse_screen_lines_tracks_sgr_state_across_lines():
+    rows = parse_screen_lines(
+        [
+            "\x1b[1m\x1b[31mred\x1b[0m\x1b[39m\x1b[49m plain \x1b[38;5;200mx\x1b[48;2;1;2;3my",
+            "still\x1b[7m\x1b[39m\x1b[49mrev\x1b[27m ok",
+            "",
+        ]
+    )
+
+    assert rows[0] == [
+        {"text": "red", "bold": True, "fg": 1},
+        {"text": " plain "},
+        {"text": "x", "fg": 200},
+        {"text": "y", "fg": 200, "bg": "#010203"},
+    ]
+    assert rows[1] == [{"text": "still", "fg": 200, "bg": "#010203"}, {"text": "rev", "reverse": True}, {"text": " ok"}]
+    assert rows[2] == []
+
+
+def test_apply_sgr_handles_bright_colors_and_resets():
+    style = apply_sgr({}, "1;2;92;104")
+    assert style == {"bold": True, "dim": True, "fg": 10, "bg": 12}
+    assert apply_sgr(style, "22;39") == {"bg": 12}
+    assert apply_sgr(style, "") == {}
+
+
+def test_screen_tracker_sends_only_changed_rows(monkeypatch):
+    screens = []
+
+    def fake_collect(pane_id):
+        if pane_id != "%1":
+            return None
+        return screens[-1]
+
+    def screen(lines, width=10, cursor_y=0):
+        screens.append(
+            {"width": width, "height": 3, "cursor": {"x": 0, "y": cursor_y, "visible": True}, "lines": lines}
+        )
+
+    monkeypatch.setattr("tmux_dashboard.collectors.collect_pane_screen", fake_collect)
+    tracker = ScreenTracker()
+
+    screen(["a", "b"])
+    first = tracker.frame("%1")
+    assert first["full"] is True
+    assert [row["y"] for row in first["rows"]] == [0, 1, 2]
+
+    same = tracker.frame("%1", since=first["frame"])
+    assert same["frame"] == first["frame"]
+    assert same["rows"] == []
+
+    screen(["a", "\x1b[32mb"], cursor_y=1)
+    changed = tracker.frame("%1", since=first["frame"])
+    assert changed["full"] is False
+    assert changed["frame"] != first["frame"]
+    assert changed["rows"] == [{"y": 1, "spans": [{"text": "b", "fg": 2}]}]
+    assert changed["cursor"]["y"] == 1
+
+    assert tracker.frame("%1", since="other-worker:1")["full"] is True
+    screen(["a", "\x1b[32mb"], width=20, cursor_y=1)
+    assert tracker.frame("%1", since=changed["frame"])["full"] is True
+    assert tracker.frame("%9") is None
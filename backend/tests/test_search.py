@@ -0,0 +1,71 @@
+from tmux_dashboard.search import PaneSearchIndex
+
+
+def _fake_tmux(monkeypatch, panes, captures):
+    calls = []
+
+    def fake_fingerprints():
+        return {pane_id: dict(meta) for pane_id, meta in panes.items()}
+
+    def fake_capture(pane_id, lines=200):
+        calls.append((pane_id, lines))
+        return captures[pane_id](lines)
+
+    monkeypatch.setattr("tmux_dashboard.collectors.collect_pane_fingerprints", fake_fingerprints)
+    monkeypatch.setattr("tmux_dashboard.collectors._capture_pane_output", fake_capture)
+    return calls
+
+
+def _meta(fingerprint, history_size, height=2):
+    return {
+        "session": "s0",
+        "window_id": "@1",
+        "window_index": 0,
+        "pane_index": 0,
+        "height": height,
+        "history_size": history_size,
+        "history_limit": 2000,
+        "fingerprint": fingerprint,
+    }
+
+
+def test_search_returns_line_and_context_and_reuses_unchanged_panes(monkeypatch):
+    panes = {"%1": _meta("a", 3), "%2": _meta("b", 0)}
+    captures = {
+        "%1": lambda _lines: "make all\nerror: boom\nretrying\n$ \n\n",
+        "%2": lambda _lines: "idle\n\n",
+    }
+    calls = _fake_tmux(monkeypatch, panes, captures)
+    index = PaneSearchIndex(max_workers=2)
+
+    result = index.search("ERROR", context=1)
+    assert result["panes_captured"] == 2
+    assert len(result["results"]) == 1
+    hit = result["results"][0]
+    assert hit["pane_id"] == "%1"
+    assert hit["line"] == -2
+    assert hit["before"] == ["make all"]
+    assert hit["after"] == ["retrying"]
+
+    calls.clear()
+    again = index.search("error")
+    assert again["panes_captured"] == 0
+    assert calls == []
+    assert len(again["results"]) == 1
+
+
+def test_search_captures_only_new_history_when_pane_grows(monkeypatch):
+    panes = {"%1": _meta("a", 2)}
+    captures = {"%1": lambda _lines: "one\ntwo\nscreen-a\nscreen-b\n"}
+    calls = _fake_tmux(monkeypatch, panes, captures)
+    index = PaneSearchIndex(max_workers=1)
+    index.search("one")
+
+    panes["%1"] = _meta("b", 3)
+    captures["%1"] = lambda _lines: "three\nscreen-c\nscreen-d\n"
+    calls.clear()
+    result = index.search("three")
+
+    assert calls == [("%1", 1)]
+    assert [hit["line"] for hit in result["results"]] == [-1]
+    assert index.search("one")["results"][0]["line"] == -3
@@ -0,0 +1,66 @@
+import os
+
+from tmux_dashboard.config import load_config
+from tmux_dashboard.recorder import PaneRecorder
+from tmux_dashboard.segment_log import SegmentWriter, read_range
+
+
+def test_read_range_spans_blocks_and_supports_tail_offsets(tmp_path):
+    writer = SegmentWriter(str(tmp_path))
+    writer.append_block(b"hello ")
+    writer.append_block(b"world\n")
+    writer.close()
+
+    chunk = read_range(str(tmp_path), 3, 6)
+    assert chunk["data"] == b"lo wor"
+    assert chunk["next_offset"] == 9
+    assert chunk["total"] == 12
+
+    tail = read_range(str(tmp_path), -6, 100)
+    assert tail["offset"] == 6
+    assert tail["data"] == b"world\n"
+
+
+def test_writer_rotates_segments_and_drops_oldest(tmp_path):
+    writer = SegmentWriter(str(tmp_path), segment_bytes=4096, max_segments=2)
+    for idx in range(6):
+        writer.append_block(os.urandom(5000) + f"block-{idx}".encode())
+    writer.close()
+
+    segments = sorted(name for name in os.listdir(tmp_path) if name.startswith("segment-"))
+    assert len(segments) == 2
+
+    chunk = read_range(str(tmp_path), 0, 10)
+    assert chunk["first_available"] > 0
+    assert chunk["offset"] == chunk["first_available"]
+    tail = read_range(str(tmp_path), -7, 7)
+    assert tail["data"] == b"block-5"
+
+    # Reopening resumes the stream offset instead of restarting at zero.
+    resumed = SegmentWriter(str(tmp_path), segment_bytes=4096, max_segments=2)
+    assert resumed.offset == tail["total"]
+    resumed.close()
+
+
+def test_read_range_on_missing_recording_is_empty(tmp_path):
+    assert read_range(str(tmp_path), 0, 100)["total"] == 0
+
+
+def test_recorder_start_twice_keeps_the_pipe_open(monkeypatch, tmp_path):
+    monkeypatch.setenv("DASHBOARD_RECORDER_DIR", str(tmp_path))
+    piping = {"%1": False}
+    calls = []
+
+    def fake_run_tmux(args):
+        calls.append(args)
+        piping[args[2]] = len(args) > 3
+        return {"ok": True, "stdout": "", "stderr": "", "returncode": 0}
+
+    monkeypatch.setattr("tmux_dashboard.recorder._run_tmux", fake_run_tmux)
+    monkeypatch.setattr("tmux_dashboard.recorder._run_command", lambda args: "1" if piping.get(args[-2]) else "0")
+    recorder = PaneRecorder(load_config())
+
+    assert recorder.start("%1")["ok"] is True
+    assert recorder.start("%1")["ok"] is True
+    assert piping["%1"] is True
+    assert len(calls) == 1
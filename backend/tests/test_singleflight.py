@@ -0,0 +1,51 @@
+import threading
+import time
+
+import pytest
+
+from tmux_dashboard.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_execution():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def collect(pane_id):
+        calls.append(pane_id)
+        release.wait(timeout=5)
+        return {"pane": pane_id}
+
+    wrapped = flights.wrap("pane_detail", collect)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(wrapped("%1"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while flights.executed + flights.shared < 8:
+        assert time.monotonic() < deadline, "callers never joined the flight"
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert calls == ["%1"]
+    assert results == [{"pane": "%1"}] * 8
+    assert flights.shared == 7
+
+    # Once the flight lands, the next call collects fresh data.
+    assert wrapped("%1") == {"pane": "%1"}
+    assert calls == ["%1", "%1"]
+
+
+def test_different_keys_do_not_coalesce_and_errors_propagate():
+    flights = SingleFlight()
+
+    def boom():
+        raise RuntimeError("tmux wedged")
+
+    assert flights.wrap("a", lambda x: x * 2)(2) == 4
+    assert flights.wrap("a", lambda x: x * 2)(3) == 6
+    with pytest.raises(RuntimeError):
+        flights.wrap("b", boom)()
+    assert flights.executed == 3
@@ -0,0 +1,39 @@
+from tmux_dashboard.throttle import MemoryThrottleStore, SqliteThrottleStore
+
+
+def test_memory_store_locks_after_limit_and_resets():
+    store = MemoryThrottleStore()
+    assert store.register_failure("1.2.3.4", 100.0, 2, 600, 900) is False
+    assert store.register_failure("1.2.3.4", 101.0, 2, 600, 900) is True
+    assert store.is_locked("1.2.3.4", 500.0) is True
+    assert store.is_locked("1.2.3.4", 1002.0) is False
+
+    store.reset("1.2.3.4")
+    assert store.is_locked("1.2.3.4", 500.0) is False
+
+
+def test_memory_store_is_bounded_under_many_source_ips():
+    store = MemoryThrottleStore(max_entries=100)
+    for idx in range(1000):
+        store.register_failure(f"10.0.{idx // 256}.{idx % 256}", 100.0 + idx * 0.001, 5, 600, 900)
+    assert len(store) == 100
+
+
+def test_memory_store_drops_expired_entries():
+    store = MemoryThrottleStore()
+    store.register_failure("a", 100.0, 5, 60, 900)
+    store.register_failure("b", 1000.0, 5, 60, 900)
+    assert len(store) == 1
+
+
+def test_sqlite_store_shares_lockout_between_workers(tmp_path):
+    path = str(tmp_path / "throttle.sqlite3")
+    worker_a = SqliteThrottleStore(path)
+    worker_b = SqliteThrottleStore(path)
+
+    assert worker_a.register_failure("1.2.3.4", 100.0, 2, 600, 900) is False
+    assert worker_b.register_failure("1.2.3.4", 101.0, 2, 600, 900) is True
+    assert worker_a.is_locked("1.2.3.4", 200.0) is True
+
+    worker_b.reset("1.2.3.4")
+    assert worker_a.is_locked("1.2.3.4", 200.0) is False
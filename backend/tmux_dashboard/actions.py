@@ -1,21 +1,39 @@
 from __future__ import annotations
 
 import subprocess
+import time
 from typing import Callable, Dict, List
 
+from . import breaker, collectors, metrics, profiling
+
 TMUX_COMMAND_TIMEOUT_SEC = 5
 
 
 def _run_tmux(args: List[str]) -> Dict[str, object]:
+    command = ["tmux", *args]
+    guard = breaker.breaker_for(command, TMUX_COMMAND_TIMEOUT_SEC)
+    # Writes are never answered from stale data: fail fast until the breaker's probe succeeds.
+    if not guard.allow():
+        return {
+            "ok": False,
+            "stdout": "",
+            "stderr": "tmux is not responding",
+            "returncode": 124,
+            "code": "TMUX_UNAVAILABLE",
+        }
+    started = time.perf_counter()
     try:
-        completed = subprocess.run(
-            ["tmux", *args],
-            check=False,
-            capture_output=True,
-            text=True,
-            timeout=TMUX_COMMAND_TIMEOUT_SEC,
-        )
+        with profiling.span(metrics.command_label(command)):
+            completed = subprocess.run(
+                command,
+                check=False,
+                capture_output=True,
+                text=True,
+                timeout=guard.timeout(command),
+            )
     except subprocess.TimeoutExpired as e:
+        metrics.observe_subprocess(command, started, "timeout")
+        guard.record_timeout(command)
         return {
             "ok": False,
             "stdout": (e.stdout or "").strip(),
@@ -23,7 +41,9 @@ def _run_tmux(args: List[str]) -> Dict[str, object]:
             "returncode": 124,
             "code": "TMUX_ACTION_TIMEOUT",
         }
+    guard.record_success(time.perf_counter() - started, command)
     if completed.returncode != 0:
+        metrics.observe_subprocess(command, started, "error")
         return {
             "ok": False,
             "stdout": completed.stdout.strip(),
@@ -32,6 +52,7 @@ def _run_tmux(args: List[str]) -> Dict[str, object]:
             "code": "TMUX_ACTION_FAILED",
         }
 
+    metrics.observe_subprocess(command, started, "ok")
     return {
         "ok": True,
         "stdout": completed.stdout.strip(),
@@ -40,6 +61,20 @@ def _run_tmux(args: List[str]) -> Dict[str, object]:
     }
 
 
+def _run_tmux_with_state(args: List[str], locate: str = "") -> Dict[str, object]:
+    # Structural actions list the server in the same tmux invocation and return the affected
+    # session, so the UI does not wait for the next snapshot poll to see the result.
+    prefix = ["display-message", "-p", "-t", locate, collectors.TARGET_IDS_FORMAT, ";"] if locate else []
+    result = _run_tmux([*prefix, *args, *collectors.state_listing_args()])
+    if result.get("returncode") == 124:
+        return result
+    with profiling.span("action state"):
+        state = collectors.action_state(str(result.get("stdout", "")))
+    if state is None:
+        return result
+    return {"ok": True, "stdout": "", "stderr": "", "returncode": 0, "state": state}
+
+
 def _required_text(payload: Dict[str, object], key: str) -> str:
     value = str(payload.get(key, "")).strip()
     return value
@@ -69,14 +104,14 @@ def _action_select_pane(payload: Dict[str, object]) -> Dict[str, object]:
     target = _required_text(payload, "target_pane")
     if not target:
         return {"ok": False, "error": "target_pane is required"}
-    return _run_tmux(["select-pane", "-t", target])
+    return _run_tmux_with_state(["select-pane", "-t", target], locate=target)
 
 
 def _action_select_window(payload: Dict[str, object]) -> Dict[str, object]:
     target = _required_text(payload, "target_window")
     if not target:
         return {"ok": False, "error": "target_window is required"}
-    return _run_tmux(["select-window", "-t", target])
+    return _run_tmux_with_state(["select-window", "-t", target], locate=target)
 
 
 def _action_switch_client(payload: Dict[str, object]) -> Dict[str, object]:
@@ -90,25 +125,25 @@ def _action_kill_pane(payload: Dict[str, object]) -> Dict[str, object]:
     target = _required_text(payload, "target_pane")
     if not target:
         return {"ok": False, "error": "target_pane is required"}
-    return _run_tmux(["kill-pane", "-t", target])
+    return _run_tmux_with_state(["kill-pane", "-t", target], locate=target)
 
 
 def _action_kill_window(payload: Dict[str, object]) -> Dict[str, object]:
     target = _required_text(payload, "target_window")
     if not target:
         return {"ok": False, "error": "target_window is required"}
-    return _run_tmux(["kill-window", "-t", target])
+    return _run_tmux_with_state(["kill-window", "-t", target], locate=target)
 
 
 def _action_kill_session(payload: Dict[str, object]) -> Dict[str, object]:
     target = _required_text(payload, "target_session")
     if not target:
         return {"ok": False, "error": "target_session is required"}
-    return _run_tmux(["kill-session", "-t", target])
+    return _run_tmux_with_state(["kill-session", "-t", target], locate=target)
 
 
 def _action_new_window(payload: Dict[str, object]) -> Dict[str, object]:
-    args = ["new-window"]
+    args = ["new-window", "-P", "-F", collectors.TARGET_IDS_FORMAT]
     target_session = _required_text(payload, "target_session")
     window_name = _required_text(payload, "window_name")
     command = _required_text(payload, "command")
@@ -118,11 +153,11 @@ def _action_new_window(payload: Dict[str, object]) -> Dict[str, object]:
         args.extend(["-n", window_name])
     if command:
         args.append(command)
-    return _run_tmux(args)
+    return _run_tmux_with_state(args)
 
 
 def _action_split_window(payload: Dict[str, object]) -> Dict[str, object]:
-    args = ["split-window"]
+    args = ["split-window", "-P", "-F", collectors.TARGET_IDS_FORMAT]
     target_pane = _required_text(payload, "target_pane")
     direction = _required_text(payload, "direction") or "vertical"
     percentage = _required_text(payload, "percentage")
@@ -140,7 +175,7 @@ def _action_split_window(payload: Dict[str, object]) -> Dict[str, object]:
     if command:
         args.append(command)
 
-    return _run_tmux(args)
+    return _run_tmux_with_state(args)
 
 
 ACTION_HANDLERS: Dict[str, Callable[[Dict[str, object]], Dict[str, object]]] = {
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from typing import Callable, Dict, Tuple
+
+from . import metrics
+
+# Highest priority first. "interactive" (actions) is never limited, queued or shed.
+PRIORITY_CLASSES = ("interactive", "pane", "snapshot", "network")
+# class -> (concurrent requests, queued requests) per worker process. With the default 8 gunicorn
+# threads the limited classes can hold at most 7, so an action always finds a free thread.
+DEFAULT_LIMITS: Dict[str, Tuple[int, int]] = {"pane": (2, 1), "snapshot": (2, 1), "network": (1, 0)}
+QUEUE_WAIT_SEC = {"pane": 1.0, "snapshot": 2.0, "network": 2.0}
+SERVICE_ALPHA = 0.3
+RETRY_AFTER_MAX_SEC = 30
+
+
+def parse_limits(raw: str) -> Dict[str, Tuple[int, int]]:
+    # "snapshot=4:2,network=1:0" overrides the listed classes and keeps the defaults for the rest.
+    limits = dict(DEFAULT_LIMITS)
+    for item in raw.split(","):
+        if not item.strip():
+            continue
+        name, _, value = item.partition("=")
+        name = name.strip()
+        limit, _, queue = value.strip().partition(":")
+        if name not in DEFAULT_LIMITS or not limit.isdigit() or not (queue or "0").isdigit() or int(limit) < 1:
+            raise ValueError(f"invalid DASHBOARD_ADMISSION_LIMITS entry: {item.strip()!r}")
+        limits[name] = (int(limit), int(queue or "0"))
+    return limits
+
+
+class _Class:
+    __slots__ = ("limit", "queue", "wait_sec", "running", "waiting", "service_sec", "ready")
+
+    def __init__(self, limit: int, queue: int, wait_sec: float, lock: threading.Lock) -> None:
+        self.limit = limit
+        self.queue = queue
+        self.wait_sec = wait_sec
+        self.running = 0
+        self.waiting = 0
+        self.service_sec = 0.0
+        self.ready = threading.Condition(lock)
+
+
+class AdmissionController:
+    def __init__(self, limits: Dict[str, Tuple[int, int]], *, now: Callable[[], float] = time.monotonic) -> None:
+        self._now = now
+        self._lock = threading.Lock()
+        self._classes = {
+            name: _Class(limit, queue, QUEUE_WAIT_SEC[name], self._lock) for name, (limit, queue) in limits.items()
+        }
+
+    def acquire(self, name: str) -> Tuple[bool, int]:
+        # Returns (admitted, retry_after_sec).
+        state = self._classes.get(name)
+        if state is None:
+            return True, 0
+        with self._lock:
+            if state.running < state.limit and not state.waiting:
+                state.running += 1
+                return True, 0
+            if state.waiting < state.queue and not self._higher_waiting(name):
+                state.waiting += 1
+                deadline = self._now() + state.wait_sec
+                try:
+                    while state.running >= state.limit:
+                        remaining = deadline - self._now()
+                        if remaining <= 0 or not state.ready.wait(remaining):
+                            break
+                finally:
+                    state.waiting -= 1
+                if state.running < state.limit:
+                    state.running += 1
+                    return True, 0
+            retry_after = self._retry_after(state)
+        metrics.ADMISSION_REJECTIONS.inc(name)
+        return False, retry_after
+
+    def release(self, name: str, elapsed_sec: float) -> None:
+        state = self._classes.get(name)
+        if state is None:
+            return
+        with self._lock:
+            state.running -= 1
+            state.service_sec += SERVICE_ALPHA * (elapsed_sec - state.service_sec)
+            state.ready.notify()
+
+    def _higher_waiting(self, name: str) -> bool:
+        # A lower class is shed instead of queued while a higher class already has to wait.
+        for higher in PRIORITY_CLASSES[: PRIORITY_CLASSES.index(name)]:
+            state = self._classes.get(higher)
+            if state is not None and state.waiting:
+                return True
+        return False
+
+    def _retry_after(self, state: _Class) -> int:
+        # Time for the requests ahead of a retry to drain, from the class's recent service time.
+        backlog = (state.running + state.waiting + 1) / state.limit
+        return min(max(math.ceil(state.service_sec * backlog), 1), RETRY_AFTER_MAX_SEC)
@@ -3,25 +3,89 @@ from __future__ import annotations
 from flask import Flask
 
 from .actions import execute_action
+from .admission import AdmissionController
+from .archive import SnapshotArchive
 from .auth import AuthService
-from .collectors import collect_network_state, collect_pane_detail, collect_tmux_state
+from .collectors import (
+    collect_network_state,
+    collect_pane_batch,
+    collect_pane_detail,
+    collect_tmux_state,
+    detect_tmux_version,
+    stream_pane_history,
+)
 from .config import load_config
+from .history import MetricsHistory
+from .localsocket import local_subscription_server
+from .netstate import NetworkTracker
+from .polling import PollAdvisor
+from .profiling import ProfiledJSONProvider, Profiler
+from .recorder import PaneRecorder
 from .routes import register_routes
+from .screen import ScreenTracker
+from .search import PaneSearchIndex
+from .singleflight import SingleFlight
 
 
 def create_app() -> Flask:
     app = Flask(__name__)
     cfg = load_config()
+    detect_tmux_version()
     auth = AuthService(cfg)
+    search_index = PaneSearchIndex()
+    # Concurrent polls for the same data share one in-flight collection.
+    flights = SingleFlight()
+    history = MetricsHistory(cfg.history_dir, cfg.history_retention_days)
+    archive = SnapshotArchive(cfg.archive_dir, cfg.archive_interval_sec, cfg.archive_max_segments)
+    poll_advisor = PollAdvisor(cfg.poll_min_ms, cfg.poll_max_ms)
+    network = NetworkTracker(cfg.network_collector)
+    profiler = Profiler(cfg.profile_sample_every, cfg.profile_keep)
+    admission = AdmissionController(cfg.admission_limits)
+    app.json = ProfiledJSONProvider(app)
+    collect_tmux_state_fn = flights.wrap("tmux_state", collect_tmux_state)
+    collect_network_state_fn = flights.wrap("network_state", network.wrap(collect_network_state))
+    # Local consumers share the HTTP collections instead of running their own tmux/ps/lsof polls.
+    local_socket = local_subscription_server(
+        cfg.socket_path,
+        collect_tmux_state_fn=collect_tmux_state_fn,
+        collect_network_state_fn=collect_network_state_fn,
+        collect_pane_batch_fn=collect_pane_batch,
+        interval_sec=cfg.poll_min_ms / 1000,
+        refresh_sec=cfg.poll_max_ms / 1000,
+    )
     app.config["DASHBOARD_DEBUG"] = cfg.debug
+    # Shared with the ASGI entry point so both serving modes use one set of services.
+    app.extensions["tmux_dashboard"] = {
+        "cfg": cfg,
+        "auth": auth,
+        "history": history,
+        "archive": archive,
+        "local_socket": local_socket,
+        "poll_advisor": poll_advisor,
+        "network": network,
+        "profiler": profiler,
+        "admission": admission,
+    }
     register_routes(
         app,
         cfg,
         auth,
         execute_action_fn=execute_action,
-        collect_tmux_state_fn=collect_tmux_state,
-        collect_network_state_fn=collect_network_state,
-        collect_pane_detail_fn=collect_pane_detail,
+        collect_tmux_state_fn=collect_tmux_state_fn,
+        collect_network_state_fn=collect_network_state_fn,
+        collect_pane_detail_fn=flights.wrap("pane_detail", collect_pane_detail),
+        collect_pane_batch_fn=collect_pane_batch,
+        stream_pane_history_fn=stream_pane_history,
+        pane_screen_fn=ScreenTracker().frame,
+        search_panes_fn=search_index.search,
+        recorder=PaneRecorder(cfg),
+        history=history,
+        archive=archive,
+        local_socket=local_socket,
+        network=network,
+        poll_advisor=poll_advisor,
+        admission=admission,
+        profiler=profiler,
     )
     return app
 
@@ -0,0 +1,313 @@
+from __future__ import annotations
+
+import fcntl
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+from . import profiling
+
+# timestamp, segment number, offset in segment, compressed length, kind
+INDEX_RECORD = struct.Struct("<dIIIB")
+INDEX_FILE = "index.bin"
+LOCK_FILE = "archive.lock"
+KEYFRAME = 1
+DELTA = 0
+ARCHIVE_KEYFRAME_EVERY = 60
+ARCHIVE_SEGMENT_BYTES = 4 * 1024 * 1024
+# Derived per-poll fields that would turn every record into a change.
+VOLATILE_NETWORK_KEYS = {"events", "event_seq"}
+
+Flat = Dict[str, Any]
+
+
+class ArchiveEntry(NamedTuple):
+    ts: float
+    segment: int
+    position: int
+    length: int
+    kind: int
+
+
+def _segment_path(directory: str, segment: int) -> str:
+    return os.path.join(directory, f"snapshots-{segment:06d}.z")
+
+
+def _flatten(value: Any, path: Tuple[Any, ...], out: Flat) -> Flat:
+    # Leaves are keyed by their JSON path (ints are list positions), so a delta on a quiet
+    # server only carries the few counters that moved.
+    if isinstance(value, dict) and value:
+        for key, item in value.items():
+            _flatten(item, (*path, key), out)
+    elif isinstance(value, list) and value:
+        for position, item in enumerate(value):
+            _flatten(item, (*path, position), out)
+    else:
+        out[json.dumps(path, separators=(",", ":"))] = value
+    return out
+
+
+def _unflatten(flat: Flat) -> Dict[str, Any]:
+    root: Dict[Any, Any] = {}
+    for key, value in flat.items():
+        path = json.loads(key)
+        node = root
+        for part in path[:-1]:
+            node = node.setdefault(part, {})
+        node[path[-1]] = value
+    return _restore_lists(root)
+
+
+def _restore_lists(node: Any) -> Any:
+    if not isinstance(node, dict) or not node:
+        return node
+    if all(isinstance(key, int) for key in node):
+        return [_restore_lists(node[key]) for key in sorted(node)]
+    return {key: _restore_lists(item) for key, item in node.items()}
+
+
+def _delta(previous: Flat, current: Flat) -> Dict[str, Any]:
+    changed = {key: value for key, value in current.items() if key not in previous or previous[key] != value}
+    return {"set": changed, "del": [key for key in previous if key not in current]}
+
+
+def _apply(flat: Flat, delta: Dict[str, Any]) -> None:
+    for key in delta.get("del", []):
+        flat.pop(key, None)
+    flat.update(delta.get("set", {}))
+
+
+def _entry(index: mmap.mmap, position: int) -> ArchiveEntry:
+    return ArchiveEntry(*INDEX_RECORD.unpack_from(index, position * INDEX_RECORD.size))
+
+
+def _find_at(index: mmap.mmap, count: int, ts: float) -> int:
+    # Last entry at or before ts, or -1.
+    lo, hi = 0, count
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if _entry(index, mid).ts <= ts:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo - 1
+
+
+class SnapshotArchive:
+    # Append-only, delta-encoded history of full snapshots. Every gunicorn worker appends to the
+    # same chain under an flock; a writer that sees entries it did not write replays them before
+    # diffing, so deltas always apply to the record right before them.
+    def __init__(
+        self,
+        directory: str,
+        interval_sec: float = 10.0,
+        max_segments: int = 16,
+        keyframe_every: int = ARCHIVE_KEYFRAME_EVERY,
+        segment_bytes: int = ARCHIVE_SEGMENT_BYTES,
+    ) -> None:
+        self._directory = directory
+        self._interval_sec = interval_sec
+        self._max_segments = max(max_segments, 2)
+        self._keyframe_every = max(keyframe_every, 1)
+        self._segment_bytes = segment_bytes
+        self._lock = threading.Lock()
+        self._last_attempt = float("-inf")
+        # State after the last entry this process wrote or replayed.
+        self._base: Flat | None = None
+        self._keyframe_raw = b""
+        self._since_keyframe = 0
+        self._index_stat: Tuple[int, int] | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._directory)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self._directory, name)
+
+    def _file_lock(self, exclusive: bool) -> Any:
+        os.makedirs(self._directory, mode=0o700, exist_ok=True)
+        handle = open(self._path(LOCK_FILE), "a")
+        fcntl.flock(handle, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        return handle
+
+    def record(self, tmux_state: Dict[str, Any], network_state: Dict[str, Any], now_ts: float | None = None) -> bool:
+        if not self.enabled:
+            return False
+        now_ts = time.time() if now_ts is None else now_ts
+        with self._lock:
+            if now_ts - self._last_attempt < self._interval_sec:
+                return False
+            self._last_attempt = now_ts
+            with profiling.span("archive record"), self._file_lock(exclusive=True):
+                return self._append(now_ts, tmux_state, network_state)
+
+    def _append(self, now_ts: float, tmux_state: Dict[str, Any], network_state: Dict[str, Any]) -> bool:
+        index_path = self._path(INDEX_FILE)
+        with open(index_path, "ab+") as index_file:
+            size = index_file.seek(0, os.SEEK_END)
+            # A torn record from a crash would misalign every entry after it.
+            if size % INDEX_RECORD.size:
+                size -= size % INDEX_RECORD.size
+                index_file.truncate(size)
+            last = None
+            if size:
+                index_file.seek(size - INDEX_RECORD.size)
+                last = ArchiveEntry(*INDEX_RECORD.unpack(index_file.read(INDEX_RECORD.size)))
+            # Another worker recorded this interval already; timestamps must also stay ordered.
+            if last is not None and now_ts - last.ts < self._interval_sec:
+                return False
+            if self._index_stat != (os.fstat(index_file.fileno()).st_ino, size):
+                self._replay_tail()
+
+            network = {key: value for key, value in network_state.items() if key not in VOLATILE_NETWORK_KEYS}
+            current = _flatten({"tmux": tmux_state, "network": network}, (), {})
+            segment = last.segment if last is not None else 1
+            segment_path = _segment_path(self._directory, segment)
+            position = os.path.getsize(segment_path) if os.path.exists(segment_path) else 0
+            full = position >= self._segment_bytes
+            if self._base is None or full or self._since_keyframe >= self._keyframe_every:
+                # Segments always start with a keyframe, so dropping old ones never orphans a delta.
+                if full:
+                    segment += 1
+                    position = 0
+                raw = json.dumps(current, separators=(",", ":")).encode("utf-8")
+                payload = zlib.compress(raw, 6)
+                kind = KEYFRAME
+            else:
+                raw = json.dumps(_delta(self._base, current), separators=(",", ":")).encode("utf-8")
+                # The keyframe as preset dictionary lets short deltas reuse its path strings.
+                compressor = zlib.compressobj(6, zlib.DEFLATED, 15, 9, zlib.Z_DEFAULT_STRATEGY, self._keyframe_raw)
+                payload = compressor.compress(raw) + compressor.flush()
+                kind = DELTA
+
+            with open(_segment_path(self._directory, segment), "ab") as segment_file:
+                segment_file.write(payload)
+            # Written after its payload so readers never see an entry pointing past a segment's end.
+            index_file.seek(0, os.SEEK_END)
+            index_file.write(INDEX_RECORD.pack(now_ts, segment, position, len(payload), kind))
+            index_file.flush()
+            if kind == KEYFRAME:
+                self._keyframe_raw = raw
+                self._since_keyframe = 0
+            else:
+                self._since_keyframe += 1
+            self._base = current
+            self._index_stat = (os.fstat(index_file.fileno()).st_ino, size + INDEX_RECORD.size)
+        if kind == KEYFRAME and segment > self._max_segments:
+            self._prune(segment - self._max_segments + 1)
+        return True
+
+    def _replay_tail(self) -> None:
+        state = self._read(None)
+        if state is None:
+            self._base = None
+            return
+        self._base, self._keyframe_raw, self._since_keyframe, _ts = state
+
+    def _prune(self, oldest_kept: int) -> None:
+        for segment in range(oldest_kept - 1, 0, -1):
+            path = _segment_path(self._directory, segment)
+            if not os.path.exists(path):
+                break
+            os.unlink(path)
+        index_path = self._path(INDEX_FILE)
+        with open(index_path, "rb") as f:
+            data = f.read()
+        usable = len(data) - len(data) % INDEX_RECORD.size
+        tmp_path = f"{index_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            for item in INDEX_RECORD.iter_unpack(data[:usable]):
+                if item[1] >= oldest_kept:
+                    f.write(INDEX_RECORD.pack(*item))
+        os.replace(tmp_path, index_path)
+        self._index_stat = None
+
+    def _read(self, ts: float | None) -> Tuple[Flat, bytes, int, float] | None:
+        # Seek to the last entry at or before ts, back up to its keyframe and apply at most
+        # keyframe_every deltas.
+        index_path = self._path(INDEX_FILE)
+        if not os.path.exists(index_path) or os.path.getsize(index_path) < INDEX_RECORD.size:
+            return None
+        with open(index_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as index:
+            count = len(index) // INDEX_RECORD.size
+            target = count - 1 if ts is None else _find_at(index, count, ts)
+            if target < 0:
+                return None
+            start = target
+            while start > 0 and _entry(index, start).kind != KEYFRAME:
+                start -= 1
+            entries = [_entry(index, position) for position in range(start, target + 1)]
+        if entries[0].kind != KEYFRAME:
+            return None
+
+        segments: Dict[int, mmap.mmap] = {}
+        flat: Flat = {}
+        keyframe_raw = b""
+        try:
+            for entry in entries:
+                segment = segments.get(entry.segment)
+                if segment is None:
+                    try:
+                        with open(_segment_path(self._directory, entry.segment), "rb") as f:
+                            segment = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    except (OSError, ValueError):
+                        return None
+                    segments[entry.segment] = segment
+                payload = segment[entry.position : entry.position + entry.length]
+                if entry.kind == KEYFRAME:
+                    keyframe_raw = zlib.decompress(payload)
+                    flat = json.loads(keyframe_raw)
+                else:
+                    decompressor = zlib.decompressobj(15, keyframe_raw)
+                    _apply(flat, json.loads(decompressor.decompress(payload) + decompressor.flush()))
+        finally:
+            for segment in segments.values():
+                segment.close()
+        return flat, keyframe_raw, len(entries) - 1, entries[-1].ts
+
+    def at(self, ts: float) -> Dict[str, Any] | None:
+        if not self.enabled or not os.path.isdir(self._directory):
+            return None
+        with self._file_lock(exclusive=False):
+            state = self._read(ts)
+        if state is None:
+            return None
+        flat, _keyframe_raw, deltas, recorded_at = state
+        snapshot = _unflatten(flat)
+        return {
+            "recorded_at": recorded_at,
+            "deltas_applied": deltas,
+            "tmux": snapshot.get("tmux", {}),
+            "network": snapshot.get("network", {}),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        summary: Dict[str, Any] = {"enabled": self.enabled, "records": 0, "keyframes": 0, "bytes": 0}
+        index_path = self._path(INDEX_FILE)
+        if not self.enabled or not os.path.exists(index_path):
+            return summary
+        with self._file_lock(exclusive=False):
+            with open(index_path, "rb") as f:
+                data = f.read()
+            usable = len(data) - len(data) % INDEX_RECORD.size
+            entries: List[ArchiveEntry] = [ArchiveEntry(*item) for item in INDEX_RECORD.iter_unpack(data[:usable])]
+            segments = {entry.segment for entry in entries}
+            summary["bytes"] = sum(
+                os.path.getsize(_segment_path(self._directory, segment))
+                for segment in segments
+                if os.path.exists(_segment_path(self._directory, segment))
+            )
+        if entries:
+            summary.update(
+                records=len(entries),
+                keyframes=sum(1 for entry in entries if entry.kind == KEYFRAME),
+                first=entries[0].ts,
+                last=entries[-1].ts,
+            )
+        return summary
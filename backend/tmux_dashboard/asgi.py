@@ -0,0 +1,310 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import io
+import re
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Tuple
+from urllib.parse import parse_qs
+
+from flask import Flask
+
+from . import metrics
+from .app import create_app
+from .polling import snapshot_signature
+from .profiling import PROFILE_HEADER, server_timing
+from .query import parse_query
+from .async_collectors import collect_network_state_async, collect_pane_detail_async, collect_tmux_state_async
+from .routes import OVERLOADED_PAYLOAD, _cors_headers, _is_truthy_arg, admission_class_for
+from .singleflight import AsyncSingleFlight
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+JsonResult = Tuple[int, Dict[str, Any]]
+
+_PANE_DETAIL_PATH = re.compile(r"^/api/panes/([^/]+)$")
+# Flask endpoint names of the native routes, so both modes share one admission table.
+_NATIVE_ENDPOINTS = {"/api/snapshot": "snapshot", "/api/panes/<pane_id>": "pane_detail"}
+
+
+def _request_headers(scope: Scope) -> Dict[str, str]:
+    headers: Dict[str, str] = {}
+    for raw_name, raw_value in scope.get("headers", []):
+        name = raw_name.decode("latin-1").lower()
+        value = raw_value.decode("latin-1")
+        headers[name] = f"{headers[name]},{value}" if name in headers else value
+    return headers
+
+
+def _wsgi_environ(scope: Scope, body: bytes) -> Dict[str, Any]:
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ: Dict[str, Any] = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        # WSGI carries the decoded path as latin-1 code points of its UTF-8 bytes.
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": str(server[0]),
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": str(client[0]),
+        "REMOTE_PORT": str(client[1]),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        # The whole body is buffered, so chunked requests without Content-Length still read.
+        "wsgi.input_terminated": True,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for name, value in _request_headers(scope).items():
+        key = name.upper().replace("-", "_")
+        if key in {"CONTENT_TYPE", "CONTENT_LENGTH"}:
+            environ[key] = value
+        else:
+            environ[f"HTTP_{key}"] = value
+    return environ
+
+
+async def _read_body(receive: Receive) -> bytes | None:
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        body.extend(message.get("body", b""))
+        if not message.get("more_body"):
+            return bytes(body)
+
+
+async def _watch_disconnect(receive: Receive, disconnected: asyncio.Event) -> None:
+    while (await receive())["type"] != "http.disconnect":
+        pass
+    disconnected.set()
+
+
+class DashboardASGI:
+    # Hot polling routes run on the event loop with asyncio subprocesses, so a hung lsof or
+    # tmux no longer pins a worker slot. Every other route is served by the Flask app on a
+    # worker thread, one thread hop per response chunk for streams.
+    def __init__(self, flask_app: Flask) -> None:
+        services = flask_app.extensions["tmux_dashboard"]
+        self._flask = flask_app
+        self._cfg = services["cfg"]
+        self._auth = services["auth"]
+        self._history = services["history"]
+        self._archive = services["archive"]
+        self._local_socket = services["local_socket"]
+        self._poll_advisor = services["poll_advisor"]
+        self._network = services["network"]
+        self._admission = services["admission"]
+        self._profiler = services["profiler"]
+        flights = AsyncSingleFlight()
+        self._collect_tmux_state = flights.wrap("tmux_state", collect_tmux_state_async)
+        self._collect_network_state = flights.wrap(
+            "network_state", services["network"].wrap_async(collect_network_state_async)
+        )
+        self._collect_pane_detail = flights.wrap("pane_detail", collect_pane_detail_async)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        native = self._match(scope["method"], scope["path"])
+        if native is None:
+            await self._call_wsgi(scope, receive, send)
+            return
+        route, handler, params = native
+        started = time.perf_counter()
+        headers = _request_headers(scope)
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        # Same rules as the Flask hooks. Each ASGI request runs in its own task, so the trace's
+        # context variable stays with this request and is copied into to_thread calls and gathers.
+        forced = _is_truthy_arg(headers.get(PROFILE_HEADER.lower())) and self._authenticate(headers) is not None
+        trace = self._profiler.start(f"{scope['method']} {route}", forced)
+        extra_headers: Dict[str, str] = {}
+        try:
+            status, payload = await self._admit(handler, route, scope["method"], headers, query, params, extra_headers)
+            body = self._encode(payload)
+        except BaseException:
+            if trace is not None:
+                self._profiler.abandon()
+            raise
+        if trace is not None:
+            self._profiler.finish(trace, status)
+            if trace.forced:
+                extra_headers["Server-Timing"] = server_timing(trace)
+        await self._send_json(send, status, body, headers.get("origin", ""), route, extra_headers)
+        metrics.HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, route, scope["method"], str(status))
+
+    async def _admit(
+        self,
+        handler: Callable[..., Awaitable[JsonResult]],
+        route: str,
+        method: str,
+        headers: Dict[str, str],
+        query: Dict[str, List[str]],
+        params: List[str],
+        extra_headers: Dict[str, str],
+    ) -> JsonResult:
+        admission_class = admission_class_for(_NATIVE_ENDPOINTS.get(route, ""), method)
+        # As in the Flask hook, only signed-in requests compete for slots; the handler answers 401.
+        if admission_class is None or self._authenticate(headers) is None:
+            return await handler(headers, query, *params)
+        # Native routes hold no thread, but their collections still compete with the Flask
+        # routes for tmux and ps, so they go through the same per-class limits. A queued
+        # acquire blocks, which must not happen on the event loop.
+        admitted, retry_after = await asyncio.to_thread(self._admission.acquire, admission_class)
+        if not admitted:
+            extra_headers["Retry-After"] = str(retry_after)
+            return 503, OVERLOADED_PAYLOAD
+        admitted_at = time.perf_counter()
+        try:
+            return await handler(headers, query, *params)
+        finally:
+            self._admission.release(admission_class, time.perf_counter() - admitted_at)
+
+    def _match(self, method: str, path: str) -> Tuple[str, Callable[..., Awaitable[JsonResult]], List[str]] | None:
+        if method != "GET":
+            return None
+        if path == "/api/health":
+            return "/api/health", self._health, []
+        if path == "/api/snapshot":
+            return "/api/snapshot", self._snapshot, []
+        match = _PANE_DETAIL_PATH.match(path)
+        if match:
+            return "/api/panes/<pane_id>", self._pane_detail, [match.group(1)]
+        return None
+
+    def _encode(self, payload: Dict[str, Any]) -> bytes:
+        # Same serialization as jsonify, so both serving modes return identical bodies.
+        return self._flask.json.response(payload).get_data()
+
+    async def _send_json(
+        self, send: Send, status: int, body: bytes, origin: str, route: str, extra_headers: Dict[str, str]
+    ) -> None:
+        headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode("latin-1"))]
+        response_headers = {**_cors_headers(origin, self._cfg), **extra_headers}
+        headers.extend(
+            (name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in response_headers.items()
+        )
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+        metrics.HTTP_RESPONSE_BYTES.observe(len(body), route)
+
+    def _authenticate(self, headers: Dict[str, str]) -> str | None:
+        return self._auth.authenticate_bearer_token(headers.get("authorization", ""))
+
+    async def _health(self, headers: Dict[str, str], query: Dict[str, List[str]]) -> JsonResult:
+        return 200, {"ok": True}
+
+    async def _snapshot(self, headers: Dict[str, str], query: Dict[str, List[str]]) -> JsonResult:
+        if not self._authenticate(headers):
+            return 401, {"ok": False, "error": "unauthorized"}
+
+        tmux_query = parse_query({name: values[0] for name, values in query.items()})
+        try:
+            events_since = int((query.get("since") or ["0"])[0] or 0)
+        except ValueError:
+            return 400, {"ok": False, "error": "since must be an integer"}
+        started = time.perf_counter()
+        tmux_state, network_state = await asyncio.gather(
+            self._collect_tmux_state() if tmux_query.is_empty else self._collect_tmux_state(tmux_query),
+            self._collect_network_state(),
+        )
+        if tmux_query.is_empty:
+            await asyncio.to_thread(self._history.record, tmux_state, network_state)
+            await asyncio.to_thread(self._archive.record, tmux_state, network_state)
+            self._local_socket.publish_snapshot(tmux_state, network_state)
+        next_poll_ms = self._poll_advisor.advise(
+            f"snapshot:{tmux_query.label()}" if not tmux_query.is_empty else "snapshot",
+            snapshot_signature(tmux_state, network_state),
+            headers.get("authorization", ""),
+            time.perf_counter() - started,
+        )
+        return 200, {
+            "tmux": tmux_state,
+            "network": {**network_state, **self._network.events_since(events_since)},
+            "allowed_actions": sorted(self._cfg.allowed_actions),
+            "next_poll_ms": next_poll_ms,
+        }
+
+    async def _pane_detail(self, headers: Dict[str, str], query: Dict[str, List[str]], pane_id: str) -> JsonResult:
+        if not self._authenticate(headers):
+            return 401, {"ok": False, "error": "unauthorized"}
+
+        since = (query.get("since") or [""])[0].strip()
+        started = time.perf_counter()
+        detail = await self._collect_pane_detail(pane_id, since=since)
+        if detail is None:
+            return 404, {"ok": False, "error": f"pane '{pane_id}' not found"}
+        next_poll_ms = self._poll_advisor.advise(
+            f"pane:{pane_id}",
+            str(detail.get("pane", {}).get("fingerprint", "")),
+            headers.get("authorization", ""),
+            time.perf_counter() - started,
+        )
+        return 200, {"ok": True, **detail, "next_poll_ms": next_poll_ms}
+
+    async def _call_wsgi(self, scope: Scope, receive: Receive, send: Send) -> None:
+        body = await _read_body(receive)
+        if body is None:
+            return
+        environ = _wsgi_environ(scope, body)
+        response: Dict[str, Any] = {}
+
+        def start_response(status: str, headers: List[Tuple[str, str]], exc_info: Any = None) -> Callable[[bytes], None]:
+            response["status"] = int(status.split(" ", 1)[0])
+            response["headers"] = [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+            return lambda _data: None
+
+        def begin() -> Tuple[Any, Iterator[bytes]]:
+            result = self._flask(environ, start_response)
+            return result, iter(result)
+
+        # Flask keeps the request context in contextvars, and stream_with_context re-enters it
+        # on every chunk, so all steps of one response must run inside the same Context.
+        context = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+
+        def in_context(fn: Callable[..., Any], *args: Any) -> Awaitable[Any]:
+            return loop.run_in_executor(None, context.run, fn, *args)
+
+        result, chunks = await in_context(begin)
+        disconnected = asyncio.Event()
+        watcher = asyncio.ensure_future(_watch_disconnect(receive, disconnected))
+        try:
+            chunk = await in_context(next, chunks, None)
+            await send({"type": "http.response.start", "status": response["status"], "headers": response["headers"]})
+            while chunk is not None and not disconnected.is_set():
+                if chunk:
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                chunk = await in_context(next, chunks, None)
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            watcher.cancel()
+            close = getattr(result, "close", None)
+            if close is not None:
+                await in_context(close)
+
+    async def _lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+def create_asgi_app() -> DashboardASGI:
+    return DashboardASGI(create_app())
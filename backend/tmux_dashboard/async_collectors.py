@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import asyncio
+import shutil
+import time
+from typing import Any, Dict, List
+
+from . import breaker, collectors, metrics, profiling
+from .collectors import COMMAND_TIMEOUT_SEC, CommandSteps, T
+from .query import TmuxQuery
+
+
+async def _run_command_async(args: List[str], strip: bool = True) -> str:
+    guard = breaker.breaker_for(args, COMMAND_TIMEOUT_SEC)
+    if not guard.allow():
+        return breaker.recall_stale(args)
+    started = time.perf_counter()
+    with profiling.span(metrics.command_label(args)):
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *args, stdin=asyncio.subprocess.DEVNULL, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL
+            )
+        except OSError:
+            metrics.observe_subprocess(args, started, "error")
+            return ""
+        try:
+            stdout, _ = await asyncio.wait_for(proc.communicate(), guard.timeout(args))
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            metrics.observe_subprocess(args, started, "timeout")
+            guard.record_timeout(args)
+            return breaker.recall_stale(args)
+    guard.record_success(time.perf_counter() - started, args)
+    if proc.returncode != 0:
+        metrics.observe_subprocess(args, started, "error")
+        return ""
+    metrics.observe_subprocess(args, started, "ok")
+    text = stdout.decode("utf-8", errors="replace")
+    output = text.strip() if strip else text
+    breaker.remember(args, output)
+    return output
+
+
+async def _drive_async(steps: CommandSteps[T]) -> T:
+    try:
+        args = next(steps)
+        while True:
+            args = steps.send(await _run_command_async(args))
+    except StopIteration as stop:
+        return stop.value
+
+
+async def _capture_pane_output_async(pane_id: str, lines: int = 200) -> str:
+    if not pane_id:
+        return ""
+    start = f"-{lines}" if lines > 0 else "0"
+    return await _run_command_async(["tmux", "capture-pane", "-p", "-t", pane_id, "-S", start], strip=False)
+
+
+@breaker.reports_stale_async
+async def collect_tmux_state_async(query: TmuxQuery | None = None) -> Dict[str, object]:
+    if shutil.which("tmux") is None:
+        return collectors._tmux_not_found_state()
+    return await _drive_async(collectors._tmux_state_steps(query or TmuxQuery()))
+
+
+@breaker.reports_stale_async
+async def collect_network_state_async() -> Dict[str, object]:
+    return await _drive_async(collectors._network_state_steps())
+
+
+@breaker.reports_stale_async
+async def collect_pane_detail_async(pane_id: str, since: str = "") -> Dict[str, Any] | None:
+    pane_id = pane_id.strip()
+    if not pane_id:
+        return None
+
+    detail = await _drive_async(collectors._pane_meta_steps(pane_id))
+    if detail is None:
+        detail = collectors._pane_detail_from_state(await collect_tmux_state_async(), pane_id)
+        if detail is None:
+            return None
+
+    if collectors._pane_unchanged(detail, since):
+        return collectors._pane_detail_payload(detail, None, since)
+    return collectors._pane_detail_payload(detail, await _capture_pane_output_async(pane_id), since)
@@ -1,20 +1,25 @@
 from __future__ import annotations
 
-from collections import defaultdict, deque
+import hashlib
+import threading
+from collections import OrderedDict
 from time import time
-from typing import Deque
 
 from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
 
+from . import metrics
 from .config import AppConfig
+from .throttle import ThrottleStore, create_throttle_store
 
 
 class AuthService:
-    def __init__(self, cfg: AppConfig) -> None:
+    def __init__(self, cfg: AppConfig, throttle: ThrottleStore | None = None) -> None:
         self._cfg = cfg
         self._serializer = URLSafeTimedSerializer(cfg.auth_secret)
-        self._login_attempts: dict[str, Deque[float]] = defaultdict(deque)
-        self._login_lock_until: dict[str, float] = {}
+        self._throttle = throttle if throttle is not None else create_throttle_store(cfg)
+        # Verified tokens keyed by SHA-256 of the token: (user, expires_at).
+        self._token_cache: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._token_lock = threading.Lock()
 
     def now(self) -> float:
         return time()
@@ -22,34 +27,84 @@ class AuthService:
     def issue_token(self, user: str) -> str:
         return self._serializer.dumps({"sub": user})
 
-    def authenticate_bearer_token(self, auth_header: str) -> str | None:
+    def _bearer_token(self, auth_header: str) -> str:
         if not auth_header.startswith("Bearer "):
-            return None
-        token = auth_header.removeprefix("Bearer ").strip()
-        if not token:
-            return None
+            return ""
+        return auth_header.removeprefix("Bearer ").strip()
 
+    def _verify_token(self, token: str) -> tuple[str, float] | None:
         try:
-            payload = self._serializer.loads(token, max_age=self._cfg.auth_token_ttl_sec)
+            payload, issued_at = self._serializer.loads(
+                token, max_age=self._cfg.auth_token_ttl_sec, return_timestamp=True
+            )
         except (BadSignature, SignatureExpired):
             return None
 
         user = str(payload.get("sub", "")).strip()
-        return user or None
+        if not user:
+            return None
+        return user, issued_at.timestamp() + self._cfg.auth_token_ttl_sec
+
+    def authenticate_bearer_token(self, auth_header: str) -> str | None:
+        token = self._bearer_token(auth_header)
+        if not token:
+            return None
+
+        key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+        now_ts = self.now()
+        # Revocations live in the shared store so a logout reaches every worker, cached or not.
+        if self._throttle.is_revoked(key, now_ts):
+            return None
+        with self._token_lock:
+            cached = self._token_cache.get(key)
+            if cached is not None:
+                if cached[1] > now_ts:
+                    self._token_cache.move_to_end(key)
+                    metrics.count_cache("auth_token", True)
+                    return cached[0]
+                del self._token_cache[key]
+
+        metrics.count_cache("auth_token", False)
+
+        verified = self._verify_token(token)
+        if verified is None:
+            return None
+
+        if self._cfg.auth_token_cache_size > 0:
+            with self._token_lock:
+                self._token_cache[key] = verified
+                self._token_cache.move_to_end(key)
+                while len(self._token_cache) > self._cfg.auth_token_cache_size:
+                    self._token_cache.popitem(last=False)
+        return verified[0]
+
+    def revoke_token(self, auth_header: str) -> bool:
+        token = self._bearer_token(auth_header)
+        if not token:
+            return False
+        verified = self._verify_token(token)
+        if verified is None:
+            return False
+
+        key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+        now_ts = self.now()
+        # Only still-valid signed tokens get here.
+        self._throttle.revoke(key, verified[1], now_ts)
+        with self._token_lock:
+            self._token_cache.pop(key, None)
+        return True
 
     def is_login_locked(self, ip: str, now_ts: float) -> bool:
-        return self._login_lock_until.get(ip, 0) > now_ts
+        return self._throttle.is_locked(ip, now_ts)
 
     def register_login_failure(self, ip: str, now_ts: float) -> None:
-        attempts = self._login_attempts[ip]
-        attempts.append(now_ts)
-        window_start = now_ts - self._cfg.login_window_sec
-        while attempts and attempts[0] < window_start:
-            attempts.popleft()
-        if len(attempts) >= self._cfg.login_attempt_limit:
-            self._login_lock_until[ip] = now_ts + self._cfg.login_lock_sec
-            attempts.clear()
+        self._throttle.register_failure(
+            ip,
+            now_ts,
+            self._cfg.login_attempt_limit,
+            self._cfg.login_window_sec,
+            self._cfg.login_lock_sec,
+        )
 
     def register_login_success(self, ip: str) -> None:
-        self._login_attempts.pop(ip, None)
-        self._login_lock_until.pop(ip, None)
+        self._throttle.reset(ip)
@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import contextvars
+import functools
+import subprocess
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, List, Sequence, TypeVar
+
+from . import metrics
+
+T = TypeVar("T")
+
+BREAKER_FAILURE_THRESHOLD = 3
+BREAKER_RESET_SEC = 5.0
+BREAKER_MAX_RESET_SEC = 60.0
+TIMEOUT_MIN_SEC = 0.5
+TIMEOUT_MIN_SAMPLES = 20
+# Healthy calls finishing in p99 * headroom are still allowed; anything slower is treated as a hang.
+TIMEOUT_HEADROOM = 4.0
+LATENCY_WINDOW = 256
+# tmux sub-commands that only read. A chain with anything else in it changes server state, and
+# killing it on an adaptive timeout would report a failure for a write tmux already carried out.
+TMUX_READS = frozenset(
+    {"list-sessions", "list-windows", "list-panes", "list-clients", "display-message", "capture-pane", "show-options"}
+)
+LAST_GOOD_ENTRIES = 256
+# Only the listings behind a stale snapshot are kept. Pane captures are large, unmasked and
+# would make the per-worker map unbounded in bytes.
+STALE_LISTINGS = frozenset({"list-sessions", "list-windows", "list-panes", "ps", "lsof"})
+# Probes must never repeat a write: tmux is probed with a read-only command instead of the failed call.
+PROBE_ARGS: Dict[str, List[str]] = {"tmux": ["tmux", "list-sessions", "-F", "#{session_id}"]}
+
+
+def latency_key(args: Sequence[str]) -> str | None:
+    # Calls only share a latency window with calls of the same shape: a list-sessions and a
+    # 32-pane capture chain finish orders of magnitude apart. None keeps the full timeout.
+    if not args:
+        return ""
+    if args[0] != "tmux":
+        return args[0]
+    chain: List[str] = []
+    expect_command = True
+    for position, arg in enumerate(args[1:], start=1):
+        if expect_command:
+            if arg not in TMUX_READS:
+                return None
+            chain.append(arg)
+        # A full-history capture grows with the scrollback, not with how loaded tmux is.
+        if arg == "-S" and position + 1 < len(args) and args[position + 1] == "-":
+            return None
+        expect_command = arg == ";"
+    return " ".join(chain)
+
+
+def _default_probe(args: Sequence[str], timeout: float) -> bool:
+    try:
+        subprocess.run(list(args), check=False, capture_output=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return False
+    except OSError:
+        pass
+    # Any answer, even a non-zero exit, means the binary is responsive again.
+    return True
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        max_timeout: float,
+        *,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        reset_sec: float = BREAKER_RESET_SEC,
+        probe: Callable[[Sequence[str], float], bool] = _default_probe,
+    ) -> None:
+        self.name = name
+        self.max_timeout = max_timeout
+        self._failure_threshold = failure_threshold
+        self._base_reset_sec = reset_sec
+        self._reset_sec = reset_sec
+        self._probe = probe
+        self._lock = threading.Lock()
+        # One window per latency_key; the trip state below covers the whole executable.
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._failures = 0
+        self._open = False
+        self._probe_args: List[str] = list(PROBE_ARGS.get(name, []))
+        self._probe_thread: threading.Thread | None = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._open
+
+    def allow(self) -> bool:
+        if self._open:
+            metrics.BREAKER_SHORT_CIRCUITS.inc(self.name)
+            return False
+        return True
+
+    def timeout(self, args: Sequence[str] = ()) -> float:
+        key = latency_key(args)
+        with self._lock:
+            window = self._latencies.get(key) if key is not None else None
+            if window is None or len(window) < TIMEOUT_MIN_SAMPLES:
+                return self.max_timeout
+            ordered = sorted(window)
+        p99 = ordered[min(int(len(ordered) * 0.99), len(ordered) - 1)]
+        return min(max(p99 * TIMEOUT_HEADROOM, TIMEOUT_MIN_SEC), self.max_timeout)
+
+    def record_success(self, seconds: float, args: Sequence[str] = ()) -> None:
+        key = latency_key(args)
+        with self._lock:
+            if key is not None:
+                window = self._latencies.get(key)
+                if window is None:
+                    window = self._latencies[key] = deque(maxlen=LATENCY_WINDOW)
+                window.append(seconds)
+            self._failures = 0
+
+    def record_timeout(self, args: Sequence[str]) -> None:
+        with self._lock:
+            self._failures += 1
+            if self.name not in PROBE_ARGS:
+                self._probe_args = list(args)
+            if self._open or self._failures < self._failure_threshold:
+                return
+            self._open = True
+            self._reset_sec = self._base_reset_sec
+            metrics.BREAKER_TRIPS.inc(self.name)
+            if self._probe_thread is None or not self._probe_thread.is_alive():
+                self._probe_thread = threading.Thread(target=self._probe_until_closed, name=f"breaker-{self.name}", daemon=True)
+                self._probe_thread.start()
+
+    def _probe_until_closed(self) -> None:
+        while True:
+            time.sleep(self._reset_sec)
+            if self._probe(self._probe_args, self.max_timeout):
+                with self._lock:
+                    self._open = False
+                    self._failures = 0
+                    # Latencies observed while healthy may no longer hold; re-learn from the full timeout.
+                    self._latencies.clear()
+                return
+            self._reset_sec = min(self._reset_sec * 2, BREAKER_MAX_RESET_SEC)
+
+
+_registry_lock = threading.Lock()
+_breakers: Dict[str, CircuitBreaker] = {}
+_last_good_lock = threading.Lock()
+_last_good: OrderedDict[tuple, str] = OrderedDict()
+_stale_marks: contextvars.ContextVar[List[str] | None] = contextvars.ContextVar("stale_marks", default=None)
+
+
+def breaker_for(args: Sequence[str], max_timeout: float) -> CircuitBreaker:
+    # One breaker per executable: a wedged tmux server stalls every tmux sub-command alike.
+    name = args[0] if args else ""
+    with _registry_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name, max_timeout)
+            _breakers[name] = breaker
+        return breaker
+
+
+def reset_breakers() -> None:
+    with _registry_lock:
+        _breakers.clear()
+    with _last_good_lock:
+        _last_good.clear()
+
+
+def _is_listing(args: Sequence[str]) -> bool:
+    if not args:
+        return False
+    if args[0] != "tmux":
+        return args[0] in STALE_LISTINGS
+    commands = [arg for position, arg in enumerate(args[1:], start=1) if position == 1 or args[position - 1] == ";"]
+    return all(command in STALE_LISTINGS for command in commands)
+
+
+def remember(args: Sequence[str], output: str) -> None:
+    if not _is_listing(args):
+        return
+    key = tuple(args)
+    with _last_good_lock:
+        _last_good[key] = output
+        _last_good.move_to_end(key)
+        while len(_last_good) > LAST_GOOD_ENTRIES:
+            _last_good.popitem(last=False)
+
+
+def recall_stale(args: Sequence[str]) -> str:
+    with _last_good_lock:
+        output = _last_good.get(tuple(args), "")
+    marks = _stale_marks.get()
+    if marks is not None:
+        marks.append(metrics.command_label(args))
+    return output
+
+
+@contextmanager
+def stale_scope() -> Iterator[List[str]]:
+    marks: List[str] = []
+    token = _stale_marks.set(marks)
+    try:
+        yield marks
+    finally:
+        _stale_marks.reset(token)
+        outer = _stale_marks.get()
+        if outer is not None:
+            outer.extend(marks)
+
+
+def _mark_result(result: Any, marks: List[str]) -> Any:
+    if marks and isinstance(result, dict):
+        return {**result, "stale": True}
+    return result
+
+
+def reports_stale(fn: Callable[..., T]) -> Callable[..., T]:
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> T:
+        with stale_scope() as marks:
+            result = fn(*args, **kwargs)
+        return _mark_result(result, marks)
+
+    return wrapper
+
+
+def reports_stale_async(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        with stale_scope() as marks:
+            result = await fn(*args, **kwargs)
+        return _mark_result(result, marks)
+
+    return wrapper
@@ -1,11 +1,55 @@
 from __future__ import annotations
 
+import os
 import re
+import secrets
 import shutil
 import subprocess
-from typing import Any, Dict, List
+import tempfile
+import threading
+import time
+import zlib
+from typing import Any, BinaryIO, Dict, Generator, Iterable, Iterator, List, Tuple, TypeVar
+
+from . import breaker, metrics, profiling, query as tmux_query, sshargs
+from .query import TmuxQuery
+
+T = TypeVar("T")
+# A collection written as a generator: it yields each command's argv and receives its stripped
+# stdout, so the same parsing drives both the blocking and the asyncio subprocess runners.
+CommandSteps = Generator[List[str], str, T]
 
 COMMAND_TIMEOUT_SEC = 5
+HISTORY_EXPORT_TIMEOUT_SEC = 30
+HISTORY_READ_CHUNK_BYTES = 64 * 1024
+PANE_ID_PATTERN = re.compile(r"^%\d+$")
+TOP_PANES_LIMIT = 5
+# Cheap per-pane change detector: new output moves the history size, cursor or activity time.
+# window_activity has one-second resolution, so an in-place redraw (progress bar, top) within the
+# same second as the last capture can leave all three unchanged; see PANE_CAPTURE_MAX_AGE_SEC.
+PANE_FINGERPRINT_FORMAT = "#{history_size}:#{cursor_x}:#{cursor_y}:#{window_activity}"
+SESSION_ROW_FORMAT = "#{session_id}\t#{session_name}\t#{session_windows}\t#{session_attached}"
+WINDOW_ROW_FORMAT = "#{session_name}\t#{window_id}\t#{window_index}\t#{window_name}\t#{window_active}\t#{window_panes}"
+PANE_ROW_FORMAT = (
+    "#{session_name}\t#{window_id}\t#{pane_id}\t#{pane_index}\t#{pane_active}\t#{pane_pid}\t#{pane_current_command}\t"
+    "#{pane_current_path}\t#{pane_title}\t" + PANE_FINGERPRINT_FORMAT
+)
+PANE_META_FORMAT = (
+    "#{session_name}\t#{session_attached}\t#{window_id}\t#{window_index}\t#{window_name}\t#{window_active}\t"
+    "#{pane_id}\t#{pane_index}\t#{pane_active}\t#{pane_pid}\t#{pane_current_command}\t#{pane_current_path}\t#{pane_title}\t"
+    + PANE_FINGERPRINT_FORMAT
+)
+PANE_OWNER_FORMAT = "#{pane_pid}\t#{pane_id}\t#{session_name}\t#{window_id}\t#{window_index}\t#{pane_index}"
+# Printed for the target of a structural action (-P -F, or display-message before a kill/select).
+TARGET_IDS_FORMAT = "#{session_id}\t#{window_id}\t#{pane_id}"
+PANE_BATCH_MAX = 32
+# A skipped capture is only trusted this long; after that the pane is captured again even if the
+# fingerprint still matches.
+PANE_CAPTURE_MAX_AGE_SEC = 10
+PANE_BATCH_MAX_LINES = 2000
+# Separates command outputs in one chained tmux call. Random per process so pane text cannot fake it,
+# yet stable so repeated chains keep one last-good cache entry.
+OUTPUT_MARKER = f"tmux-dashboard-{secrets.token_hex(8)}"
 SENSITIVE_PATTERNS = [
     re.compile(r"(?i)(authorization\s*:\s*bearer)\s+([^\s]+)"),
     re.compile(r"(?i)(password|passwd|pwd)\s*([=:])\s*([^\s]+)"),
@@ -16,57 +60,206 @@ SENSITIVE_PATTERNS = [
 
 def _mask_sensitive_text(text: str) -> str:
     masked = text
-    for pattern in SENSITIVE_PATTERNS:
-        if "authorization" in pattern.pattern.lower() or pattern.pattern.lower().startswith("(?i)(bearer)"):
-            masked = pattern.sub(r"\1 [REDACTED]", masked)
-        else:
-            masked = pattern.sub(r"\1\2[REDACTED]", masked)
+    with profiling.span("mask"):
+        for pattern in SENSITIVE_PATTERNS:
+            if "authorization" in pattern.pattern.lower() or pattern.pattern.lower().startswith("(?i)(bearer)"):
+                masked = pattern.sub(r"\1 [REDACTED]", masked)
+            else:
+                masked = pattern.sub(r"\1\2[REDACTED]", masked)
     return masked
 
 
 def _run_command(args: List[str]) -> str:
+    return _run_guarded(args, strip=True)
+
+
+def _run_guarded(args: List[str], strip: bool) -> str:
+    # While the executable's breaker is open, answer from the last good output without spawning.
+    guard = breaker.breaker_for(args, COMMAND_TIMEOUT_SEC)
+    if not guard.allow():
+        return breaker.recall_stale(args)
+    started = time.perf_counter()
     try:
-        completed = subprocess.run(args, check=False, capture_output=True, text=True, timeout=COMMAND_TIMEOUT_SEC)
+        with profiling.span(metrics.command_label(args)):
+            completed = subprocess.run(args, check=False, capture_output=True, text=True, timeout=guard.timeout(args))
     except subprocess.TimeoutExpired:
-        return ""
+        metrics.observe_subprocess(args, started, "timeout")
+        guard.record_timeout(args)
+        return breaker.recall_stale(args)
+    guard.record_success(time.perf_counter() - started, args)
     if completed.returncode != 0:
+        metrics.observe_subprocess(args, started, "error")
         return ""
-    return completed.stdout.strip()
+    metrics.observe_subprocess(args, started, "ok")
+    output = completed.stdout.strip() if strip else completed.stdout
+    breaker.remember(args, output)
+    return output
 
 
-def _ps_details(pid: str) -> Dict[str, str]:
-    if not pid or pid == "0":
-        return {}
+def _drive(steps: CommandSteps[T]) -> T:
+    try:
+        args = next(steps)
+        while True:
+            args = steps.send(_run_command(args))
+    except StopIteration as stop:
+        return stop.value
 
-    out = _run_command(["ps", "-p", pid, "-o", "pid=,ppid=,user=,etime=,command="])
-    if not out:
+
+PROCESS_TABLE_ARGS = ["ps", "-axo", "pid=,ppid=,user=,etime=,pcpu=,rss=,command="]
+NETWORK_PROCESS_ARGS = ["ps", "-axo", "pid=,ppid=,user=,command="]
+# The network collection runs right after (or alongside) the tmux collection of the same snapshot
+# and needs the same process table and pane pids, so it reuses them while they are this recent.
+SHARED_READS_MAX_AGE_SEC = 2.0
+_shared_reads_lock = threading.Lock()
+_shared_reads: Tuple[float, Dict[str, Dict[str, str]], Dict[str, Dict[str, object]]] | None = None
+
+
+def _share_reads(process_table: Dict[str, Dict[str, str]], roots: Dict[str, Dict[str, object]]) -> None:
+    global _shared_reads
+    with _shared_reads_lock:
+        _shared_reads = (time.monotonic(), process_table, roots)
+
+
+def _recent_reads() -> Tuple[Dict[str, Dict[str, str]], Dict[str, Dict[str, object]]] | None:
+    with _shared_reads_lock:
+        shared = _shared_reads
+    if shared is None or time.monotonic() - shared[0] > SHARED_READS_MAX_AGE_SEC:
+        return None
+    return shared[1], shared[2]
+
+
+def reset_shared_reads() -> None:
+    global _shared_reads
+    with _shared_reads_lock:
+        _shared_reads = None
+
+
+def _read_process_table() -> Dict[str, Dict[str, str]]:
+    return _parse_process_table(_run_command(PROCESS_TABLE_ARGS))
+
+
+def _parse_process_table(out: str) -> Dict[str, Dict[str, str]]:
+    table: Dict[str, Dict[str, str]] = {}
+    for line in out.splitlines():
+        parts = line.split(None, 6)
+        if len(parts) != 7:
+            continue
+        pid, ppid, user, elapsed, cpu_percent, rss_kb, command = parts
+        table[pid] = {
+            "pid": pid,
+            "ppid": ppid,
+            "user": user,
+            "elapsed": elapsed,
+            "cpu_percent": cpu_percent,
+            "rss_kb": rss_kb,
+            "command": command,
+        }
+    return table
+
+
+def _children_index(table: Dict[str, Dict[str, str]]) -> Dict[str, List[str]]:
+    children: Dict[str, List[str]] = {}
+    for pid, row in table.items():
+        children.setdefault(row["ppid"], []).append(pid)
+    return children
+
+
+def _to_number(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        return 0.0
+
+
+def _process_details(table: Dict[str, Dict[str, str]], pid: str) -> Dict[str, str]:
+    row = table.get(pid)
+    if not row:
         return {}
+    return {**row, "command": _mask_sensitive_text(row["command"])}
+
 
-    parts = out.split(None, 4)
-    if len(parts) < 5:
+def _tree_resources(
+    table: Dict[str, Dict[str, str]], children: Dict[str, List[str]], root_pid: str
+) -> Dict[str, object]:
+    if root_pid not in table:
         return {}
 
+    cpu_percent = 0.0
+    rss_kb = 0.0
+    descendants = 0
+    heaviest_pid = ""
+    heaviest_cpu = -1.0
+    stack = [root_pid]
+    seen = set()
+    while stack:
+        pid = stack.pop()
+        if pid in seen:
+            continue
+        seen.add(pid)
+        row = table[pid]
+        cpu = _to_number(row["cpu_percent"])
+        cpu_percent += cpu
+        rss_kb += _to_number(row["rss_kb"])
+        if pid != root_pid:
+            descendants += 1
+            if cpu > heaviest_cpu:
+                heaviest_cpu = cpu
+                heaviest_pid = pid
+        stack.extend(children.get(pid, ()))
+
     return {
-        "pid": parts[0],
-        "ppid": parts[1],
-        "user": parts[2],
-        "elapsed": parts[3],
-        "command": _mask_sensitive_text(parts[4]),
+        "cpu_percent": round(cpu_percent, 1),
+        "rss_kb": int(rss_kb),
+        "descendants": descendants,
+        "top_command": _mask_sensitive_text(table[heaviest_pid]["command"]) if heaviest_pid else "",
     }
 
 
-def collect_tmux_state() -> Dict[str, object]:
+def _top_panes(sessions: List[Dict[str, Any]], limit: int = TOP_PANES_LIMIT) -> List[Dict[str, object]]:
+    ranked: List[Dict[str, object]] = []
+    for session in sessions:
+        for window in session["windows"]:
+            for pane in window["panes"]:
+                resources = pane.get("resources") or {}
+                if not resources:
+                    continue
+                ranked.append(
+                    {
+                        "pane_id": pane["id"],
+                        "session": session["name"],
+                        "window_id": window["id"],
+                        "current_command": pane["current_command"],
+                        **resources,
+                    }
+                )
+    ranked.sort(key=lambda item: (item["cpu_percent"], item["rss_kb"]), reverse=True)
+    return ranked[:limit]
+
+
+def detect_tmux_version() -> None:
+    # Warmed at startup so filtered snapshots do not pay for tmux -V on their first request.
+    if shutil.which("tmux") is not None and tmux_query.cached_version() is None:
+        tmux_query.remember_version(_run_command(tmux_query.VERSION_ARGS))
+
+
+def _tmux_not_found_state() -> Dict[str, object]:
+    return {
+        "available": False,
+        "running": False,
+        "sessions": [],
+        "error": "tmux command not found",
+    }
+
+
+@breaker.reports_stale
+def collect_tmux_state(query: TmuxQuery | None = None) -> Dict[str, object]:
     if shutil.which("tmux") is None:
-        return {
-            "available": False,
-            "running": False,
-            "sessions": [],
-            "error": "tmux command not found",
-        }
+        return _tmux_not_found_state()
+    return _drive(_tmux_state_steps(query or TmuxQuery()))
 
-    sessions_raw = _run_command(
-        ["tmux", "list-sessions", "-F", "#{session_id}\t#{session_name}\t#{session_windows}\t#{session_attached}"]
-    )
+
+def _tmux_state_steps(query: TmuxQuery = TmuxQuery()) -> CommandSteps[Dict[str, object]]:
+    sessions_raw = yield ["tmux", "list-sessions", "-F", SESSION_ROW_FORMAT]
     if not sessions_raw:
         return {
             "available": True,
@@ -75,38 +268,62 @@ def collect_tmux_state() -> Dict[str, object]:
             "error": "no running tmux server",
         }
 
-    windows_raw = _run_command(
-        [
-            "tmux",
-            "list-windows",
-            "-a",
-            "-F",
-            "#{session_name}\t#{window_id}\t#{window_index}\t#{window_name}\t#{window_active}\t#{window_panes}",
-        ]
-    )
-    panes_raw = _run_command(
-        [
-            "tmux",
-            "list-panes",
-            "-a",
-            "-F",
-            "#{session_name}\t#{window_id}\t#{pane_id}\t#{pane_index}\t#{pane_active}\t#{pane_pid}\t#{pane_current_command}\t#{pane_current_path}\t#{pane_title}",
-        ]
-    )
+    # list-sessions stays unfiltered: it is one line per session and an empty answer must keep
+    # meaning "no server". The window and pane listings carry the query as tmux -f filters.
+    filters = False
+    if not query.is_empty:
+        version = tmux_query.cached_version()
+        if version is None:
+            version = tmux_query.remember_version((yield tmux_query.VERSION_ARGS))
+        filters = version >= tmux_query.FILTER_MIN_VERSION
+
+    sessions = _parse_sessions(query, sessions_raw)
+    windows_raw = panes_raw = ""
+    if sessions:
+        windows_raw = yield tmux_query.list_windows_args(query, WINDOW_ROW_FORMAT, filters)
+        panes_raw = yield tmux_query.list_panes_args(query, PANE_ROW_FORMAT, filters)
+
+    # One process-table read per snapshot; every pane's subtree is resolved from it.
+    process_table = _parse_process_table((yield PROCESS_TABLE_ARGS)) if panes_raw else {}
+    sorted_sessions = _session_tree(query, sessions, windows_raw, panes_raw, process_table)
+    if query.is_empty and process_table:
+        _share_reads(process_table, _tree_pane_roots(sorted_sessions))
+    return {
+        "available": True,
+        "running": True,
+        "sessions": sorted_sessions,
+        "top_panes": _top_panes(sorted_sessions),
+        "error": "",
+    }
+
 
+def _parse_sessions(query: TmuxQuery, sessions_raw: str) -> Dict[str, Dict[str, object]]:
     sessions: Dict[str, Dict[str, object]] = {}
     for line in sessions_raw.splitlines():
         parts = line.split("\t")
         if len(parts) != 4:
             continue
-        _, name, window_count, attached = parts
+        session_id, name, window_count, attached = parts
+        if not tmux_query.session_matches(query, name, attached == "1"):
+            continue
         sessions[name] = {
+            "id": session_id,
             "name": name,
             "window_count": int(window_count),
             "attached": attached == "1",
             "windows": [],
         }
+    return sessions
 
+
+def _session_tree(
+    query: TmuxQuery,
+    sessions: Dict[str, Dict[str, object]],
+    windows_raw: str,
+    panes_raw: str,
+    process_table: Dict[str, Dict[str, str]],
+) -> List[Dict[str, object]]:
+    children = _children_index(process_table)
     windows: Dict[str, Dict[str, object]] = {}
     for line in windows_raw.splitlines():
         parts = line.split("\t")
@@ -114,6 +331,8 @@ def collect_tmux_state() -> Dict[str, object]:
             continue
 
         session_name, window_id, window_index, window_name, window_active, pane_count = parts
+        if query.active_only and window_active != "1":
+            continue
         window = {
             "id": window_id,
             "index": int(window_index),
@@ -128,10 +347,12 @@ def collect_tmux_state() -> Dict[str, object]:
 
     for line in panes_raw.splitlines():
         parts = line.split("\t")
-        if len(parts) != 9:
+        if len(parts) != 10:
             continue
 
-        _, window_id, pane_id, pane_index, pane_active, pane_pid, current_cmd, current_path, pane_title = parts
+        _, window_id, pane_id, pane_index, pane_active, pane_pid, current_cmd, current_path, pane_title, fingerprint = parts
+        if (query.active_only and pane_active != "1") or (query.command and current_cmd != query.command):
+            continue
         pane = {
             "id": pane_id,
             "index": int(pane_index),
@@ -140,26 +361,83 @@ def collect_tmux_state() -> Dict[str, object]:
             "current_command": current_cmd,
             "current_path": current_path,
             "title": pane_title,
-            "process": _ps_details(pane_pid),
+            "fingerprint": fingerprint,
+            "process": _process_details(process_table, pane_pid),
+            "resources": _tree_resources(process_table, children, pane_pid),
         }
         window = windows.get(window_id)
         if window:
             window["panes"].append(pane)
 
+    return tmux_query.prune_empty(query, sorted(sessions.values(), key=lambda item: item["name"]))
+
+
+def _state_listings() -> List[Tuple[str, List[str]]]:
+    # Exactly the argv of an unfiltered snapshot, so an action's listing can refresh their last-good output.
+    query = TmuxQuery()
+    return [
+        ("sessions", ["tmux", "list-sessions", "-F", SESSION_ROW_FORMAT]),
+        ("windows", tmux_query.list_windows_args(query, WINDOW_ROW_FORMAT, False)),
+        ("panes", tmux_query.list_panes_args(query, PANE_ROW_FORMAT, False)),
+    ]
+
+
+def state_listing_args() -> List[str]:
+    args: List[str] = []
+    for name, listing in _state_listings():
+        args += [";", "display-message", "-p", f"{OUTPUT_MARKER}:{name}", ";", *listing[1:]]
+    return args
+
+
+def action_state(output: str) -> Dict[str, object] | None:
+    # None means the chain stopped before the listings, i.e. the action itself failed.
+    head: List[str] = []
+    sections: Dict[str, List[str]] = {}
+    current = head
+    for line in output.split("\n"):
+        if line.startswith(f"{OUTPUT_MARKER}:"):
+            current = sections.setdefault(line[len(OUTPUT_MARKER) + 1 :], [])
+        else:
+            current.append(line)
+    if "sessions" not in sections:
+        return None
+
+    raw = {name: "\n".join(lines).strip() for name, lines in sections.items()}
+    listings = _state_listings()
+    # Killing the last session takes the server down and the later listings fail: that is an empty server.
+    if not raw["sessions"]:
+        raw = {name: "" for name, _ in listings}
+    if all(name in raw for name, _ in listings):
+        for name, args in listings:
+            breaker.remember(args, raw[name])
+
+    ids = (head[-1] if head else "").split("\t")
+    session_id, window_id, pane_id = (ids + ["", ""])[:3]
+    query = TmuxQuery()
+    sessions = {
+        name: session for name, session in _parse_sessions(query, raw["sessions"]).items() if session["id"] == session_id
+    }
+    # The action ran without a ps read, so panes in the subtree carry no process or resource details.
+    tree = _session_tree(query, sessions, raw.get("windows", ""), raw.get("panes", ""), {})
     return {
-        "available": True,
-        "running": True,
-        "sessions": sorted(sessions.values(), key=lambda item: item["name"]),
-        "error": "",
+        "session_id": session_id,
+        "window_id": window_id,
+        "pane_id": pane_id,
+        "session": tree[0] if tree else None,
     }
 
 
+@breaker.reports_stale
 def collect_network_state() -> Dict[str, object]:
-    listening: List[Dict[str, str]] = []
-    ssh_connections: List[Dict[str, str]] = []
+    return _drive(_network_state_steps())
+
+
+def _network_state_steps() -> CommandSteps[Dict[str, object]]:
+    listening: List[Dict[str, object]] = []
+    ssh_connections: List[Dict[str, object]] = []
     ssh_tunnels: List[Dict[str, object]] = []
 
-    lsof_output = _run_command(["lsof", "-nP", "-iTCP", "-sTCP:LISTEN"])
+    lsof_output = yield ["lsof", "-nP", "-iTCP", "-sTCP:LISTEN"]
     for idx, line in enumerate(lsof_output.splitlines()):
         if idx == 0:
             continue
@@ -172,16 +450,23 @@ def collect_network_state() -> Dict[str, object]:
                 "pid": parts[1],
                 "user": parts[2],
                 "address": parts[8],
+                "port": _address_port(parts[8]),
             }
         )
 
-    ps_output = _run_command(["ps", "-axo", "pid=,ppid=,user=,command="])
-    for line in ps_output.splitlines():
-        parts = line.split(None, 3)
+    parents: Dict[str, str] = {}
+    shared = _recent_reads()
+    if shared is not None:
+        rows = [[row["pid"], row["ppid"], row["user"], row["command"]] for row in shared[0].values()]
+    else:
+        ps_output = yield NETWORK_PROCESS_ARGS
+        rows = [line.split(None, 3) for line in ps_output.splitlines()]
+    for parts in rows:
         if len(parts) != 4:
             continue
 
         pid, ppid, user, command = parts
+        parents[pid] = ppid
         if "ssh" not in command:
             continue
 
@@ -189,17 +474,29 @@ def collect_network_state() -> Dict[str, object]:
         record = {"pid": pid, "ppid": ppid, "user": user, "command": masked_command}
         ssh_connections.append(record)
 
-        has_tunnel = any(flag in command for flag in (" -L ", " -R ", " -D ", " -W "))
-        if has_tunnel:
+        forwards = sshargs.parse_forwards(command.split())
+        if forwards:
             ssh_tunnels.append(
                 {
                     "pid": pid,
                     "user": user,
                     "command": masked_command,
                     "kind": "tunnel",
+                    "forwards": forwards,
                 }
             )
 
+    if shared is not None:
+        roots = shared[1]
+    else:
+        panes_raw = ""
+        if shutil.which("tmux") is not None:
+            panes_raw = yield ["tmux", "list-panes", "-a", "-F", PANE_OWNER_FORMAT]
+        roots = _pane_roots(panes_raw)
+    owners = _pane_owner_index(parents, roots)
+    for record in [*listening, *ssh_connections, *ssh_tunnels]:
+        record["pane"] = owners.get(str(record["pid"]))
+
     return {
         "listening_servers": listening,
         "ssh_connections": ssh_connections,
@@ -207,44 +504,136 @@ def collect_network_state() -> Dict[str, object]:
     }
 
 
-def _capture_pane_output(pane_id: str, lines: int = 200) -> str:
-    if not pane_id:
-        return ""
+def _address_port(address: str) -> int | None:
+    # lsof prints "*:3000", "127.0.0.1:3000" or "[::1]:3000".
+    port = address.rpartition(":")[2]
+    return int(port) if port.isdigit() else None
 
-    try:
-        completed = subprocess.run(
-            ["tmux", "capture-pane", "-p", "-t", pane_id, "-S", f"-{max(lines, 1)}"],
-            check=False,
-            capture_output=True,
-            text=True,
-            timeout=COMMAND_TIMEOUT_SEC,
-        )
-    except subprocess.TimeoutExpired:
-        return ""
-    if completed.returncode != 0:
-        return ""
-    return completed.stdout
 
+def _tree_pane_roots(sessions: List[Dict[str, Any]]) -> Dict[str, Dict[str, object]]:
+    return {
+        str(pane["pid"]): {
+            "pane_id": pane["id"],
+            "session": session["name"],
+            "window_id": window["id"],
+            "window_index": window["index"],
+            "pane_index": pane["index"],
+        }
+        for session in sessions
+        for window in session["windows"]
+        for pane in window["panes"]
+    }
 
-def _collect_pane_meta(pane_id: str) -> Dict[str, Any] | None:
-    row = _run_command(
+
+def _pane_roots(panes_raw: str) -> Dict[str, Dict[str, object]]:
+    roots: Dict[str, Dict[str, object]] = {}
+    for line in panes_raw.splitlines():
+        parts = line.split("\t")
+        if len(parts) != 6 or not parts[4].isdigit() or not parts[5].isdigit():
+            continue
+        pane_pid, pane_id, session_name, window_id, window_index, pane_index = parts
+        roots[pane_pid] = {
+            "pane_id": pane_id,
+            "session": session_name,
+            "window_id": window_id,
+            "window_index": int(window_index),
+            "pane_index": int(pane_index),
+        }
+    return roots
+
+
+def _pane_owner_index(
+    parents: Dict[str, str], roots: Dict[str, Dict[str, object]], pids: Iterable[str] | None = None
+) -> Dict[str, Dict[str, object] | None]:
+    # Resolves every pid (or just `pids`) to the pane whose pane_pid is its nearest ancestor. Each
+    # walk stops at the first pid already resolved, so the whole table is indexed in one linear pass.
+    owners: Dict[str, Dict[str, object] | None] = {}
+    for pid in parents if pids is None else pids:
+        chain: List[str] = []
+        walked = set()
+        current: str | None = pid
+        while current is not None and current not in owners and current not in roots and current not in walked:
+            chain.append(current)
+            walked.add(current)
+            current = parents.get(current)
+        if current is None or current in walked:
+            owner = None
+        else:
+            owner = roots[current] if current in roots else owners[current]
+        for item in chain:
+            owners[item] = owner
+    for pid, root in roots.items():
+        owners[pid] = root
+    return owners
+
+
+def port_owners(network_state: Dict[str, Any], port: int) -> List[Dict[str, object]]:
+    return [server for server in network_state.get("listening_servers", []) if server.get("port") == port]
+
+
+def collect_pane_fingerprints() -> Dict[str, Dict[str, Any]]:
+    rows = _run_command(
         [
             "tmux",
             "list-panes",
-            "-t",
-            pane_id,
+            "-a",
             "-F",
-            "#{session_name}\t#{session_attached}\t#{window_id}\t#{window_index}\t#{window_name}\t#{window_active}\t#{pane_id}\t#{pane_index}\t#{pane_active}\t#{pane_pid}\t#{pane_current_command}\t#{pane_current_path}\t#{pane_title}",
+            "#{pane_id}\t#{session_name}\t#{window_id}\t#{window_index}\t#{pane_index}\t#{pane_height}\t#{history_size}\t#{history_limit}\t"
+            + PANE_FINGERPRINT_FORMAT,
         ]
     )
+    panes: Dict[str, Dict[str, Any]] = {}
+    for line in rows.splitlines():
+        parts = line.split("\t")
+        if len(parts) != 9:
+            continue
+        pane_id, session_name, window_id, window_index, pane_index, height, history_size, history_limit, fingerprint = parts
+        try:
+            panes[pane_id] = {
+                "session": session_name,
+                "window_id": window_id,
+                "window_index": int(window_index),
+                "pane_index": int(pane_index),
+                "height": int(height),
+                "history_size": int(history_size),
+                "history_limit": int(history_limit),
+                "fingerprint": fingerprint,
+            }
+        except ValueError:
+            continue
+    return panes
+
+
+def _capture_pane_output(pane_id: str, lines: int = 200) -> str:
+    if not pane_id:
+        return ""
+
+    # lines=0 captures only the visible screen.
+    start = f"-{lines}" if lines > 0 else "0"
+    return _run_guarded(["tmux", "capture-pane", "-p", "-t", pane_id, "-S", start], strip=False)
+
+
+def _collect_pane_meta(pane_id: str) -> Dict[str, Any] | None:
+    return _drive(_pane_meta_steps(pane_id))
+
+
+def _pane_meta_steps(pane_id: str) -> CommandSteps[Dict[str, Any] | None]:
+    # display-message resolves exactly the target pane; list-panes -t would list its whole window.
+    row = yield ["tmux", "display-message", "-p", "-t", pane_id, PANE_META_FORMAT]
     if not row:
         return None
 
-    first = row.splitlines()[0]
-    parts = first.split("\t")
-    if len(parts) != 13:
+    parts = row.splitlines()[0].split("\t")
+    if len(parts) != 14 or parts[6] != pane_id:
         return None
 
+    process_table = _parse_process_table((yield PROCESS_TABLE_ARGS))
+    return _pane_meta_from_row(parts, process_table, _children_index(process_table))
+
+
+def _pane_meta_from_row(
+    parts: List[str], process_table: Dict[str, Dict[str, str]], children: Dict[str, List[str]]
+) -> Dict[str, Any]:
     (
         session_name,
         session_attached,
@@ -259,10 +648,8 @@ def _collect_pane_meta(pane_id: str) -> Dict[str, Any] | None:
         pane_current_command,
         pane_current_path,
         pane_title,
+        fingerprint,
     ) = parts
-    if pane_id_value != pane_id:
-        return None
-
     return {
         "session": {
             "name": session_name,
@@ -282,13 +669,18 @@ def _collect_pane_meta(pane_id: str) -> Dict[str, Any] | None:
             "current_command": pane_current_command,
             "current_path": pane_current_path,
             "title": pane_title,
-            "process": _ps_details(pane_pid),
+            "fingerprint": fingerprint,
+            "process": _process_details(process_table, pane_pid),
+            "resources": _tree_resources(process_table, children, pane_pid),
         },
     }
 
 
 def _collect_pane_detail_from_snapshot(pane_id: str) -> Dict[str, Any] | None:
-    tmux_state = collect_tmux_state()
+    return _pane_detail_from_state(collect_tmux_state(), pane_id)
+
+
+def _pane_detail_from_state(tmux_state: Dict[str, Any], pane_id: str) -> Dict[str, Any] | None:
     if not tmux_state.get("running"):
         return None
 
@@ -316,7 +708,8 @@ def _collect_pane_detail_from_snapshot(pane_id: str) -> Dict[str, Any] | None:
     return None
 
 
-def collect_pane_detail(pane_id: str) -> Dict[str, Any] | None:
+@breaker.reports_stale
+def collect_pane_detail(pane_id: str, since: str = "") -> Dict[str, Any] | None:
     pane_id = pane_id.strip()
     if not pane_id:
         return None
@@ -328,9 +721,221 @@ def collect_pane_detail(pane_id: str) -> Dict[str, Any] | None:
         if detail is None:
             return None
 
-    return {
+    if _pane_unchanged(detail, since):
+        return _pane_detail_payload(detail, None, since)
+    return _pane_detail_payload(detail, _capture_pane_output(pane_id), since)
+
+
+def _capture_token(fingerprint: str, captured_at: float) -> str:
+    return f"{fingerprint}@{int(captured_at)}"
+
+
+def _pane_unchanged(detail: Dict[str, Any], since: str, now_ts: float | None = None) -> bool:
+    # `since` is the capture_token of the client's last capture: the fingerprint it saw and when.
+    # The fingerprint is read before capturing, so output arriving in between moves it again and
+    # the next poll re-captures; the age limit covers redraws the fingerprint cannot see.
+    fingerprint, _, captured_at = since.rpartition("@")
+    now_ts = time.time() if now_ts is None else now_ts
+    fresh = captured_at.isdigit() and now_ts - int(captured_at) < PANE_CAPTURE_MAX_AGE_SEC
+    unchanged = fresh and detail["pane"].get("fingerprint") == fingerprint
+    if since:
+        metrics.count_cache("pane_output", unchanged)
+    return unchanged
+
+
+def _pane_detail_payload(detail: Dict[str, Any], output: str | None, since: str = "") -> Dict[str, Any]:
+    payload = {
         "session": detail["session"],
         "window": detail["window"],
         "pane": detail["pane"],
-        "output": _capture_pane_output(pane_id),
     }
+    if output is None:
+        # Echoed unchanged, so the age limit counts from the capture the client actually holds.
+        return {**payload, "unchanged": True, "capture_token": since}
+    capture_token = _capture_token(str(detail["pane"].get("fingerprint", "")), time.time())
+    return {**payload, "output": output, "unchanged": False, "capture_token": capture_token}
+
+
+def collect_pane_screen(pane_id: str) -> Dict[str, Any] | None:
+    pane_id = pane_id.strip()
+    if not pane_id:
+        return None
+    return _drive(_pane_screen_steps(pane_id))
+
+
+def _pane_screen_steps(pane_id: str) -> CommandSteps[Dict[str, Any] | None]:
+    # Geometry and the visible grid with SGR attributes come from one chained tmux call.
+    out = yield [
+        "tmux",
+        "display-message",
+        "-p",
+        "-t",
+        pane_id,
+        "#{pane_width}\t#{pane_height}\t#{cursor_x}\t#{cursor_y}\t#{cursor_flag}",
+        ";",
+        "capture-pane",
+        "-p",
+        "-e",
+        "-t",
+        pane_id,
+    ]
+    if not out:
+        return None
+    header, _, body = out.partition("\n")
+    parts = header.split("\t")
+    if len(parts) != 5:
+        return None
+    try:
+        width, height, cursor_x, cursor_y = (int(value) for value in parts[:4])
+    except ValueError:
+        return None
+    return {
+        "width": width,
+        "height": height,
+        "cursor": {"x": cursor_x, "y": cursor_y, "visible": parts[4] == "1"},
+        "lines": body.split("\n")[:height] if body else [],
+    }
+
+
+@breaker.reports_stale
+def collect_pane_batch(targets: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return _drive(_pane_batch_steps(targets))
+
+
+def _pane_batch_steps(targets: List[Dict[str, Any]]) -> CommandSteps[Dict[str, Any]]:
+    # One list-panes, one ps and one chained capture-pane, however many panes are requested.
+    rows = yield ["tmux", "list-panes", "-a", "-F", PANE_META_FORMAT]
+    metas: Dict[str, List[str]] = {}
+    for line in rows.splitlines():
+        parts = line.split("\t")
+        if len(parts) == 14:
+            metas[parts[6]] = parts
+
+    found = [item for item in targets if item["id"] in metas]
+    missing = [item["id"] for item in targets if item["id"] not in metas]
+    process_table = _parse_process_table((yield PROCESS_TABLE_ARGS)) if found else {}
+    children = _children_index(process_table)
+    details = {item["id"]: _pane_meta_from_row(metas[item["id"]], process_table, children) for item in found}
+
+    unchanged = {item["id"]: _pane_unchanged(details[item["id"]], item["since"]) for item in found}
+    pending = [item for item in found if not unchanged[item["id"]]]
+    outputs: Dict[str, str] = {}
+    if pending:
+        outputs = _split_pane_batch((yield _pane_batch_capture_args(pending)), pending)
+        if len(outputs) < len(pending):
+            # tmux aborts the whole chain when a pane closed after list-panes; retry once without it.
+            alive = set((yield ["tmux", "list-panes", "-a", "-F", "#{pane_id}"]).splitlines())
+            pending = [item for item in pending if item["id"] in alive]
+            outputs = _split_pane_batch((yield _pane_batch_capture_args(pending)), pending) if pending else {}
+
+    panes: List[Dict[str, Any]] = []
+    for item in found:
+        pane_id = item["id"]
+        if unchanged[pane_id]:
+            panes.append(_pane_detail_payload(details[pane_id], None, item["since"]))
+        elif pane_id in outputs:
+            panes.append(_pane_detail_payload(details[pane_id], outputs[pane_id]))
+        else:
+            missing.append(pane_id)
+    return {"panes": panes, "missing": missing}
+
+
+def _pane_batch_capture_args(pending: List[Dict[str, Any]]) -> List[str]:
+    args = ["tmux"]
+    for index, item in enumerate(pending):
+        start = f"-{item['lines']}" if item["lines"] > 0 else "0"
+        args += ["display-message", "-p", f"{OUTPUT_MARKER}:{index}", ";"]
+        args += ["capture-pane", "-p", "-t", item["id"], "-S", start, ";"]
+    return args + ["display-message", "-p", f"{OUTPUT_MARKER}:end"]
+
+
+def _split_pane_batch(text: str, pending: List[Dict[str, Any]]) -> Dict[str, str]:
+    # A failed chain returns nothing, so the trailing marker proves every capture completed.
+    if not text.endswith(f"{OUTPUT_MARKER}:end"):
+        return {}
+    outputs: Dict[str, str] = {}
+    current: str | None = None
+    lines: List[str] = []
+    for line in text.split("\n"):
+        tag = line[len(OUTPUT_MARKER) + 1 :] if line.startswith(f"{OUTPUT_MARKER}:") else None
+        if tag is None:
+            lines.append(line)
+            continue
+        if current is not None:
+            outputs[current] = "".join(f"{item}\n" for item in lines)
+        current = pending[int(tag)]["id"] if tag.isdigit() and int(tag) < len(pending) else None
+        lines = []
+    return outputs
+
+
+def _iter_history_file(f: BinaryIO, compress: bool) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+    with f:
+        while True:
+            chunk = f.read(HISTORY_READ_CHUNK_BYTES)
+            if not chunk:
+                break
+            if compressor is None:
+                yield chunk
+                continue
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+    if compressor is not None:
+        yield compressor.flush()
+
+
+def stream_pane_history(pane_id: str, compress: bool = False) -> Iterator[bytes] | None:
+    pane_id = pane_id.strip()
+    if not PANE_ID_PATTERN.match(pane_id):
+        return None
+
+    fd, path = tempfile.mkstemp(prefix="tmux-dashboard-history-", suffix=".txt")
+    os.close(fd)
+    buffer_name = f"tmux-dashboard-{secrets.token_hex(8)}"
+    # Copy the whole scrollback into a tmux buffer and let the server write it to disk,
+    # so the worker only ever holds one read chunk in memory.
+    args = [
+        "tmux",
+        "capture-pane",
+        "-t",
+        pane_id,
+        "-S",
+        "-",
+        "-E",
+        "-",
+        "-b",
+        buffer_name,
+        ";",
+        "save-buffer",
+        "-b",
+        buffer_name,
+        path,
+        ";",
+        "delete-buffer",
+        "-b",
+        buffer_name,
+    ]
+    started = time.perf_counter()
+    try:
+        completed = subprocess.run(
+            args,
+            check=False,
+            capture_output=True,
+            text=True,
+            timeout=HISTORY_EXPORT_TIMEOUT_SEC,
+        )
+    except subprocess.TimeoutExpired:
+        completed = None
+    if completed is None or completed.returncode != 0:
+        metrics.observe_subprocess(args, started, "timeout" if completed is None else "error")
+        os.unlink(path)
+        return None
+    metrics.observe_subprocess(args, started, "ok")
+
+    # Unlinked while open, so the plaintext scrollback leaves /tmp even if the response is never read.
+    try:
+        f = open(path, "rb")
+    finally:
+        os.unlink(path)
+    return _iter_history_file(f, compress)
@@ -3,7 +3,9 @@ from __future__ import annotations
 import os
 import secrets
 from dataclasses import dataclass
-from typing import Set
+from typing import Dict, Set, Tuple
+
+from .admission import parse_limits
 
 
 DEFAULT_ACTIONS = {
@@ -26,12 +28,32 @@ class AppConfig:
     auth_password: str
     auth_secret: str
     auth_token_ttl_sec: int
+    auth_token_cache_size: int
     auth_require_secret_in_prod: bool
     debug: bool
     cors_origins: Set[str]
     login_attempt_limit: int
     login_window_sec: int
     login_lock_sec: int
+    login_throttle_store: str
+    login_throttle_path: str
+    login_throttle_max_entries: int
+    recorder_dir: str
+    recorder_segment_bytes: int
+    recorder_max_segments: int
+    history_dir: str
+    history_retention_days: int
+    metrics_token: str
+    poll_min_ms: int
+    poll_max_ms: int
+    network_collector: str
+    admission_limits: Dict[str, Tuple[int, int]]
+    profile_sample_every: int
+    profile_keep: int
+    archive_dir: str
+    archive_interval_sec: int
+    archive_max_segments: int
+    socket_path: str
 
 
 def _backend_root() -> str:
@@ -45,6 +67,13 @@ def _parse_bool(value: str, default: bool = False) -> bool:
     return raw in {"1", "true", "yes", "on"}
 
 
+def _parse_int(value: str, default: int) -> int:
+    try:
+        return int(value.strip())
+    except ValueError:
+        return default
+
+
 def _load_env_file() -> None:
     env_file = os.getenv("DASHBOARD_ENV_FILE", "").strip()
     if not env_file:
@@ -96,6 +125,8 @@ def load_config() -> AppConfig:
     except ValueError:
         ttl = 86400
 
+    token_cache_size = _parse_int(os.getenv("DASHBOARD_AUTH_TOKEN_CACHE_SIZE", ""), 1024)
+
     debug = _parse_bool(os.getenv("DASHBOARD_DEBUG", ""), default=False)
     cors_raw = os.getenv("DASHBOARD_CORS_ORIGINS", "").strip()
     if cors_raw:
@@ -117,6 +148,31 @@ def load_config() -> AppConfig:
         login_lock_sec = int(login_lock_sec_raw)
     except ValueError:
         login_lock_sec = 900
+    login_throttle_store = os.getenv("DASHBOARD_LOGIN_THROTTLE_STORE", "memory").strip().lower()
+    if login_throttle_store not in {"memory", "sqlite"}:
+        raise ValueError("DASHBOARD_LOGIN_THROTTLE_STORE must be 'memory' or 'sqlite'")
+    login_throttle_path = os.getenv("DASHBOARD_LOGIN_THROTTLE_PATH", "").strip() or os.path.join(
+        _backend_root(), ".login-throttle.sqlite3"
+    )
+    login_throttle_max_entries = _parse_int(os.getenv("DASHBOARD_LOGIN_THROTTLE_MAX_ENTRIES", ""), 10000)
+    recorder_dir = os.getenv("DASHBOARD_RECORDER_DIR", "").strip()
+    recorder_segment_bytes = _parse_int(os.getenv("DASHBOARD_RECORDER_SEGMENT_BYTES", ""), 8 * 1024 * 1024)
+    recorder_max_segments = _parse_int(os.getenv("DASHBOARD_RECORDER_MAX_SEGMENTS", ""), 16)
+    history_dir = os.getenv("DASHBOARD_HISTORY_DIR", "").strip()
+    history_retention_days = _parse_int(os.getenv("DASHBOARD_HISTORY_RETENTION_DAYS", ""), 7)
+    metrics_token = os.getenv("DASHBOARD_METRICS_TOKEN", "").strip()
+    poll_min_ms = max(_parse_int(os.getenv("DASHBOARD_POLL_MIN_MS", ""), 1000), 250)
+    poll_max_ms = _parse_int(os.getenv("DASHBOARD_POLL_MAX_MS", ""), 15000)
+    network_collector = os.getenv("DASHBOARD_NETWORK_COLLECTOR", "auto").strip().lower() or "auto"
+    if network_collector not in {"auto", "proc", "lsof"}:
+        raise ValueError("DASHBOARD_NETWORK_COLLECTOR must be 'auto', 'proc' or 'lsof'")
+    admission_limits = parse_limits(os.getenv("DASHBOARD_ADMISSION_LIMITS", ""))
+    profile_sample_every = _parse_int(os.getenv("DASHBOARD_PROFILE_SAMPLE_EVERY", ""), 100)
+    profile_keep = _parse_int(os.getenv("DASHBOARD_PROFILE_KEEP", ""), 20)
+    archive_dir = os.getenv("DASHBOARD_ARCHIVE_DIR", "").strip()
+    archive_interval_sec = _parse_int(os.getenv("DASHBOARD_ARCHIVE_INTERVAL_SEC", ""), 10)
+    archive_max_segments = _parse_int(os.getenv("DASHBOARD_ARCHIVE_MAX_SEGMENTS", ""), 16)
+    socket_path = os.getenv("DASHBOARD_SOCKET_PATH", "").strip()
 
     return AppConfig(
         allowed_actions=allowed,
@@ -124,10 +180,30 @@ def load_config() -> AppConfig:
         auth_password=auth_password,
         auth_secret=auth_secret,
         auth_token_ttl_sec=max(ttl, 60),
+        auth_token_cache_size=max(token_cache_size, 0),
         auth_require_secret_in_prod=auth_require_secret_in_prod,
         debug=debug,
         cors_origins=cors_origins,
         login_attempt_limit=max(login_attempt_limit, 1),
         login_window_sec=max(login_window_sec, 60),
         login_lock_sec=max(login_lock_sec, 60),
+        login_throttle_store=login_throttle_store,
+        login_throttle_path=os.path.abspath(login_throttle_path),
+        login_throttle_max_entries=max(login_throttle_max_entries, 100),
+        recorder_dir=os.path.abspath(recorder_dir) if recorder_dir else "",
+        recorder_segment_bytes=max(recorder_segment_bytes, 64 * 1024),
+        recorder_max_segments=max(recorder_max_segments, 1),
+        history_dir=os.path.abspath(history_dir) if history_dir else "",
+        history_retention_days=max(history_retention_days, 1),
+        metrics_token=metrics_token,
+        poll_min_ms=poll_min_ms,
+        poll_max_ms=max(poll_max_ms, poll_min_ms),
+        network_collector=network_collector,
+        admission_limits=admission_limits,
+        profile_sample_every=max(profile_sample_every, 0),
+        profile_keep=max(profile_keep, 0),
+        archive_dir=os.path.abspath(archive_dir) if archive_dir else "",
+        archive_interval_sec=max(archive_interval_sec, 1),
+        archive_max_segments=max(archive_max_segments, 2),
+        socket_path=os.path.abspath(socket_path) if socket_path else "",
     )
@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from array import array
+from collections import deque
+from typing import Any, Deque, Dict, List, Tuple
+
+HISTORY_CAPACITY = 720
+HISTORY_MAX_SERIES = 512
+HISTORY_MIN_INTERVAL_SEC = 5.0
+HISTORY_ROLLUP_SEC = 60
+HISTORY_EVENT_CAPACITY = 512
+
+
+def _to_float(value: object) -> float:
+    try:
+        return float(str(value).strip())
+    except ValueError:
+        return 0.0
+
+
+def _event_fields(item: Dict[str, Any]) -> Dict[str, str]:
+    return {key: str(item.get(key, "")) for key in ("pid", "command", "address") if key in item}
+
+
+class _Ring:
+    __slots__ = ("times", "values", "start", "size", "last_ts")
+
+    def __init__(self, capacity: int) -> None:
+        # Preallocated double arrays keep each series at a fixed 16 bytes per slot.
+        self.times = array("d", bytes(8 * capacity))
+        self.values = array("d", bytes(8 * capacity))
+        self.start = 0
+        self.size = 0
+        self.last_ts = 0.0
+
+    def append(self, ts: float, value: float) -> None:
+        capacity = len(self.times)
+        idx = (self.start + self.size) % capacity
+        self.times[idx] = ts
+        self.values[idx] = value
+        if self.size < capacity:
+            self.size += 1
+        else:
+            self.start = (self.start + 1) % capacity
+        self.last_ts = ts
+
+    def since(self, ts: float) -> List[Tuple[float, float]]:
+        capacity = len(self.times)
+        points: List[Tuple[float, float]] = []
+        for offset in range(self.size):
+            idx = (self.start + offset) % capacity
+            if self.times[idx] >= ts:
+                points.append((self.times[idx], self.values[idx]))
+        return points
+
+
+def _samples(tmux_state: Dict[str, Any], network_state: Dict[str, Any]) -> Dict[str, float]:
+    samples: Dict[str, float] = {}
+    sessions = tmux_state.get("sessions", []) or []
+    pane_count = 0
+    for session in sessions:
+        for window in session.get("windows", []):
+            for pane in window.get("panes", []):
+                pane_count += 1
+                # Prefer whole-process-tree totals so a busy child shows up on its pane.
+                usage = pane.get("resources") or pane.get("process") or {}
+                pane_id = pane.get("id", "")
+                samples[f"pane.{pane_id}.cpu_percent"] = _to_float(usage.get("cpu_percent", 0))
+                samples[f"pane.{pane_id}.rss_kb"] = _to_float(usage.get("rss_kb", 0))
+    samples["tmux.sessions"] = float(len(sessions))
+    samples["tmux.panes"] = float(pane_count)
+    samples["network.listening"] = float(len(network_state.get("listening_servers", [])))
+    samples["network.ssh_tunnels"] = float(len(network_state.get("ssh_tunnels", [])))
+    return samples
+
+
+class MetricsHistory:
+    def __init__(
+        self,
+        directory: str = "",
+        retention_days: int = 7,
+        capacity: int = HISTORY_CAPACITY,
+        max_series: int = HISTORY_MAX_SERIES,
+        min_interval_sec: float = HISTORY_MIN_INTERVAL_SEC,
+    ) -> None:
+        self._directory = directory
+        self._retention_days = retention_days
+        self._capacity = capacity
+        self._max_series = max_series
+        self._min_interval_sec = min_interval_sec
+        self._lock = threading.Lock()
+        self._series: Dict[str, _Ring] = {}
+        self._events: Deque[Dict[str, Any]] = deque(maxlen=HISTORY_EVENT_CAPACITY)
+        self._last_sample_ts = 0.0
+        self._ports: Dict[str, Dict[str, str]] | None = None
+        self._tunnels: Dict[str, Dict[str, str]] | None = None
+        self._rollup_start: float | None = None
+        self._rollup: Dict[str, List[float]] = {}
+        self._rollup_events: List[Dict[str, Any]] = []
+
+    def _ring(self, name: str) -> _Ring:
+        ring = self._series.get(name)
+        if ring is not None:
+            return ring
+        if len(self._series) >= self._max_series:
+            # Drop the series that went quiet first (usually panes that no longer exist).
+            oldest = min(self._series, key=lambda key: self._series[key].last_ts)
+            del self._series[oldest]
+        ring = _Ring(self._capacity)
+        self._series[name] = ring
+        return ring
+
+    def _diff_events(self, now_ts: float, network_state: Dict[str, Any]) -> List[Dict[str, Any]]:
+        ports = {
+            f"{item.get('address', '')}/{item.get('pid', '')}": item for item in network_state.get("listening_servers", [])
+        }
+        tunnels = {str(item.get("pid", "")): item for item in network_state.get("ssh_tunnels", [])}
+        events: List[Dict[str, Any]] = []
+        if self._ports is not None:
+            for key in ports.keys() - self._ports.keys():
+                events.append({"ts": now_ts, "kind": "port_opened", **_event_fields(ports[key])})
+            for key in self._ports.keys() - ports.keys():
+                events.append({"ts": now_ts, "kind": "port_closed", **_event_fields(self._ports[key])})
+        if self._tunnels is not None:
+            for key in tunnels.keys() - self._tunnels.keys():
+                events.append({"ts": now_ts, "kind": "tunnel_up", **_event_fields(tunnels[key])})
+            for key in self._tunnels.keys() - tunnels.keys():
+                events.append({"ts": now_ts, "kind": "tunnel_down", **_event_fields(self._tunnels[key])})
+        self._ports = ports
+        self._tunnels = tunnels
+        return events
+
+    def record(self, tmux_state: Dict[str, Any], network_state: Dict[str, Any], now_ts: float | None = None) -> bool:
+        now_ts = time.time() if now_ts is None else now_ts
+        with self._lock:
+            # Several tabs poll the snapshot; one sample per interval is enough.
+            if now_ts - self._last_sample_ts < self._min_interval_sec:
+                return False
+            self._last_sample_ts = now_ts
+
+            samples = _samples(tmux_state, network_state)
+            for name, value in samples.items():
+                self._ring(name).append(now_ts, value)
+            events = self._diff_events(now_ts, network_state)
+            self._events.extend(events)
+            if self._directory:
+                self._accumulate_rollup(now_ts, samples, events)
+        return True
+
+    def _accumulate_rollup(self, now_ts: float, samples: Dict[str, float], events: List[Dict[str, Any]]) -> None:
+        bucket = now_ts - now_ts % HISTORY_ROLLUP_SEC
+        if self._rollup_start is not None and bucket != self._rollup_start:
+            self._flush_rollup()
+        self._rollup_start = bucket
+        for name, value in samples.items():
+            acc = self._rollup.setdefault(name, [0.0, 0.0, value])
+            acc[0] += 1
+            acc[1] += value
+            acc[2] = max(acc[2], value)
+        self._rollup_events.extend(events)
+
+    def _flush_rollup(self) -> None:
+        if self._rollup_start is None or (not self._rollup and not self._rollup_events):
+            return
+        record = {
+            "ts": self._rollup_start,
+            "series": {name: [round(acc[1] / acc[0], 3), acc[2]] for name, acc in self._rollup.items()},
+            "events": self._rollup_events,
+        }
+        os.makedirs(self._directory, mode=0o700, exist_ok=True)
+        day = time.strftime("%Y%m%d", time.gmtime(self._rollup_start))
+        with open(os.path.join(self._directory, f"rollup-{day}.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._rollup = {}
+        self._rollup_events = []
+        self._prune_rollups()
+
+    def _prune_rollups(self) -> None:
+        cutoff = time.strftime("%Y%m%d", time.gmtime(self._rollup_start - self._retention_days * 86400))
+        for name in os.listdir(self._directory):
+            if name.startswith("rollup-") and name.endswith(".jsonl") and name[7:15] < cutoff:
+                os.unlink(os.path.join(self._directory, name))
+
+    def _read_rollups(self, since_ts: float, prefix: str) -> Dict[str, Any]:
+        series: Dict[str, List[List[float]]] = {}
+        events: List[Dict[str, Any]] = []
+        if not self._directory or not os.path.isdir(self._directory):
+            return {"series": series, "events": events}
+        first_day = time.strftime("%Y%m%d", time.gmtime(since_ts))
+        for name in sorted(os.listdir(self._directory)):
+            if not (name.startswith("rollup-") and name.endswith(".jsonl")) or name[7:15] < first_day:
+                continue
+            with open(os.path.join(self._directory, name), encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if record.get("ts", 0) < since_ts:
+                        continue
+                    for key, (avg, peak) in record.get("series", {}).items():
+                        if key.startswith(prefix):
+                            series.setdefault(key, []).append([record["ts"], avg, peak])
+                    events.extend(record.get("events", []))
+        return {"series": series, "events": events}
+
+    def query(self, window_sec: float, prefix: str = "", now_ts: float | None = None) -> Dict[str, Any]:
+        now_ts = time.time() if now_ts is None else now_ts
+        since_ts = now_ts - window_sec
+        with self._lock:
+            oldest = min((ring.times[ring.start] for ring in self._series.values() if ring.size), default=now_ts)
+            # Windows older than what the ring buffers hold are answered from the 1-minute rollups.
+            if since_ts < oldest - self._min_interval_sec and self._directory:
+                return {"resolution": "1m", "since": since_ts, **self._read_rollups(since_ts, prefix)}
+            series = {
+                name: [[ts, value] for ts, value in ring.since(since_ts)]
+                for name, ring in self._series.items()
+                if name.startswith(prefix)
+            }
+            events = [event for event in self._events if event["ts"] >= since_ts]
+        return {"resolution": "raw", "since": since_ts, "series": series, "events": events}
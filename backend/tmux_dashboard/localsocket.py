@@ -0,0 +1,358 @@
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Set
+
+from . import metrics
+from .polling import snapshot_signature
+
+# Lines a consumer may fall behind before it is disconnected rather than buffered without bound.
+CLIENT_QUEUE_LINES = 64
+SEND_TIMEOUT_SEC = 5.0
+REQUEST_MAX_BYTES = 4096
+PANE_LINES = 200
+
+logger = logging.getLogger(__name__)
+_servers: Dict[str, "LocalSubscriptionServer"] = {}
+_servers_lock = threading.Lock()
+
+
+def _line(message: Dict[str, Any]) -> bytes:
+    return (json.dumps(message, separators=(",", ":"), default=str) + "\n").encode("utf-8")
+
+
+class _Client:
+    __slots__ = ("writer", "queue", "snapshot", "primed", "panes", "unprimed_panes")
+
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self.writer = writer
+        self.queue: asyncio.Queue[bytes] = asyncio.Queue(CLIENT_QUEUE_LINES)
+        self.snapshot = False
+        # Whether this subscriber has received any snapshot yet.
+        self.primed = False
+        self.panes: Set[str] = set()
+        # Subscribed panes whose current output this subscriber has not received yet.
+        self.unprimed_panes: Set[str] = set()
+
+
+class LocalSubscriptionServer:
+    # NDJSON over a 0600 Unix socket for local scripts and status bars. Access is whatever the
+    # filesystem allows, so there is no token. One poll loop serves every subscriber through the
+    # same single-flight collections as HTTP, and each update is encoded once for all of them.
+    def __init__(
+        self,
+        path: str,
+        *,
+        collect_tmux_state_fn: Callable[[], Dict[str, Any]],
+        collect_network_state_fn: Callable[[], Dict[str, Any]],
+        collect_pane_batch_fn: Callable[[List[Dict[str, Any]]], Dict[str, Any]],
+        interval_sec: float,
+        refresh_sec: float,
+    ) -> None:
+        self._path = path
+        self._collect_tmux_state = collect_tmux_state_fn
+        self._collect_network_state = collect_network_state_fn
+        self._collect_pane_batch = collect_pane_batch_fn
+        self._interval_sec = interval_sec
+        self._refresh_sec = refresh_sec
+        self._clients: Set[_Client] = set()
+        self._handlers: Set[asyncio.Task] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._stop: asyncio.Event | None = None
+        self._wake: asyncio.Event | None = None
+        self._thread: threading.Thread | None = None
+        self._serving = threading.Event()
+        self._snapshot_subscribers = 0
+        self._snapshot_line = b""
+        self._snapshot_signature = ""
+        self._collected_at = 0.0
+        self._line_at = 0.0
+        self._sent_at = 0.0
+        self._fingerprints: Dict[str, str] = {}
+        self._output_digests: Dict[str, str] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._path)
+
+    @property
+    def serving(self) -> bool:
+        return self._serving.is_set()
+
+    def bind(
+        self,
+        *,
+        collect_tmux_state_fn: Callable[[], Dict[str, Any]],
+        collect_network_state_fn: Callable[[], Dict[str, Any]],
+        collect_pane_batch_fn: Callable[[List[Dict[str, Any]]], Dict[str, Any]],
+    ) -> None:
+        # The poll loop reads these on every round, so a rebind takes effect on the next one.
+        self._collect_tmux_state = collect_tmux_state_fn
+        self._collect_network_state = collect_network_state_fn
+        self._collect_pane_batch = collect_pane_batch_fn
+
+    def start(self) -> None:
+        if not self.enabled or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._thread = threading.Thread(target=self._run, name="local-socket", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        loop, stop = self._loop, self._stop
+        # A standby worker is parked on the lock and has nothing to shut down.
+        if loop is None or stop is None:
+            return
+        loop.call_soon_threadsafe(stop.set)
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def wait_serving(self, timeout: float) -> bool:
+        return self._serving.wait(timeout)
+
+    def _run(self) -> None:
+        # Every gunicorn worker starts this thread; the one holding the lock serves and the others
+        # wait on it, so a replacement worker takes over when the serving one exits.
+        with open(f"{self._path}.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                asyncio.run(self._serve())
+            finally:
+                self._serving.clear()
+                self._loop = None
+
+    async def _serve(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        self._wake = asyncio.Event()
+        # Bound under a private name and chmod'ed before the rename, so the public path never
+        # exists with looser permissions.
+        staging = f"{self._path}.{os.getpid()}"
+        if os.path.exists(staging):
+            os.unlink(staging)
+        server = await asyncio.start_unix_server(self._handle, path=staging, limit=REQUEST_MAX_BYTES)
+        os.chmod(staging, 0o600)
+        os.replace(staging, self._path)
+        self._serving.set()
+        try:
+            async with server:
+                try:
+                    await self._poll_loop()
+                finally:
+                    await self._disconnect_all()
+        finally:
+            if os.path.exists(self._path):
+                os.unlink(self._path)
+
+    async def _disconnect_all(self) -> None:
+        # Closing the transports ends each handler's readline, so they finish instead of being cancelled.
+        handlers = list(self._handlers)
+        for client in list(self._clients):
+            client.writer.close()
+        if handlers:
+            await asyncio.wait(handlers, timeout=SEND_TIMEOUT_SEC)
+
+    def publish_snapshot(self, tmux_state: Dict[str, Any], network_state: Dict[str, Any]) -> None:
+        # Called by the HTTP snapshot route so its collection also reaches local subscribers.
+        loop = self._loop
+        if loop is not None and self._serving.is_set() and self._snapshot_subscribers:
+            loop.call_soon_threadsafe(self._fan_out_snapshot, tmux_state, network_state)
+
+    def _fan_out_snapshot(self, tmux_state: Dict[str, Any], network_state: Dict[str, Any]) -> None:
+        now = time.monotonic()
+        self._collected_at = now
+        signature = snapshot_signature(tmux_state, network_state)
+        # CPU and RSS drift on every poll; an unchanged layout is resent only every refresh_sec.
+        changed = signature != self._snapshot_signature or now - self._sent_at >= self._refresh_sec
+        targets = [client for client in self._clients if client.snapshot and (changed or not client.primed)]
+        if not targets:
+            return
+        self._snapshot_line = _line({"type": "snapshot", "ts": time.time(), "tmux": tmux_state, "network": network_state})
+        self._line_at = now
+        if changed:
+            self._snapshot_signature = signature
+            self._sent_at = now
+        for client in targets:
+            client.primed = True
+            self._enqueue(client, self._snapshot_line)
+
+    def _enqueue(self, client: _Client, line: bytes) -> None:
+        try:
+            client.queue.put_nowait(line)
+        except asyncio.QueueFull:
+            metrics.LOCAL_SOCKET_DROPS.inc()
+            client.writer.close()
+            self._forget(client)
+
+    def _forget(self, client: _Client) -> None:
+        if client in self._clients:
+            self._clients.discard(client)
+            self._count_subscribers()
+
+    def _count_subscribers(self) -> None:
+        # Read by publish_snapshot on HTTP threads, which must not iterate the client set.
+        self._snapshot_subscribers = sum(1 for client in self._clients if client.snapshot)
+
+    async def _poll_loop(self) -> None:
+        assert self._stop is not None and self._wake is not None
+        while not self._stop.is_set():
+            self._wake.clear()
+            wants_snapshot = any(client.snapshot for client in self._clients)
+            panes = sorted({pane_id for client in self._clients for pane_id in client.panes})
+            try:
+                if wants_snapshot and time.monotonic() - self._collected_at >= self._interval_sec:
+                    tmux_state, network_state = await asyncio.gather(
+                        asyncio.to_thread(self._collect_tmux_state), asyncio.to_thread(self._collect_network_state)
+                    )
+                    self._fan_out_snapshot(tmux_state, network_state)
+                if panes:
+                    await self._poll_panes(panes)
+            except Exception:
+                # A failed collection skips one round; the socket and its subscribers stay up.
+                metrics.LOCAL_SOCKET_POLL_FAILURES.inc()
+                logger.exception("local socket poll failed")
+            waits = [asyncio.ensure_future(self._stop.wait()), asyncio.ensure_future(self._wake.wait())]
+            await asyncio.wait(waits, timeout=self._interval_sec, return_when=asyncio.FIRST_COMPLETED)
+            for waiter in waits:
+                waiter.cancel()
+
+    async def _poll_panes(self, panes: List[str]) -> None:
+        for pane_id in self._fingerprints.keys() - set(panes):
+            del self._fingerprints[pane_id]
+        for pane_id in self._output_digests.keys() - set(panes):
+            del self._output_digests[pane_id]
+        # A new subscriber needs the current output, not just the next change, so its panes are captured.
+        unprimed = {pane_id for client in self._clients for pane_id in client.unprimed_panes}
+        targets = [
+            {"id": pane_id, "since": "" if pane_id in unprimed else self._fingerprints.get(pane_id, ""), "lines": PANE_LINES}
+            for pane_id in panes
+        ]
+        # One list-panes, one ps and one chained capture for every subscribed pane.
+        batch = await asyncio.to_thread(self._collect_pane_batch, targets)
+        lines: Dict[str, bytes] = {}
+        changed: Set[str] = set()
+        for detail in batch.get("panes", []):
+            pane_id = detail["pane"]["id"]
+            self._fingerprints[pane_id] = str(detail.get("capture_token", ""))
+            if detail.get("unchanged"):
+                continue
+            lines[pane_id] = _line({"type": "pane", "ts": time.time(), "pane_id": pane_id, **detail})
+            # The capture age limit re-captures idle panes; identical output is not streamed again.
+            digest = hashlib.sha256(str(detail.get("output", "")).encode("utf-8")).hexdigest()
+            if digest != self._output_digests.get(pane_id):
+                self._output_digests[pane_id] = digest
+                changed.add(pane_id)
+        missing = set(batch.get("missing", []))
+        for pane_id in missing:
+            self._fingerprints.pop(pane_id, None)
+            self._output_digests.pop(pane_id, None)
+            lines[pane_id] = _line({"type": "pane_closed", "pane_id": pane_id})
+        changed |= missing
+        for client in list(self._clients):
+            for pane_id in client.panes & lines.keys():
+                if pane_id in changed or pane_id in client.unprimed_panes:
+                    client.unprimed_panes.discard(pane_id)
+                    self._enqueue(client, lines[pane_id])
+            client.panes -= missing
+            client.unprimed_panes -= missing
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        client = _Client(writer)
+        self._clients.add(client)
+        handler = asyncio.current_task()
+        if handler is not None:
+            self._handlers.add(handler)
+        sender = asyncio.ensure_future(self._send(client))
+        try:
+            while True:
+                try:
+                    raw = await reader.readline()
+                except (ValueError, ConnectionError):
+                    break
+                if not raw:
+                    break
+                if raw.strip():
+                    self._request(client, raw)
+        finally:
+            self._forget(client)
+            self._handlers.discard(handler)
+            sender.cancel()
+            writer.close()
+
+    def _request(self, client: _Client, raw: bytes) -> None:
+        try:
+            request = json.loads(raw)
+        except ValueError:
+            request = None
+        if not isinstance(request, dict):
+            self._enqueue(client, _line({"type": "error", "error": "request must be a JSON object"}))
+            return
+        subscribe = request.get("subscribe")
+        unsubscribe = request.get("unsubscribe")
+        topic = subscribe or unsubscribe
+        pane_id = str(request.get("pane_id", "")).strip()
+        if topic not in {"snapshot", "pane"} or (topic == "pane" and not pane_id):
+            self._enqueue(client, _line({"type": "error", "error": "expected subscribe or unsubscribe: snapshot | pane"}))
+            return
+        if topic == "snapshot":
+            client.snapshot = bool(subscribe)
+            client.primed = False
+            self._count_subscribers()
+            # A collection from this interval is still current; otherwise the woken loop collects.
+            if subscribe and self._snapshot_line and time.monotonic() - self._line_at < self._interval_sec:
+                client.primed = True
+                self._enqueue(client, self._snapshot_line)
+        elif subscribe:
+            client.panes.add(pane_id)
+            client.unprimed_panes.add(pane_id)
+        else:
+            client.panes.discard(pane_id)
+            client.unprimed_panes.discard(pane_id)
+        if subscribe and self._wake is not None:
+            self._wake.set()
+
+    async def _send(self, client: _Client) -> None:
+        try:
+            while True:
+                client.writer.write(await client.queue.get())
+                await asyncio.wait_for(client.writer.drain(), SEND_TIMEOUT_SEC)
+        except (asyncio.TimeoutError, ConnectionError):
+            metrics.LOCAL_SOCKET_DROPS.inc()
+            self._forget(client)
+            client.writer.close()
+
+
+def local_subscription_server(
+    path: str,
+    *,
+    collect_tmux_state_fn: Callable[[], Dict[str, Any]],
+    collect_network_state_fn: Callable[[], Dict[str, Any]],
+    collect_pane_batch_fn: Callable[[List[Dict[str, Any]]], Dict[str, Any]],
+    interval_sec: float,
+    refresh_sec: float,
+) -> LocalSubscriptionServer:
+    # create_app() runs more than once per process (the module-level app on import, then the
+    # gunicorn or run.py factory call). Every app shares one server per path, fed by the
+    # collections of the app created last, so the app that serves HTTP is the one publishing.
+    collectors = {
+        "collect_tmux_state_fn": collect_tmux_state_fn,
+        "collect_network_state_fn": collect_network_state_fn,
+        "collect_pane_batch_fn": collect_pane_batch_fn,
+    }
+    if not path:
+        return LocalSubscriptionServer(path, interval_sec=interval_sec, refresh_sec=refresh_sec, **collectors)
+    with _servers_lock:
+        server = _servers.get(path)
+        if server is None:
+            server = LocalSubscriptionServer(path, interval_sec=interval_sec, refresh_sec=refresh_sec, **collectors)
+            _servers[path] = server
+        else:
+            server.bind(**collectors)
+    server.start()
+    return server
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from typing import Dict, List, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        with self._lock:
+            return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # labels -> [per-bucket counts (non-cumulative, last slot is +Inf), sum]
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = ([0] * (len(self.buckets) + 1), [0.0])
+                self._values[labels] = entry
+            entry[0][idx] += 1
+            entry[1][0] += value
+
+    def count(self, *labels: str) -> int:
+        with self._lock:
+            entry = self._values.get(labels)
+            return sum(entry[0]) if entry else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, (list(counts), total[0])) for labels, (counts, total) in self._values.items())
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: List[Counter | Histogram] = []
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help_text, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        metric = Histogram(name, help_text, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+SUBPROCESS_SECONDS = REGISTRY.histogram(
+    "tmux_dashboard_subprocess_duration_seconds", "Wall time of collector and action subprocesses.", ("command",)
+)
+SUBPROCESS_TIMEOUTS = REGISTRY.counter(
+    "tmux_dashboard_subprocess_timeouts_total", "Subprocesses killed by their timeout.", ("command",)
+)
+SUBPROCESS_FAILURES = REGISTRY.counter(
+    "tmux_dashboard_subprocess_failures_total", "Subprocesses that exited non-zero.", ("command",)
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "tmux_dashboard_http_request_duration_seconds", "HTTP handler latency.", ("route", "method", "status")
+)
+HTTP_RESPONSE_BYTES = REGISTRY.histogram(
+    "tmux_dashboard_http_response_bytes", "Size of buffered HTTP responses.", ("route",), SIZE_BUCKETS
+)
+BREAKER_TRIPS = REGISTRY.counter(
+    "tmux_dashboard_breaker_trips_total", "Circuit breakers opened after consecutive timeouts.", ("command",)
+)
+BREAKER_SHORT_CIRCUITS = REGISTRY.counter(
+    "tmux_dashboard_breaker_short_circuits_total", "Calls answered without spawning while a breaker was open.", ("command",)
+)
+ADMISSION_REJECTIONS = REGISTRY.counter(
+    "tmux_dashboard_admission_rejections_total", "Requests shed with 503 by admission control.", ("class",)
+)
+LOCAL_SOCKET_DROPS = REGISTRY.counter(
+    "tmux_dashboard_local_socket_drops_total", "Local socket subscribers disconnected for falling behind."
+)
+LOCAL_SOCKET_POLL_FAILURES = REGISTRY.counter(
+    "tmux_dashboard_local_socket_poll_failures_total", "Local socket poll rounds skipped because a collection raised."
+)
+CACHE_LOOKUPS = REGISTRY.counter(
+    "tmux_dashboard_cache_lookups_total", "Cache and coalescing lookups by outcome.", ("cache", "result")
+)
+
+
+def command_label(args: Sequence[str]) -> str:
+    if not args:
+        return ""
+    # tmux is labelled by its sub-command; every other binary by name only, keeping cardinality fixed.
+    if args[0] == "tmux" and len(args) > 1:
+        return f"tmux {args[1]}"
+    return args[0]
+
+
+def observe_subprocess(args: Sequence[str], started: float, outcome: str) -> None:
+    label = command_label(args)
+    SUBPROCESS_SECONDS.observe(time.perf_counter() - started, label)
+    if outcome == "timeout":
+        SUBPROCESS_TIMEOUTS.inc(label)
+    elif outcome == "error":
+        SUBPROCESS_FAILURES.inc(label)
+
+
+def count_cache(cache: str, hit: bool, amount: int = 1) -> None:
+    if amount:
+        CACHE_LOOKUPS.inc(cache, "hit" if hit else "miss", amount=amount)
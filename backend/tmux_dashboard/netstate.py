@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import os
+import pwd
+import shutil
+import socket
+import sys
+import threading
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Set, Tuple
+
+from . import breaker, collectors, profiling, sshargs
+
+SOCKET_TABLES = (("net/tcp", socket.AF_INET), ("net/tcp6", socket.AF_INET6))
+TCP_LISTEN = "0A"
+NETWORK_EVENT_LOG = 256
+
+NetworkState = Dict[str, Any]
+
+
+def proc_supported(proc_root: str = "/proc") -> bool:
+    return os.path.exists(os.path.join(proc_root, "net", "tcp"))
+
+
+def decode_address(raw: str, family: int) -> str:
+    # /proc/net/tcp prints each 32-bit word of the address in host byte order.
+    host_hex, _, port_hex = raw.partition(":")
+    packed = bytes.fromhex(host_hex)
+    if sys.byteorder == "little":
+        packed = b"".join(packed[index : index + 4][::-1] for index in range(0, len(packed), 4))
+    port = int(port_hex, 16)
+    if not any(packed):
+        return f"*:{port}"
+    host = socket.inet_ntop(family, packed)
+    return f"[{host}]:{port}" if family == socket.AF_INET6 else f"{host}:{port}"
+
+
+class _Process:
+    __slots__ = ("ppid", "user", "comm", "command", "ssh", "forwards")
+
+    def __init__(self, ppid: str, user: str, comm: str, argv: List[str]) -> None:
+        self.ppid = ppid
+        self.user = user
+        self.comm = comm
+        command = " ".join(argv) if argv else f"[{comm}]"
+        self.command = collectors._mask_sensitive_text(command)
+        self.ssh = "ssh" in command
+        # Parsed once per process lifetime; a running ssh cannot change its forwards.
+        self.forwards = sshargs.parse_forwards(argv)
+
+
+class _Listener:
+    __slots__ = ("address", "port", "holders")
+
+    def __init__(self, address: str) -> None:
+        self.address = address
+        self.port = collectors._address_port(address)
+        self.holders: List[str] = []
+
+
+class ProcNetworkCollector:
+    # Linux replacement for lsof + ps: the socket tables are re-read every poll, but /proc/<pid>
+    # is only read for pids not seen before and fd tables are only scanned for unknown inodes.
+    def __init__(self, proc_root: str = "/proc") -> None:
+        self._root = proc_root
+        self._lock = threading.Lock()
+        self._processes: Dict[str, _Process] = {}
+        self._listeners: Dict[str, _Listener] = {}
+        self._ssh_pids: Set[str] = set()
+        self._users: Dict[int, str] = {}
+
+    def _path(self, *parts: str) -> str:
+        return os.path.join(self._root, *parts)
+
+    def _read_listening(self) -> Dict[str, Tuple[str, int]]:
+        sockets: Dict[str, Tuple[str, int]] = {}
+        for table, family in SOCKET_TABLES:
+            try:
+                with open(self._path(table), encoding="ascii", errors="replace") as f:
+                    next(f, None)
+                    for line in f:
+                        parts = line.split(None, 10)
+                        if len(parts) > 9 and parts[3] == TCP_LISTEN and parts[9] != "0":
+                            sockets[parts[9]] = (parts[1], family)
+            except OSError:
+                continue
+        return sockets
+
+    def _read_pids(self) -> Set[str]:
+        try:
+            return {name for name in os.listdir(self._root) if name.isdigit()}
+        except OSError:
+            return set()
+
+    def _user(self, uid: int) -> str:
+        name = self._users.get(uid)
+        if name is None:
+            try:
+                name = pwd.getpwuid(uid).pw_name
+            except KeyError:
+                name = str(uid)
+            self._users[uid] = name
+        return name
+
+    def _read_process(self, pid: str) -> _Process | None:
+        try:
+            with open(self._path(pid, "stat"), encoding="utf-8", errors="replace") as f:
+                stat = f.read()
+            with open(self._path(pid, "cmdline"), "rb") as f:
+                cmdline = f.read()
+            uid = os.stat(self._path(pid)).st_uid
+        except OSError:
+            return None
+        # The command name is parenthesised and may itself contain spaces or parentheses.
+        comm = stat[stat.find("(") + 1 : stat.rfind(")")]
+        fields = stat[stat.rfind(")") + 2 :].split()
+        argv = [part.decode("utf-8", errors="replace") for part in cmdline.split(b"\0") if part]
+        return _Process(fields[1] if len(fields) > 1 else "0", self._user(uid), comm, argv)
+
+    def _scan_holders(self, inodes: Set[str], pids: Iterable[str]) -> None:
+        for pid in pids:
+            fd_dir = self._path(pid, "fd")
+            try:
+                fds = os.listdir(fd_dir)
+            except OSError:
+                continue
+            for fd in fds:
+                try:
+                    link = os.readlink(os.path.join(fd_dir, fd))
+                except OSError:
+                    continue
+                inode = link[8:-1] if link.startswith("socket:[") else ""
+                if inode in inodes and pid not in self._listeners[inode].holders:
+                    self._listeners[inode].holders.append(pid)
+
+    def _refresh(self) -> None:
+        pids = self._read_pids()
+        sockets = self._read_listening()
+
+        # A pid that exits and is reused between two polls keeps the old entry; that window is
+        # one poll interval and the cost of re-reading every process each time is what this avoids.
+        for pid in self._processes.keys() - pids:
+            del self._processes[pid]
+            self._ssh_pids.discard(pid)
+        new_pids = pids - self._processes.keys()
+        for pid in sorted(new_pids, key=int):
+            process = self._read_process(pid)
+            if process is not None:
+                self._processes[pid] = process
+                if process.ssh:
+                    self._ssh_pids.add(pid)
+        new_pids &= self._processes.keys()
+
+        for inode in self._listeners.keys() - sockets.keys():
+            del self._listeners[inode]
+        new_inodes = sockets.keys() - self._listeners.keys()
+        for inode in new_inodes:
+            raw, family = sockets[inode]
+            self._listeners[inode] = _Listener(decode_address(raw, family))
+        for listener in self._listeners.values():
+            listener.holders = [pid for pid in listener.holders if pid in self._processes]
+
+        # New processes are checked against every listening socket (a new worker inheriting a
+        # listener, or a server that just started). Only a socket still unowned after that costs
+        # a walk over every process's fd table, once.
+        if new_pids and self._listeners:
+            self._scan_holders(set(self._listeners), sorted(new_pids, key=int))
+        unowned = {inode for inode in new_inodes if not self._listeners[inode].holders}
+        if unowned:
+            self._scan_holders(unowned, sorted(self._processes.keys() - new_pids, key=int))
+
+    @breaker.reports_stale
+    def collect(self) -> NetworkState:
+        with self._lock, profiling.span("proc scan"):
+            self._refresh()
+            listening = [
+                {
+                    "command": self._processes[pid].comm,
+                    "pid": pid,
+                    "user": self._processes[pid].user,
+                    "address": listener.address,
+                    "port": listener.port,
+                }
+                for listener in self._listeners.values()
+                for pid in listener.holders
+            ]
+            listening.sort(key=lambda item: (int(item["pid"]), item["address"]))
+            ssh_connections: List[Dict[str, Any]] = []
+            ssh_tunnels: List[Dict[str, Any]] = []
+            for pid in sorted(self._ssh_pids, key=int):
+                process = self._processes[pid]
+                ssh_connections.append({"pid": pid, "ppid": process.ppid, "user": process.user, "command": process.command})
+                if process.forwards:
+                    ssh_tunnels.append(
+                        {
+                            "pid": pid,
+                            "user": process.user,
+                            "command": process.command,
+                            "kind": "tunnel",
+                            "forwards": process.forwards,
+                        }
+                    )
+            parents = {pid: process.ppid for pid, process in self._processes.items()}
+
+        records = [*listening, *ssh_connections, *ssh_tunnels]
+        # The snapshot's tmux collection has just listed every pane; only a lone collection lists them again.
+        shared = collectors._recent_reads()
+        if shared is not None:
+            roots = shared[1]
+        else:
+            panes_raw = ""
+            if records and shutil.which("tmux") is not None:
+                panes_raw = collectors._run_command(["tmux", "list-panes", "-a", "-F", collectors.PANE_OWNER_FORMAT])
+            roots = collectors._pane_roots(panes_raw)
+        owners = collectors._pane_owner_index(parents, roots, {str(record["pid"]) for record in records})
+        for record in records:
+            record["pane"] = owners.get(str(record["pid"]))
+        return {"listening_servers": listening, "ssh_connections": ssh_connections, "ssh_tunnels": ssh_tunnels}
+
+
+def _event_fields(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: item[key] for key in ("pid", "command", "address", "port", "forwards", "pane") if key in item}
+
+
+class NetworkTracker:
+    # Change events go into a sequence-numbered log instead of the collection that found them:
+    # a collection is shared by whoever polled at that moment, so each client reads the log from
+    # the last seq it saw. The log and its numbering belong to one worker process.
+    def __init__(self, mode: str = "auto", proc_root: str = "/proc") -> None:
+        use_proc = mode == "proc" or (mode == "auto" and proc_supported(proc_root))
+        self.source = "proc" if use_proc else "lsof"
+        self._proc = ProcNetworkCollector(proc_root) if use_proc else None
+        self._lock = threading.Lock()
+        self._listeners: Dict[str, Dict[str, Any]] | None = None
+        self._ssh: Dict[str, Dict[str, Any]] | None = None
+        self._seq = 0
+        self._log: Deque[Dict[str, Any]] = deque(maxlen=NETWORK_EVENT_LOG)
+
+    def changes(self, state: NetworkState) -> List[Dict[str, Any]]:
+        listeners = {f"{item['address']}/{item['pid']}": item for item in state.get("listening_servers", [])}
+        ssh = {str(item["pid"]): item for item in state.get("ssh_connections", [])}
+        events: List[Dict[str, Any]] = []
+        with self._lock:
+            # The first collection only establishes the baseline.
+            if self._listeners is not None and self._ssh is not None:
+                for kind, current, previous in (("listener", listeners, self._listeners), ("ssh", ssh, self._ssh)):
+                    added = sorted(current.keys() - previous.keys())
+                    removed = sorted(previous.keys() - current.keys())
+                    events += [{"kind": f"{kind}_added", **_event_fields(current[key])} for key in added]
+                    events += [{"kind": f"{kind}_removed", **_event_fields(previous[key])} for key in removed]
+            self._listeners = listeners
+            self._ssh = ssh
+            for event in events:
+                self._seq += 1
+                event["seq"] = self._seq
+                self._log.append(event)
+        return events
+
+    def events_since(self, since: int) -> Dict[str, Any]:
+        with self._lock:
+            # A seq ahead of this log was issued by another worker or an earlier process.
+            if since > self._seq:
+                since = 0
+            events = [event for event in self._log if event["seq"] > since]
+            return {"events": events, "event_seq": self._seq}
+
+    def wrap(self, fallback: Callable[[], NetworkState]) -> Callable[[], NetworkState]:
+        collect = self._proc.collect if self._proc is not None else fallback
+
+        @functools.wraps(fallback)
+        def wrapper() -> NetworkState:
+            state = collect()
+            self.changes(state)
+            return state
+
+        return wrapper
+
+    def wrap_async(self, fallback: Callable[[], Awaitable[NetworkState]]) -> Callable[[], Awaitable[NetworkState]]:
+        proc = self._proc
+
+        @functools.wraps(fallback)
+        async def wrapper() -> NetworkState:
+            state = await asyncio.to_thread(proc.collect) if proc is not None else await fallback()
+            self.changes(state)
+            return state
+
+        return wrapper
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List
+
+CHANGE_GAP_ALPHA = 0.3
+COST_ALPHA = 0.3
+# Poll twice per observed change interval, so a key changing faster than it is polled keeps tightening.
+CHANGE_GAP_SHARE = 0.5
+# A key nobody has polled yet starts at the old fixed 3 second interval.
+INITIAL_CHANGE_GAP_SEC = 6.0
+CLIENT_WINDOW_SEC = 30.0
+# Share of wall time collections may take for all polling clients before intervals stretch.
+LOAD_TARGET = 0.25
+TRACKED_KEYS = 256
+
+
+class _KeyState:
+    __slots__ = ("signature", "changed_at", "change_gap_sec", "cost_sec")
+
+    def __init__(self, signature: str, now: float, cost_sec: float) -> None:
+        self.signature = signature
+        self.changed_at = now
+        self.change_gap_sec = INITIAL_CHANGE_GAP_SEC
+        self.cost_sec = cost_sec
+
+
+class PollAdvisor:
+    def __init__(self, min_ms: int, max_ms: int, *, now: Callable[[], float] = time.monotonic) -> None:
+        self.min_ms = min_ms
+        self.max_ms = max(max_ms, min_ms)
+        self._now = now
+        self._lock = threading.Lock()
+        self._keys: OrderedDict[str, _KeyState] = OrderedDict()
+        self._clients: Dict[str, float] = {}
+
+    def advise(self, key: str, signature: str, client: str, cost_sec: float) -> int:
+        now = self._now()
+        with self._lock:
+            state = self._keys.get(key)
+            if state is None:
+                state = _KeyState(signature, now, cost_sec)
+                self._keys[key] = state
+                while len(self._keys) > TRACKED_KEYS:
+                    self._keys.popitem(last=False)
+            else:
+                # Measured in wall time between transitions: with many viewers only the first poll after
+                # a change sees it, so a per-poll rate would make a busy key look idle.
+                if signature != state.signature:
+                    state.change_gap_sec += CHANGE_GAP_ALPHA * (now - state.changed_at - state.change_gap_sec)
+                    state.changed_at = now
+                    state.signature = signature
+                state.cost_sec += COST_ALPHA * (cost_sec - state.cost_sec)
+            self._keys.move_to_end(key)
+
+            # Only a digest of the credential is kept, enough to count distinct browsers.
+            self._clients[hashlib.sha256(client.encode("utf-8")).hexdigest()[:16]] = now
+            cutoff = now - CLIENT_WINDOW_SEC
+            for stale in [name for name, seen in self._clients.items() if seen < cutoff]:
+                del self._clients[stale]
+            clients = len(self._clients)
+            # A key quiet for longer than its usual gap backs off with the quiet time.
+            change_gap = max(state.change_gap_sec, now - state.changed_at)
+            cost = state.cost_sec
+
+        activity_ms = change_gap * CHANGE_GAP_SHARE * 1000
+        load_ms = clients * cost * 1000 / LOAD_TARGET
+        interval = min(max(activity_ms, load_ms, self.min_ms), self.max_ms)
+        return int(round(interval / 100.0)) * 100
+
+    def client_count(self) -> int:
+        with self._lock:
+            return len(self._clients)
+
+
+def snapshot_signature(tmux_state: Dict[str, Any], network_state: Dict[str, Any]) -> str:
+    # CPU and RSS move on every poll, so only layout, commands and pane output fingerprints count as change.
+    layout: List[Any] = []
+    for session in tmux_state.get("sessions", []):
+        for window in session.get("windows", []):
+            for pane in window.get("panes", []):
+                layout.append(
+                    [
+                        session.get("name"),
+                        window.get("id"),
+                        window.get("name"),
+                        pane.get("id"),
+                        pane.get("current_command"),
+                        pane.get("fingerprint"),
+                    ]
+                )
+    # The change-event feed is per client and only repeats what the network lists already show.
+    network = {key: value for key, value in network_state.items() if key not in {"events", "event_seq"}}
+    payload = json.dumps([tmux_state.get("running"), layout, network], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
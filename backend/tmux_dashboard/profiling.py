@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Tuple
+
+from flask.json.provider import DefaultJSONProvider
+
+PROFILE_HEADER = "X-Dashboard-Profile"
+# Span paths start with the request's route: ("GET /api/snapshot", "tmux_state", "tmux list-panes").
+SpanPath = Tuple[str, ...]
+
+_active: contextvars.ContextVar[Tuple["Trace", SpanPath] | None] = contextvars.ContextVar(
+    "tmux_dashboard_trace", default=None
+)
+_NOOP = contextlib.nullcontext()
+
+
+class Trace:
+    __slots__ = ("root", "forced", "started_at", "started", "elapsed", "status", "_totals", "_lock")
+
+    def __init__(self, root: str, forced: bool) -> None:
+        self.root = root
+        self.forced = forced
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+        self.status = 0
+        # path -> [total seconds, calls]; repeated spans (one per masked command) fold into one entry.
+        self._totals: Dict[SpanPath, List[float]] = {}
+        # Spans may close on a worker thread that copied this request's context.
+        self._lock = threading.Lock()
+
+    def add(self, path: SpanPath, elapsed: float) -> None:
+        with self._lock:
+            entry = self._totals.get(path)
+            if entry is None:
+                self._totals[path] = [elapsed, 1]
+            else:
+                entry[0] += elapsed
+                entry[1] += 1
+
+    def spans(self) -> Dict[SpanPath, List[float]]:
+        with self._lock:
+            return {path: list(entry) for path, entry in self._totals.items()}
+
+    def self_times(self) -> Dict[SpanPath, float]:
+        # Time spent in a span but in none of its children, which is what flame graphs stack.
+        spans = self.spans()
+        own = {path: total for path, (total, _calls) in spans.items()}
+        own[(self.root,)] = self.elapsed
+        for path, (total, _calls) in spans.items():
+            own[path[:-1]] = own.get(path[:-1], 0.0) - total
+        return {path: max(seconds, 0.0) for path, seconds in own.items()}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "route": self.root,
+            "status": self.status,
+            "forced": self.forced,
+            "started_at": self.started_at,
+            "duration_ms": round(self.elapsed * 1000, 3),
+            "spans": [
+                {"stack": ";".join(path[1:]), "ms": round(total * 1000, 3), "calls": int(calls)}
+                for path, (total, calls) in sorted(self.spans().items())
+            ],
+        }
+
+
+class _Span:
+    __slots__ = ("_trace", "_path", "_token", "_started")
+
+    def __init__(self, trace: Trace, path: SpanPath) -> None:
+        self._trace = trace
+        self._path = path
+
+    def __enter__(self) -> None:
+        self._token = _active.set((self._trace, self._path))
+        self._started = time.perf_counter()
+
+    def __exit__(self, *_exc: object) -> None:
+        self._trace.add(self._path, time.perf_counter() - self._started)
+        _active.reset(self._token)
+
+
+def span(name: str) -> contextlib.AbstractContextManager:
+    # Costs one context variable lookup when the current request is not being profiled.
+    current = _active.get()
+    if current is None:
+        return _NOOP
+    trace, path = current
+    return _Span(trace, (*path, name.replace(";", ",")))
+
+
+def folded(traces: Iterable[Trace]) -> str:
+    # Brendan Gregg's folded stack format in microseconds, for flamegraph.pl or speedscope.
+    totals: Dict[SpanPath, float] = {}
+    for trace in traces:
+        for path, seconds in trace.self_times().items():
+            totals[path] = totals.get(path, 0.0) + seconds
+    lines = [f"{';'.join(path)} {round(seconds * 1_000_000)}" for path, seconds in sorted(totals.items())]
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def server_timing(trace: Trace) -> str:
+    entries = [f"total;dur={trace.elapsed * 1000:.2f}"]
+    for index, (path, (total, _calls)) in enumerate(sorted(trace.spans().items())):
+        label = " > ".join(path[1:]).replace("\\", "\\\\").replace('"', '\\"')
+        entries.append(f'span{index};desc="{label}";dur={total * 1000:.2f}')
+    return ", ".join(entries)
+
+
+class Profiler:
+    def __init__(self, sample_every: int, keep: int) -> None:
+        # Every Nth request is traced (0 disables sampling); the slowest `keep` traces are retained.
+        self.sample_every = sample_every
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._count = itertools.count(1)
+        self._order = itertools.count()
+        self._slowest: List[Tuple[float, int, Trace]] = []
+
+    def start(self, root: str, forced: bool = False) -> Trace | None:
+        if not forced and (self.sample_every <= 0 or next(self._count) % self.sample_every):
+            return None
+        trace = Trace(root, forced)
+        _active.set((trace, (root,)))
+        return trace
+
+    def finish(self, trace: Trace, status: int) -> None:
+        trace.elapsed = time.perf_counter() - trace.started
+        trace.status = status
+        _active.set(None)
+        if self.keep <= 0:
+            return
+        entry = (trace.elapsed, next(self._order), trace)
+        with self._lock:
+            if len(self._slowest) < self.keep:
+                heapq.heappush(self._slowest, entry)
+            else:
+                heapq.heappushpop(self._slowest, entry)
+
+    def abandon(self) -> None:
+        # A request that raised never reaches finish(); its thread must not leak the trace.
+        _active.set(None)
+
+    def slowest(self) -> List[Trace]:
+        with self._lock:
+            return [trace for _elapsed, _order, trace in sorted(self._slowest, reverse=True)]
+
+
+class ProfiledJSONProvider(DefaultJSONProvider):
+    # jsonify() goes through here, so encoding shows up as its own span.
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        with span("json encode"):
+            return super().dumps(obj, **kwargs)
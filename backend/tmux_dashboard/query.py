@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Tuple
+
+# list-sessions/list-windows/list-panes -f arrived in tmux 3.2; older servers get the same
+# filters applied in Python after a full listing.
+FILTER_MIN_VERSION = (3, 2)
+VERSION_ARGS = ["tmux", "-V"]
+
+_version_lock = threading.Lock()
+_version: Tuple[int, int] | None = None
+
+
+@dataclass(frozen=True)
+class TmuxQuery:
+    session: str = ""
+    command: str = ""
+    active_only: bool = False
+    attached_only: bool = False
+
+    @property
+    def is_empty(self) -> bool:
+        return self == TmuxQuery()
+
+    def label(self) -> str:
+        parts = [f"{name}={value}" for name, value in vars(self).items() if value]
+        return ",".join(parts)
+
+
+def _is_truthy(value: str | None) -> bool:
+    return (value or "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def parse_query(args: Mapping[str, str]) -> TmuxQuery:
+    return TmuxQuery(
+        session=(args.get("session") or "").strip(),
+        command=(args.get("command") or "").strip(),
+        active_only=_is_truthy(args.get("active")),
+        attached_only=_is_truthy(args.get("attached")),
+    )
+
+
+def parse_version(text: str) -> Tuple[int, int]:
+    # "tmux 3.3a", "tmux next-3.5"; unparseable builds (e.g. "tmux master") are assumed current.
+    match = re.search(r"(\d+)\.(\d+)", text)
+    if not match:
+        return (99, 0) if text.strip() else (0, 0)
+    return int(match.group(1)), int(match.group(2))
+
+
+def cached_version() -> Tuple[int, int] | None:
+    return _version
+
+
+def remember_version(text: str) -> Tuple[int, int]:
+    global _version
+    with _version_lock:
+        if _version is None and text.strip():
+            _version = parse_version(text)
+        return _version or (0, 0)
+
+
+def reset_version() -> None:
+    global _version
+    with _version_lock:
+        _version = None
+
+
+def escape_format_value(value: str) -> str:
+    # Inside #{==:a,b} a literal comma, closing brace or hash must be escaped with '#'.
+    return value.replace("#", "##").replace(",", "#,").replace("}", "#}")
+
+
+def _all_of(conditions: List[str]) -> str:
+    expression = conditions[-1]
+    for condition in reversed(conditions[:-1]):
+        expression = f"#{{&&:{condition},{expression}}}"
+    return expression
+
+
+def _scope(query: TmuxQuery, session_flag: List[str]) -> List[str]:
+    # '=' makes the target an exact session name instead of a prefix match.
+    return [*session_flag, "-t", f"={query.session}"] if query.session else ["-a"]
+
+
+def list_windows_args(query: TmuxQuery, fmt: str, filters: bool) -> List[str]:
+    conditions = []
+    if query.attached_only:
+        conditions.append("#{session_attached}")
+    if query.active_only:
+        conditions.append("#{window_active}")
+    args = ["tmux", "list-windows", *_scope(query, []), "-F", fmt]
+    return args + ["-f", _all_of(conditions)] if filters and conditions else args
+
+
+def list_panes_args(query: TmuxQuery, fmt: str, filters: bool) -> List[str]:
+    conditions = []
+    if query.attached_only:
+        conditions.append("#{session_attached}")
+    if query.active_only:
+        conditions.append("#{window_active}")
+        conditions.append("#{pane_active}")
+    if query.command:
+        conditions.append(f"#{{==:#{{pane_current_command}},{escape_format_value(query.command)}}}")
+    args = ["tmux", "list-panes", *_scope(query, ["-s"]), "-F", fmt]
+    return args + ["-f", _all_of(conditions)] if filters and conditions else args
+
+
+def session_matches(query: TmuxQuery, name: str, attached: bool) -> bool:
+    if query.session and name != query.session:
+        return False
+    return attached or not query.attached_only
+
+
+def prune_empty(query: TmuxQuery, sessions: List[Dict[str, object]]) -> List[Dict[str, object]]:
+    # A command filter keeps only the windows and sessions that still hold a matching pane.
+    if not query.command:
+        return sessions
+    kept = []
+    for session in sessions:
+        windows = [window for window in session["windows"] if window["panes"]]
+        if windows:
+            kept.append({**session, "windows": windows})
+    return kept
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import os
+import shlex
+import sys
+from typing import Any, Dict, List
+
+from . import segment_log
+from .actions import _run_tmux
+from .collectors import PANE_ID_PATTERN, _run_command
+from .config import AppConfig
+
+
+class PaneRecorder:
+    def __init__(self, cfg: AppConfig) -> None:
+        self._directory = cfg.recorder_dir
+        self._segment_bytes = cfg.recorder_segment_bytes
+        self._max_segments = cfg.recorder_max_segments
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._directory)
+
+    def _pane_dir(self, pane_id: str) -> str | None:
+        if not self.enabled or not PANE_ID_PATTERN.match(pane_id):
+            return None
+        return os.path.join(self._directory, f"pane-{pane_id[1:]}")
+
+    def _sink_command(self, directory: str) -> str:
+        args = [
+            sys.executable,
+            os.path.abspath(segment_log.__file__),
+            "sink",
+            directory,
+            "--segment-bytes",
+            str(self._segment_bytes),
+            "--max-segments",
+            str(self._max_segments),
+        ]
+        return "exec " + " ".join(shlex.quote(arg) for arg in args)
+
+    def start(self, pane_id: str) -> Dict[str, object]:
+        directory = self._pane_dir(pane_id)
+        if directory is None:
+            return {"ok": False, "error": "invalid pane id"}
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        # pipe-pane -o toggles (a second call closes the pipe), so an active pipe is left alone.
+        if _run_command(["tmux", "display-message", "-p", "-t", pane_id, "#{pane_pipe}"]) == "1":
+            return {"ok": True, "stdout": "", "stderr": "", "returncode": 0}
+        return _run_tmux(["pipe-pane", "-t", pane_id, self._sink_command(directory)])
+
+    def stop(self, pane_id: str) -> Dict[str, object]:
+        if self._pane_dir(pane_id) is None:
+            return {"ok": False, "error": "invalid pane id"}
+        return _run_tmux(["pipe-pane", "-t", pane_id])
+
+    def list_recordings(self) -> List[Dict[str, Any]]:
+        if not self.enabled:
+            return []
+        piping: Dict[str, bool] = {}
+        for line in _run_command(["tmux", "list-panes", "-a", "-F", "#{pane_id}\t#{pane_pipe}"]).splitlines():
+            parts = line.split("\t")
+            if len(parts) == 2:
+                piping[parts[0]] = parts[1] == "1"
+
+        recordings: List[Dict[str, Any]] = []
+        if not os.path.isdir(self._directory):
+            return recordings
+        pane_ids = [f"%{name[5:]}" for name in os.listdir(self._directory) if name.startswith("pane-")]
+        for pane_id in sorted(pane_ids, key=lambda item: int(item[1:]) if item[1:].isdigit() else -1):
+            directory = self._pane_dir(pane_id)
+            if directory is None:
+                continue
+            info = segment_log.read_range(directory, 0, 0)
+            recordings.append(
+                {
+                    "pane_id": pane_id,
+                    "recording": piping.get(pane_id, False),
+                    "first_available": info["first_available"],
+                    "total": info["total"],
+                }
+            )
+        return recordings
+
+    def read(self, pane_id: str, offset: int, length: int) -> Dict[str, Any] | None:
+        directory = self._pane_dir(pane_id)
+        if directory is None or not os.path.isdir(directory):
+            return None
+        chunk = segment_log.read_range(directory, offset, length)
+        data = chunk.pop("data")
+        return {**chunk, "data": data.decode("utf-8", errors="replace")}
@@ -1,12 +1,27 @@
 from __future__ import annotations
 
+import hmac
 import ipaddress
-from typing import Callable
+import os
+import re
+import time
+from typing import Callable, Iterator
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request, stream_with_context
 
+from . import metrics
+from .admission import AdmissionController
+from .archive import SnapshotArchive
 from .auth import AuthService
+from .collectors import PANE_BATCH_MAX, PANE_BATCH_MAX_LINES, _pane_detail_from_state, port_owners
 from .config import AppConfig
+from .history import MetricsHistory
+from .localsocket import LocalSubscriptionServer
+from .netstate import NetworkTracker
+from .polling import PollAdvisor, snapshot_signature
+from .profiling import PROFILE_HEADER, Profiler, folded, server_timing
+from .query import parse_query
+from .recorder import PaneRecorder
 
 
 def _is_loopback_ip(value: str) -> bool:
@@ -36,16 +51,60 @@ def _authenticate_request(req, auth: AuthService) -> str | None:
     return auth.authenticate_bearer_token(req.headers.get("Authorization", ""))
 
 
+def _cors_headers(origin: str, cfg: AppConfig) -> dict[str, str]:
+    if not cfg.cors_origins or origin not in cfg.cors_origins:
+        return {}
+    return {
+        "Access-Control-Allow-Origin": origin,
+        "Vary": "Origin",
+        "Access-Control-Allow-Headers": "Content-Type,Authorization",
+        "Access-Control-Allow-Methods": "GET,POST,OPTIONS",
+    }
+
+
 def _add_cors_headers(req, response, cfg: AppConfig):
-    origin = req.headers.get("Origin", "")
-    if cfg.cors_origins and origin in cfg.cors_origins:
-        response.headers["Access-Control-Allow-Origin"] = origin
-        response.headers["Vary"] = "Origin"
-        response.headers["Access-Control-Allow-Headers"] = "Content-Type,Authorization"
-        response.headers["Access-Control-Allow-Methods"] = "GET,POST,OPTIONS"
+    response.headers.update(_cors_headers(req.headers.get("Origin", ""), cfg))
     return response
 
 
+def _is_truthy_arg(value: str | None) -> bool:
+    return (value or "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _history_filename(pane_id: str, compress: bool) -> str:
+    safe_id = re.sub(r"[^A-Za-z0-9_-]+", "", pane_id) or "pane"
+    return f"pane-{safe_id}-history.txt{'.gz' if compress else ''}"
+
+
+# Endpoints not listed here (auth, health, metrics) are never limited. Downloads hold their
+# class until the stream ends, since the capture or read runs for as long as it lasts.
+ADMISSION_CLASSES = {
+    "actions": "interactive",
+    "pane_detail": "pane",
+    "pane_batch": "pane",
+    "pane_screen": "pane",
+    "pane_history": "pane",
+    "recordings": "pane",
+    "pane_recording": "pane",
+    "snapshot": "snapshot",
+    "metrics_history": "snapshot",
+    "snapshot_archive": "snapshot",
+    "search": "snapshot",
+    "port_lookup": "network",
+}
+OVERLOADED_PAYLOAD = {"ok": False, "error": "server busy, retry later", "code": "OVERLOADED"}
+# Method-specific overrides: starting or stopping a recording is a write like an action.
+ADMISSION_WRITE_CLASSES = {"pane_recording": "interactive"}
+
+
+def admission_class_for(endpoint: str, method: str) -> str | None:
+    if method == "OPTIONS":
+        return None
+    if method != "GET" and endpoint in ADMISSION_WRITE_CLASSES:
+        return ADMISSION_WRITE_CLASSES[endpoint]
+    return ADMISSION_CLASSES.get(endpoint)
+
+
 def _action_failed_response(code: str):
     return (
         jsonify(
@@ -65,24 +124,144 @@ def register_routes(
     auth: AuthService,
     *,
     execute_action_fn: Callable[[str, dict[str, object]], dict[str, object]],
-    collect_tmux_state_fn: Callable[[], dict[str, object]],
+    collect_tmux_state_fn: Callable[..., dict[str, object]],
     collect_network_state_fn: Callable[[], dict[str, object]],
-    collect_pane_detail_fn: Callable[[str], dict[str, object] | None],
+    collect_pane_detail_fn: Callable[..., dict[str, object] | None],
+    collect_pane_batch_fn: Callable[[list[dict[str, object]]], dict[str, object]],
+    stream_pane_history_fn: Callable[..., Iterator[bytes] | None],
+    pane_screen_fn: Callable[..., dict[str, object] | None],
+    search_panes_fn: Callable[..., dict[str, object]],
+    recorder: PaneRecorder,
+    history: MetricsHistory,
+    archive: SnapshotArchive,
+    local_socket: LocalSubscriptionServer,
+    network: NetworkTracker,
+    poll_advisor: PollAdvisor,
+    admission: AdmissionController,
+    profiler: Profiler,
 ) -> None:
     def client_ip() -> str:
         return _resolve_client_ip(request)
 
     def authenticate_request() -> str | None:
-        return _authenticate_request(request, auth)
+        # Checked by the admission hook and again by the handler; the token is verified once.
+        if "auth_user" not in g:
+            g.auth_user = _authenticate_request(request, auth)
+        return g.auth_user
+
+    def scrape_authorized() -> bool:
+        # Operational endpoints accept the static scrape token as well as a signed-in user.
+        header = request.headers.get("Authorization", "")
+        token_ok = bool(cfg.metrics_token) and hmac.compare_digest(
+            header.encode("utf-8"), f"Bearer {cfg.metrics_token}".encode("utf-8")
+        )
+        return token_ok or authenticate_request() is not None
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.before_request
+    def start_profile():
+        if request.method == "OPTIONS":
+            return
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        # The opt-in header is honoured only for signed-in users; anyone else gets plain sampling.
+        forced = _is_truthy_arg(request.headers.get(PROFILE_HEADER)) and authenticate_request() is not None
+        trace = profiler.start(f"{request.method} {route}", forced)
+        if trace is not None:
+            g.profile = trace
+
+    @app.teardown_request
+    def abandon_profile(_error):
+        if g.pop("profile", None) is not None:
+            profiler.abandon()
+
+    @app.before_request
+    def admit_request():
+        admission_class = admission_class_for(request.endpoint or "", request.method)
+        # Unauthenticated requests get their 401 from the handler without taking or queueing a
+        # slot, so they cannot get signed-in clients shed.
+        if admission_class is None or authenticate_request() is None:
+            return None
+        admitted, retry_after = admission.acquire(admission_class)
+        if not admitted:
+            # Shed before any collection starts so the thread is back in the pool at once.
+            return jsonify(OVERLOADED_PAYLOAD), 503, {"Retry-After": str(retry_after)}
+        g.admission = (admission_class, time.perf_counter())
+        return None
+
+    @app.teardown_request
+    def forget_auth_user(_error):
+        g.pop("auth_user", None)
+
+    @app.teardown_request
+    def release_admission(_error):
+        ticket = g.pop("admission", None)
+        if ticket is not None:
+            admission_class, admitted_at = ticket
+            admission.release(admission_class, time.perf_counter() - admitted_at)
+
+    # Registered first so it runs after the other after_request hooks and its total covers them.
+    @app.after_request
+    def finish_profile(response):
+        trace = g.pop("profile", None)
+        if trace is not None:
+            profiler.finish(trace, response.status_code)
+            if trace.forced:
+                response.headers["Server-Timing"] = server_timing(trace)
+        return response
 
     @app.after_request
     def add_cors_headers(response):
         return _add_cors_headers(request, response, cfg)
 
+    @app.after_request
+    def observe_request(response):
+        started = g.get("request_started")
+        if started is not None:
+            # Label by URL rule, not path, so pane ids do not explode the series count.
+            route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+            metrics.HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started, route, request.method, str(response.status_code)
+            )
+            if not response.is_streamed:
+                metrics.HTTP_RESPONSE_BYTES.observe(response.calculate_content_length() or 0, route)
+        return response
+
     @app.route("/api/health", methods=["GET"])
     def health():
         return jsonify({"ok": True})
 
+    @app.route("/api/metrics", methods=["GET"])
+    def metrics_endpoint():
+        if not scrape_authorized():
+            return jsonify({"ok": False, "error": "unauthorized"}), 401
+        resp = Response(metrics.REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+        # Counters are per worker process; the pid lets scrapers tell gunicorn workers apart.
+        resp.headers["X-Dashboard-Worker"] = str(os.getpid())
+        return resp
+
+    @app.route("/api/profile", methods=["GET"])
+    def profile():
+        if not scrape_authorized():
+            return jsonify({"ok": False, "error": "unauthorized"}), 401
+        traces = profiler.slowest()
+        if request.args.get("format") == "folded":
+            resp = Response(folded(traces), mimetype="text/plain")
+        else:
+            resp = jsonify(
+                {
+                    "ok": True,
+                    "sample_every": profiler.sample_every,
+                    "keep": profiler.keep,
+                    "requests": [trace.to_dict() for trace in traces],
+                }
+            )
+        # Samples are per worker process, like the metrics.
+        resp.headers["X-Dashboard-Worker"] = str(os.getpid())
+        return resp
+
     @app.route("/api/auth/login", methods=["POST"])
     def auth_login():
         ip = client_ip()
@@ -123,6 +302,8 @@ def register_routes(
 
     @app.route("/api/auth/logout", methods=["POST"])
     def auth_logout():
+        if auth.revoke_token(request.headers.get("Authorization", "")):
+            app.logger.info("auth.logout ip=%s", client_ip())
         return jsonify({"ok": True})
 
     @app.route("/api/snapshot", methods=["GET"])
@@ -131,25 +312,258 @@ def register_routes(
         if not user:
             return jsonify({"ok": False, "error": "unauthorized"}), 401
 
+        query = parse_query(request.args)
+        try:
+            events_since = int(request.args.get("since", "0") or 0)
+        except ValueError:
+            return jsonify({"ok": False, "error": "since must be an integer"}), 400
+        started = time.perf_counter()
+        tmux_state = collect_tmux_state_fn() if query.is_empty else collect_tmux_state_fn(query)
+        network_state = collect_network_state_fn()
+        # Filtered snapshots see only part of the server, so only full ones feed the history.
+        if query.is_empty:
+            history.record(tmux_state, network_state)
+            archive.record(tmux_state, network_state)
+            local_socket.publish_snapshot(tmux_state, network_state)
+        next_poll_ms = poll_advisor.advise(
+            f"snapshot:{query.label()}" if not query.is_empty else "snapshot",
+            snapshot_signature(tmux_state, network_state),
+            request.headers.get("Authorization", ""),
+            time.perf_counter() - started,
+        )
         return jsonify(
             {
-                "tmux": collect_tmux_state_fn(),
-                "network": collect_network_state_fn(),
+                "tmux": tmux_state,
+                "network": {**network_state, **network.events_since(events_since)},
                 "allowed_actions": sorted(cfg.allowed_actions),
+                "next_poll_ms": next_poll_ms,
             }
         )
 
+    @app.route("/api/history", methods=["GET"])
+    def metrics_history():
+        user = authenticate_request()
+        if not user:
+            return jsonify({"ok": False, "error": "unauthorized"}), 401
+
+        try:
+            minutes = float(request.args.get("minutes", "0") or 0)
+            hours = float(request.args.get("hours", "0") or 0)
+        except ValueError:
+            return jsonify({"ok": False, "error": "minutes and hours must be numbers"}), 400
+        window_sec = minutes * 60 + hours * 3600 or 15 * 60
+        window_sec = min(max(window_sec, 60), 30 * 86400)
+        return jsonify({"ok": True, **history.query(window_sec, prefix=request.args.get("series", ""))})
+
+    @app.route("/api/archive", methods=["GET"])
+    def snapshot_archive():
+        user = authenticate_request()
+        if not user:
+            return jsonify({"ok": False, "error": "unauthorized"}), 401
+        if not archive.enabled:
+            return jsonify({"ok": False, "error": "archive disabled"}), 404
+
+        at_raw = request.args.get("at", "").strip()
+        ago_raw = request.args.get("ago", "").strip()
+        if not at_raw and not ago_raw:
+            return jsonify({"ok": True, **archive.stats()})
+        try:
+            at = float(at_raw) if at_raw else time.time() - float(ago_raw)
+        except ValueError:
+            return jsonify({"ok": False, "error": "at and ago must be numbers"}), 400
+        snapshot = archive.at(at)
+        if snapshot is None:
+            return jsonify({"ok": False, "error": "no snapshot archived at or before that time"}), 404
+        pane_id = request.args.get("pane", "").strip()
+        if pane_id:
+            detail = _pane_detail_from_state(snapshot["tmux"], pane_id)
+            if detail is None:
+                return jsonify({"ok": False, "error": "pane not found at that time"}), 404
+            return jsonify({"ok": True, "at": at, "recorded_at": snapshot["recorded_at"], **detail})
+        return jsonify({"ok": True, "at": at, **snapshot})
+
+    @app.route("/api/ports/<int:port>", methods=["GET"])
+    def port_lookup(port: int):
+        user = authenticate_request()
+        if not user:
+            return jsonify({"ok": False, "error": "unauthorized"}), 401
+
+        # A full network collection. It joins one already in flight (e.g. a concurrent snapshot),
+        # but a lookup on its own runs lsof/ps or the /proc scan like any snapshot would.
+        network_state = collect_network_state_fn()
+        listeners = port_owners(network_state, port)
+        if not listeners:
+            return jsonify({"ok": False, "error": f"no listener on port {port}"}), 404
+        payload = {"ok": True, "port": port, "listeners": listeners}
+        if network_state.get("stale"):
+            payload["stale"] = True
+        return jsonify(payload)
+
     @app.route("/api/panes/<pane_id>", methods=["GET"])
     def pane_detail(pane_id: str):
         user = authenticate_request()
         if not user:
             return jsonify({"ok": False, "error": "unauthorized"}), 401
 
-        detail = collect_pane_detail_fn(pane_id)
+        started = time.perf_counter()
+        detail = collect_pane_detail_fn(pane_id, since=request.args.get("since", "").strip())
         if detail is None:
             return jsonify({"ok": False, "error": f"pane '{pane_id}' not found"}), 404
 
-        return jsonify({"ok": True, **detail})
+        next_poll_ms = poll_advisor.advise(
+            f"pane:{pane_id}",
+            str(detail.get("pane", {}).get("fingerprint", "")),
+            request.headers.get("Authorization", ""),
+            time.perf_counter() - started,
+        )
+        return jsonify({"ok": True, **detail, "next_poll_ms": next_poll_ms})
+
+    @app.route("/api/panes/batch", methods=["POST"])
+    def pane_batch():
+        user = authenticate_request()
+        if not user:
+            return jsonify({"ok": False, "error": "unauthorized"}), 401
+
+        payload = request.get_json(silent=True) or {}
+        items = payload.get("panes") if isinstance(payload, dict) else None
+        if not isinstance(items, list) or not items:
+            return jsonify({"ok": False, "error": "panes must be a non-empty list"}), 400
+        if len(items) > PANE_BATCH_MAX:
+            return jsonify({"ok": False, "error": f"at most {PANE_BATCH_MAX} panes per batch"}), 400
+
+        targets: list[dict[str, object]] = []
+        seen: set[str] = set()
+        for item in items:
+            if isinstance(item, str):
+                item = {"id": item}
+            if not isinstance(item, dict) or not str(item.get("id", "")).strip():
+                return jsonify({"ok": False, "error": "each pane needs an id"}), 400
+            try:
+                lines = int(item.get("lines", 200))
+            except (TypeError, ValueError):
+                return jsonify({"ok": False, "error": "lines must be an integer"}), 400
+            pane_id = str(item["id"]).strip()
+            if pane_id in seen:
+                continue
+            seen.add(pane_id)
+            targets.append(
+                {
+                    "id": pane_id,
+                    "lines": min(max(lines, 0), PANE_BATCH_MAX_LINES),
+                    "since": str(item.get("since", "") or "").strip(),
+                }
+            )
+
+        started = time.perf_counter()
+        result = collect_pane_batch_fn(targets)
+        next_poll_ms = poll_advisor.advise(
+            "batch:" + ",".join(item["id"] for item in targets),
+            ",".join(str(pane.get("pane", {}).get("fingerprint", "")) for pane in result.get("panes", [])),
+            request.headers.get("Authorization", ""),
+            time.perf_counter() - started,
+        )
+        return jsonify({"ok": True, **result, "next_poll_ms": next_poll_ms})
+
+    @app.route("/api/panes/<pane_id>/screen", methods=["GET"])
+    def pane_screen(pane_id: str):
+        user = authenticate_request()
+        if not user:
+            return jsonify({"ok": False, "error": "unauthorized"}), 401
+
+        screen = pane_screen_fn(pane_id, since=request.args.get("since", "").strip())
+        if screen is None:
+            return jsonify({"ok": False, "error": f"pane '{pane_id}' not found"}), 404
+        return jsonify({"ok": True, **screen})
+
+    @app.route("/api/panes/<pane_id>/history", methods=["GET"])
+    def pane_history(pane_id: str):
+        user = authenticate_request()
+        if not user:
+            return jsonify({"ok": False, "error": "unauthorized"}), 401
+
+        compress = _is_truthy_arg(request.args.get("gzip"))
+        chunks = stream_pane_history_fn(pane_id, compress=compress)
+        if chunks is None:
+            return jsonify({"ok": False, "error": f"pane '{pane_id}' not found"}), 404
+
+        app.logger.info("pane.history user=%s pane=%s gzip=%s", user, pane_id, compress)
+        return Response(
+            stream_with_context(chunks),
+            mimetype="application/gzip" if compress else "text/plain",
+            headers={
+                "Content-Disposition": f'attachment; filename="{_history_filename(pane_id, compress)}"',
+                "Cache-Control": "no-store",
+                "X-Accel-Buffering": "no",
+            },
+        )
+
+    @app.route("/api/recordings", methods=["GET"])
+    def recordings():
+        user = authenticate_request()
+        if not user:
+            return jsonify({"ok": False, "error": "unauthorized"}), 401
+
+        return jsonify({"ok": True, "enabled": recorder.enabled, "recordings": recorder.list_recordings()})
+
+    @app.route("/api/panes/<pane_id>/recording", methods=["GET", "POST"])
+    def pane_recording(pane_id: str):
+        user = authenticate_request()
+        if not user:
+            return jsonify({"ok": False, "error": "unauthorized"}), 401
+        if not recorder.enabled:
+            return jsonify({"ok": False, "error": "recorder is disabled"}), 404
+
+        if request.method == "POST":
+            payload = request.get_json(silent=True) or {}
+            enabled = bool(payload.get("enabled", True))
+            result = recorder.start(pane_id) if enabled else recorder.stop(pane_id)
+            if not result.get("ok"):
+                app.logger.warning(
+                    "recorder.failed user=%s pane=%s enabled=%s stderr=%s",
+                    user,
+                    pane_id,
+                    enabled,
+                    result.get("stderr", result.get("error", "")),
+                )
+                return _action_failed_response(str(result.get("code", "RECORDER_FAILED")))
+            app.logger.info("recorder.%s user=%s pane=%s", "start" if enabled else "stop", user, pane_id)
+            return jsonify({"ok": True, "pane_id": pane_id, "recording": enabled})
+
+        try:
+            offset = int(request.args.get("offset", "0"))
+            length = int(request.args.get("length", "65536"))
+        except ValueError:
+            return jsonify({"ok": False, "error": "offset and length must be integers"}), 400
+        chunk = recorder.read(pane_id, offset, length)
+        if chunk is None:
+            return jsonify({"ok": False, "error": f"no recording for pane '{pane_id}'"}), 404
+        return jsonify({"ok": True, "pane_id": pane_id, **chunk})
+
+    @app.route("/api/search", methods=["GET"])
+    def search():
+        user = authenticate_request()
+        if not user:
+            return jsonify({"ok": False, "error": "unauthorized"}), 401
+
+        query = request.args.get("q", "")
+        if not query.strip():
+            return jsonify({"ok": False, "error": "q is required"}), 400
+
+        try:
+            context = int(request.args.get("context", "2"))
+        except ValueError:
+            context = 2
+        try:
+            result = search_panes_fn(
+                query,
+                regex=_is_truthy_arg(request.args.get("regex")),
+                ignore_case=not _is_truthy_arg(request.args.get("case")),
+                context=context,
+            )
+        except re.error:
+            return jsonify({"ok": False, "error": "invalid regular expression"}), 400
+
+        return jsonify({"ok": True, "query": query, **result})
 
     @app.route("/api/actions/<action>", methods=["POST", "OPTIONS"])
     def actions(action: str):
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import secrets
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Tuple
+
+from . import collectors, metrics
+
+SCREEN_TRACKED_PANES = 64
+# Frames a client may lag behind and still receive a row diff instead of the full screen.
+SCREEN_FRAME_HISTORY = 32
+
+_ESCAPE = re.compile(r"\x1b\[([0-9;:]*)([A-Za-z])|\x1b\][^\x07\x1b]*(?:\x07|\x1b\\)|\x1b.")
+_FLAGS = {1: "bold", 2: "dim", 3: "italic", 4: "underline", 5: "blink", 7: "reverse", 8: "hidden", 9: "strike"}
+_FLAG_RESETS = {
+    22: ("bold", "dim"),
+    23: ("italic",),
+    24: ("underline",),
+    25: ("blink",),
+    27: ("reverse",),
+    28: ("hidden",),
+    29: ("strike",),
+}
+
+Style = Dict[str, Any]
+Span = Dict[str, Any]
+
+
+def _extended_color(params: List[int], index: int) -> Tuple[Any, int]:
+    # 38;5;n selects a palette index, 38;2;r;g;b a true color; returns the color and the params consumed.
+    mode = params[index + 1] if index + 1 < len(params) else None
+    if mode == 5 and index + 2 < len(params):
+        return params[index + 2], 3
+    if mode == 2 and index + 4 < len(params):
+        red, green, blue = (min(max(value, 0), 255) for value in params[index + 2 : index + 5])
+        return f"#{red:02x}{green:02x}{blue:02x}", 5
+    return None, len(params) - index
+
+
+def apply_sgr(style: Style, raw: str) -> Style:
+    params = [int(part) if part.isdigit() else 0 for part in raw.replace(":", ";").split(";")] if raw else [0]
+    style = dict(style)
+    index = 0
+    while index < len(params):
+        code = params[index]
+        step = 1
+        if code == 0:
+            style = {}
+        elif code in _FLAGS:
+            style[_FLAGS[code]] = True
+        elif code in _FLAG_RESETS:
+            for name in _FLAG_RESETS[code]:
+                style.pop(name, None)
+        elif 30 <= code <= 37 or 90 <= code <= 97:
+            style["fg"] = code - 30 if code < 90 else code - 82
+        elif 40 <= code <= 47 or 100 <= code <= 107:
+            style["bg"] = code - 40 if code < 100 else code - 92
+        elif code in (38, 48):
+            color, step = _extended_color(params, index)
+            if color is not None:
+                style["fg" if code == 38 else "bg"] = color
+        elif code == 39:
+            style.pop("fg", None)
+        elif code == 49:
+            style.pop("bg", None)
+        index += step
+    return style
+
+
+def parse_screen_lines(lines: List[str]) -> List[List[Span]]:
+    # tmux emits only the attribute changes between cells, so the style carries over line breaks.
+    rows: List[List[Span]] = []
+    style: Style = {}
+    for line in lines:
+        spans: List[Span] = []
+        position = 0
+        for match in _ESCAPE.finditer(line):
+            if match.start() > position:
+                _append_span(spans, line[position : match.start()], style)
+            if match.group(2) == "m":
+                style = apply_sgr(style, match.group(1))
+            position = match.end()
+        if position < len(line):
+            _append_span(spans, line[position:], style)
+        rows.append(spans)
+    return rows
+
+
+def _append_span(spans: List[Span], text: str, style: Style) -> None:
+    if spans and {key: value for key, value in spans[-1].items() if key != "text"} == style:
+        spans[-1]["text"] += text
+        return
+    spans.append({"text": text, **style})
+
+
+def _row_hash(spans: List[Span]) -> str:
+    return hashlib.sha1(json.dumps(spans, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class _PaneScreen:
+    def __init__(self) -> None:
+        self.frame = 0
+        self.state: Tuple[Any, ...] = ()
+        self.rows: List[List[Span]] = []
+        self.hashes: List[str] = []
+        self.history: Deque[Tuple[int, Tuple[Any, ...], List[str]]] = deque(maxlen=SCREEN_FRAME_HISTORY)
+
+
+class ScreenTracker:
+    def __init__(self, max_panes: int = SCREEN_TRACKED_PANES) -> None:
+        self._max_panes = max_panes
+        # Frame tokens carry a per-process epoch: a token minted by another gunicorn worker or
+        # before a restart never matches, so that client simply gets a full screen.
+        self._epoch = secrets.token_hex(4)
+        self._lock = threading.Lock()
+        self._panes: OrderedDict[str, _PaneScreen] = OrderedDict()
+
+    def frame(self, pane_id: str, since: str = "") -> Dict[str, Any] | None:
+        captured = collectors.collect_pane_screen(pane_id)
+        if captured is None:
+            return None
+
+        rows = parse_screen_lines(captured["lines"])
+        rows += [[] for _ in range(captured["height"] - len(rows))]
+        hashes = [_row_hash(row) for row in rows]
+        cursor = captured["cursor"]
+        state = (captured["width"], captured["height"], cursor["x"], cursor["y"], cursor["visible"])
+
+        with self._lock:
+            screen = self._panes.get(pane_id)
+            if screen is None:
+                screen = _PaneScreen()
+                self._panes[pane_id] = screen
+                while len(self._panes) > self._max_panes:
+                    self._panes.popitem(last=False)
+            self._panes.move_to_end(pane_id)
+            if screen.frame == 0 or hashes != screen.hashes or state != screen.state:
+                screen.frame += 1
+                screen.state = state
+                screen.rows = rows
+                screen.hashes = hashes
+                screen.history.append((screen.frame, state, hashes))
+            base = self._base_hashes(screen, since)
+            if since:
+                metrics.count_cache("pane_screen", base is not None)
+            current = screen.frame
+            changed = [
+                {"y": y, "spans": row}
+                for y, (row, row_hash) in enumerate(zip(screen.rows, screen.hashes))
+                if base is None or y >= len(base) or base[y] != row_hash
+            ]
+
+        return {
+            "pane_id": pane_id,
+            "frame": f"{self._epoch}:{current}",
+            "full": base is None,
+            "width": captured["width"],
+            "height": captured["height"],
+            "cursor": cursor,
+            "rows": changed,
+        }
+
+    def _base_hashes(self, screen: _PaneScreen, since: str) -> List[str] | None:
+        epoch, _, number = since.partition(":")
+        if epoch != self._epoch or not number.isdigit():
+            return None
+        for frame, state, hashes in screen.history:
+            # A resize reflows every row, so only frames of the same size can be diffed against.
+            if frame == int(number):
+                return hashes if state[:2] == screen.state[:2] else None
+        return None
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+from . import collectors, metrics
+
+SEARCH_MAX_WORKERS = 8
+SEARCH_INDEX_LINES = 2000
+SEARCH_MAX_RESULTS = 200
+SEARCH_MAX_CONTEXT = 10
+
+
+@dataclass
+class _IndexedPane:
+    fingerprint: str = ""
+    history_size: int = 0
+    history: List[str] = field(default_factory=list)
+    screen: List[str] = field(default_factory=list)
+
+
+def _capture_lines(pane_id: str, lines: int) -> List[str] | None:
+    output = collectors._capture_pane_output(pane_id, lines)
+    if not output:
+        return None
+    return output.splitlines()
+
+
+class PaneSearchIndex:
+    def __init__(self, max_workers: int = SEARCH_MAX_WORKERS, index_lines: int = SEARCH_INDEX_LINES) -> None:
+        self._index_lines = index_lines
+        self._lock = threading.Lock()
+        self._entries: Dict[str, _IndexedPane] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pane-search")
+
+    def _refresh_pane(self, pane_id: str, meta: Dict[str, Any], entry: _IndexedPane | None) -> _IndexedPane | None:
+        history_size = int(meta["history_size"])
+        height = int(meta["height"])
+        grown = history_size - entry.history_size if entry else -1
+        # History lines are immutable until tmux starts trimming at history_limit, so while the
+        # history only grows we capture just the newly scrolled lines plus the visible screen.
+        if entry and 0 <= grown < self._index_lines and history_size < int(meta["history_limit"]):
+            lines = _capture_lines(pane_id, grown)
+            if lines is None:
+                return None
+            history = entry.history + lines[:grown]
+        else:
+            lines = _capture_lines(pane_id, self._index_lines)
+            if lines is None:
+                return None
+            history = lines[: max(len(lines) - height, 0)]
+
+        return _IndexedPane(
+            fingerprint=str(meta["fingerprint"]),
+            history_size=history_size,
+            history=history[-self._index_lines :],
+            screen=lines[len(lines) - min(height, len(lines)) :],
+        )
+
+    def refresh(self) -> Dict[str, Dict[str, Any]]:
+        panes = collectors.collect_pane_fingerprints()
+        with self._lock:
+            for pane_id in list(self._entries):
+                if pane_id not in panes:
+                    del self._entries[pane_id]
+            stale = [
+                (pane_id, meta, self._entries.get(pane_id))
+                for pane_id, meta in panes.items()
+                if pane_id not in self._entries or self._entries[pane_id].fingerprint != meta["fingerprint"]
+            ]
+
+        metrics.count_cache("search_index", True, len(panes) - len(stale))
+        metrics.count_cache("search_index", False, len(stale))
+        refreshed = list(self._executor.map(lambda item: (item[0], self._refresh_pane(*item)), stale))
+        with self._lock:
+            for pane_id, entry in refreshed:
+                if entry is not None:
+                    self._entries[pane_id] = entry
+        return {"panes": panes, "captured": len(stale)}
+
+    def search(
+        self,
+        query: str,
+        *,
+        regex: bool = False,
+        ignore_case: bool = True,
+        context: int = 2,
+        max_results: int = SEARCH_MAX_RESULTS,
+    ) -> Dict[str, Any]:
+        flags = re.IGNORECASE if ignore_case else 0
+        pattern = re.compile(query if regex else re.escape(query), flags)
+        context = min(max(context, 0), SEARCH_MAX_CONTEXT)
+
+        refreshed = self.refresh()
+        panes: Dict[str, Dict[str, Any]] = refreshed["panes"]
+        with self._lock:
+            entries = {pane_id: self._entries[pane_id] for pane_id in panes if pane_id in self._entries}
+
+        results: List[Dict[str, Any]] = []
+        truncated = False
+        for pane_id in sorted(entries, key=lambda item: (panes[item]["session"], panes[item]["window_index"], panes[item]["pane_index"])):
+            entry = entries[pane_id]
+            lines = entry.history + entry.screen
+            for idx, text in enumerate(lines):
+                if not pattern.search(text):
+                    continue
+                if len(results) >= max_results:
+                    truncated = True
+                    break
+                meta = panes[pane_id]
+                results.append(
+                    {
+                        "pane_id": pane_id,
+                        "session": meta["session"],
+                        "window_id": meta["window_id"],
+                        "window_index": meta["window_index"],
+                        # tmux line numbering: 0 is the top of the visible screen, history is negative.
+                        "line": idx - len(entry.history),
+                        "text": text,
+                        "before": lines[max(idx - context, 0) : idx],
+                        "after": lines[idx + 1 : idx + 1 + context],
+                    }
+                )
+            if truncated:
+                break
+
+        return {
+            "results": results,
+            "truncated": truncated,
+            "panes_scanned": len(entries),
+            "panes_captured": refreshed["captured"],
+        }
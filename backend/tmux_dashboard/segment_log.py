@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+# This module is also executed directly as the `tmux pipe-pane` sink process, so it must only
+# depend on the standard library (importing the package would load the Flask app and config).
+
+import argparse
+import mmap
+import os
+import select
+import struct
+import sys
+import time
+import zlib
+from typing import BinaryIO, Dict, List, NamedTuple
+
+# stream offset, segment number, offset in segment, compressed length, raw length
+INDEX_RECORD = struct.Struct("<QIQII")
+INDEX_FILE = "index.bin"
+DEFAULT_BLOCK_BYTES = 64 * 1024
+DEFAULT_SEGMENT_BYTES = 8 * 1024 * 1024
+DEFAULT_MAX_SEGMENTS = 16
+FLUSH_INTERVAL_SEC = 1.0
+MAX_READ_BYTES = 1024 * 1024
+
+
+class IndexEntry(NamedTuple):
+    offset: int
+    segment: int
+    position: int
+    compressed_len: int
+    raw_len: int
+
+
+def _segment_path(directory: str, segment: int) -> str:
+    return os.path.join(directory, f"segment-{segment:06d}.z")
+
+
+def _read_index(directory: str) -> List[IndexEntry]:
+    path = os.path.join(directory, INDEX_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path, "rb") as f:
+        data = f.read()
+    usable = len(data) - len(data) % INDEX_RECORD.size
+    return [IndexEntry(*item) for item in INDEX_RECORD.iter_unpack(data[:usable])]
+
+
+class SegmentWriter:
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+        max_segments: int = DEFAULT_MAX_SEGMENTS,
+    ) -> None:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        self._directory = directory
+        self._segment_bytes = max(segment_bytes, 4096)
+        self._max_segments = max(max_segments, 1)
+        entries = _read_index(directory)
+        last = entries[-1] if entries else None
+        self._offset = last.offset + last.raw_len if last else 0
+        self._segment = last.segment if last else 1
+        self._segment_file: BinaryIO = open(_segment_path(directory, self._segment), "ab")
+        self._index_file: BinaryIO = open(os.path.join(directory, INDEX_FILE), "ab")
+
+    @property
+    def offset(self) -> int:
+        return self._offset
+
+    def append_block(self, data: bytes) -> None:
+        if not data:
+            return
+        if self._segment_file.tell() >= self._segment_bytes:
+            self._rotate()
+
+        compressed = zlib.compress(data, 6)
+        position = self._segment_file.tell()
+        self._segment_file.write(compressed)
+        self._segment_file.flush()
+        # The index record is written only after its block is on disk, so readers never see
+        # an entry that points past the end of a segment.
+        self._index_file.write(INDEX_RECORD.pack(self._offset, self._segment, position, len(compressed), len(data)))
+        self._index_file.flush()
+        self._offset += len(data)
+
+    def _rotate(self) -> None:
+        self._segment_file.close()
+        self._segment += 1
+        self._segment_file = open(_segment_path(self._directory, self._segment), "ab")
+
+        oldest_kept = self._segment - self._max_segments + 1
+        if oldest_kept <= 1:
+            return
+        for segment in range(oldest_kept - 1, 0, -1):
+            path = _segment_path(self._directory, segment)
+            if not os.path.exists(path):
+                break
+            os.unlink(path)
+
+        index_path = os.path.join(self._directory, INDEX_FILE)
+        kept = [entry for entry in _read_index(self._directory) if entry.segment >= oldest_kept]
+        self._index_file.close()
+        tmp_path = f"{index_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            for entry in kept:
+                f.write(INDEX_RECORD.pack(*entry))
+        os.replace(tmp_path, index_path)
+        self._index_file = open(index_path, "ab")
+
+    def close(self) -> None:
+        self._segment_file.close()
+        self._index_file.close()
+
+
+def _find_entry(index: mmap.mmap, count: int, offset: int) -> int:
+    lo, hi = 0, count - 1
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if INDEX_RECORD.unpack_from(index, mid * INDEX_RECORD.size)[0] <= offset:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def read_range(directory: str, offset: int, length: int) -> Dict[str, object]:
+    empty = {"offset": 0, "next_offset": 0, "first_available": 0, "total": 0, "data": b""}
+    index_path = os.path.join(directory, INDEX_FILE)
+    if not os.path.exists(index_path) or os.path.getsize(index_path) < INDEX_RECORD.size:
+        return empty
+
+    length = min(max(length, 0), MAX_READ_BYTES)
+    segments: Dict[int, mmap.mmap] = {}
+    with open(index_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as index:
+        count = len(index) // INDEX_RECORD.size
+        first = IndexEntry(*INDEX_RECORD.unpack_from(index, 0))
+        last = IndexEntry(*INDEX_RECORD.unpack_from(index, (count - 1) * INDEX_RECORD.size))
+        total = last.offset + last.raw_len
+        if offset < 0:
+            offset = total + offset
+        offset = min(max(offset, first.offset), total)
+
+        chunks: List[bytes] = []
+        remaining = length
+        cursor = offset
+        try:
+            position = _find_entry(index, count, offset)
+            while remaining > 0 and position < count:
+                entry = IndexEntry(*INDEX_RECORD.unpack_from(index, position * INDEX_RECORD.size))
+                segment = segments.get(entry.segment)
+                if segment is None:
+                    try:
+                        with open(_segment_path(directory, entry.segment), "rb") as seg_file:
+                            segment = mmap.mmap(seg_file.fileno(), 0, access=mmap.ACCESS_READ)
+                    except (OSError, ValueError):
+                        break
+                    segments[entry.segment] = segment
+                block = zlib.decompress(segment[entry.position : entry.position + entry.compressed_len])
+                piece = block[cursor - entry.offset : cursor - entry.offset + remaining]
+                chunks.append(piece)
+                cursor += len(piece)
+                remaining -= len(piece)
+                position += 1
+        finally:
+            for segment in segments.values():
+                segment.close()
+
+    return {
+        "offset": offset,
+        "next_offset": cursor,
+        "first_available": first.offset,
+        "total": total,
+        "data": b"".join(chunks),
+    }
+
+
+def run_sink(
+    directory: str,
+    segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+    max_segments: int = DEFAULT_MAX_SEGMENTS,
+    block_bytes: int = DEFAULT_BLOCK_BYTES,
+    fd: int = 0,
+) -> None:
+    writer = SegmentWriter(directory, segment_bytes=segment_bytes, max_segments=max_segments)
+    pending = bytearray()
+    first_pending_at = 0.0
+    try:
+        while True:
+            timeout = None
+            if pending:
+                timeout = max(FLUSH_INTERVAL_SEC - (time.monotonic() - first_pending_at), 0)
+            ready, _, _ = select.select([fd], [], [], timeout)
+            if ready:
+                chunk = os.read(fd, DEFAULT_BLOCK_BYTES)
+                if not chunk:
+                    break
+                if not pending:
+                    first_pending_at = time.monotonic()
+                pending += chunk
+            if pending and (len(pending) >= block_bytes or time.monotonic() - first_pending_at >= FLUSH_INTERVAL_SEC):
+                writer.append_block(bytes(pending))
+                pending.clear()
+    finally:
+        writer.append_block(bytes(pending))
+        writer.close()
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Append stdin to rotating compressed segment files.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sink = sub.add_parser("sink")
+    sink.add_argument("directory")
+    sink.add_argument("--segment-bytes", type=int, default=DEFAULT_SEGMENT_BYTES)
+    sink.add_argument("--max-segments", type=int, default=DEFAULT_MAX_SEGMENTS)
+    args = parser.parse_args(argv)
+
+    run_sink(args.directory, segment_bytes=args.segment_bytes, max_segments=args.max_segments)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+from . import metrics, profiling
+
+T = TypeVar("T")
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+            else:
+                self.shared += 1
+        metrics.count_cache("singleflight", not leader)
+        if not leader:
+            with profiling.span("shared wait"):
+                call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            # Drop the key before waking waiters so the next caller starts a fresh collection.
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def wrap(self, name: str, fn: Callable[..., T]) -> Callable[..., T]:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> T:
+            with profiling.span(name):
+                return self.do((name, args, tuple(sorted(kwargs.items()))), fn, *args, **kwargs)
+
+        return wrapper
+
+
+class AsyncSingleFlight:
+    # Same contract as SingleFlight for coroutines sharing one event loop.
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.executed = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+        future = self._calls.get(key)
+        metrics.count_cache("singleflight", future is not None)
+        if future is not None:
+            self.shared += 1
+            # shield() keeps one cancelled waiter from cancelling the shared collection.
+            with profiling.span("shared wait"):
+                return await asyncio.shield(future)
+
+        self.executed += 1
+        future = asyncio.ensure_future(fn(*args, **kwargs))
+        self._calls[key] = future
+        future.add_done_callback(lambda _done: self._calls.pop(key, None))
+        return await asyncio.shield(future)
+
+    def wrap(self, name: str, fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            with profiling.span(name):
+                return await self.do((name, args, tuple(sorted(kwargs.items()))), fn, *args, **kwargs)
+
+        return wrapper
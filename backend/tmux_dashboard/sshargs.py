@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import os
+from typing import Dict, List
+
+SSH_EXECUTABLES = {"ssh", "autossh"}
+# ssh(1) options that take an argument, either attached ("-L8080:db:5432") or as the next word.
+_ARGUMENT_FLAGS = set("BbcDEeFIiJLlmOoPpQRSWw")
+_FORWARD_KINDS = {"L": "local", "R": "remote", "D": "dynamic", "W": "stdio"}
+
+Forward = Dict[str, object]
+
+
+def is_ssh(argv: List[str]) -> bool:
+    return bool(argv) and os.path.basename(argv[0]) in SSH_EXECUTABLES
+
+
+def _split_spec(spec: str) -> List[str]:
+    # Colon separated, except inside brackets: "[::1]:8080:db:5432".
+    fields: List[str] = []
+    current = ""
+    bracketed = False
+    for char in spec:
+        if char == "[":
+            bracketed = True
+        elif char == "]":
+            bracketed = False
+        elif char == ":" and not bracketed:
+            fields.append(current)
+            current = ""
+        else:
+            current += char
+    fields.append(current)
+    return fields
+
+
+def _host_port(host: str, port: str) -> str:
+    return f"[{host}]:{port}" if ":" in host else f"{host}:{port}"
+
+
+def _port(value: str) -> int | None:
+    return int(value) if value.isdigit() else None
+
+
+def parse_forward(flag: str, spec: str) -> Forward:
+    fields = _split_spec(spec)
+    forward: Forward = {"kind": _FORWARD_KINDS[flag], "bind_address": "", "port": None, "target": ""}
+    if flag == "W":
+        forward["target"] = spec
+    elif flag == "D" or (flag == "R" and len(fields) <= 2 and _port(fields[-1]) is not None):
+        # -D [bind:]port and the dynamic form of -R [bind:]port listen without a fixed target.
+        forward["bind_address"] = fields[0] if len(fields) == 2 else ""
+        forward["port"] = _port(fields[-1])
+    elif len(fields) >= 4:
+        forward["bind_address"] = fields[0]
+        forward["port"] = _port(fields[1])
+        forward["target"] = _host_port(fields[2], fields[3])
+    elif len(fields) == 3:
+        forward["port"] = _port(fields[0])
+        forward["target"] = _host_port(fields[1], fields[2])
+    else:
+        # port:socket, socket:host:port and socket:socket forms keep the raw side as target.
+        forward["port"] = _port(fields[0])
+        forward["target"] = fields[-1]
+    return forward
+
+
+def parse_forwards(argv: List[str]) -> List[Forward]:
+    if not is_ssh(argv):
+        return []
+    forwards: List[Forward] = []
+    positional = 0
+    index = 1
+    while index < len(argv):
+        arg = argv[index]
+        index += 1
+        if arg == "--":
+            break
+        if not arg.startswith("-") or arg == "-":
+            # ssh keeps reading options after the destination; the next word starts the remote command.
+            positional += 1
+            if positional > 1:
+                break
+            continue
+        for position in range(1, len(arg)):
+            flag = arg[position]
+            if flag not in _ARGUMENT_FLAGS:
+                continue
+            value = arg[position + 1 :]
+            if not value and index < len(argv):
+                value = argv[index]
+                index += 1
+            if flag in _FORWARD_KINDS and value:
+                forwards.append(parse_forward(flag, value))
+            break
+    return forwards
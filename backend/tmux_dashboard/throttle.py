@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from collections import OrderedDict, deque
+from typing import Deque, Protocol
+
+from .config import AppConfig
+
+THROTTLE_MAX_ENTRIES = 10000
+
+
+class ThrottleStore(Protocol):
+    def is_locked(self, key: str, now_ts: float) -> bool: ...
+
+    def register_failure(self, key: str, now_ts: float, limit: int, window_sec: int, lock_sec: int) -> bool: ...
+
+    def reset(self, key: str) -> None: ...
+
+    def revoke(self, key: str, expires_at: float, now_ts: float) -> None: ...
+
+    def is_revoked(self, key: str, now_ts: float) -> bool: ...
+
+
+class MemoryThrottleStore:
+    def __init__(self, max_entries: int = THROTTLE_MAX_ENTRIES) -> None:
+        self._max_entries = max(max_entries, 1)
+        self._lock = threading.Lock()
+        # key -> (recent failure timestamps, locked until); ordered by last activity.
+        self._entries: OrderedDict[str, tuple[Deque[float], float]] = OrderedDict()
+        # Revoked token hash -> token expiry.
+        self._revoked: dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def is_locked(self, key: str, now_ts: float) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[1] > now_ts
+
+    def register_failure(self, key: str, now_ts: float, limit: int, window_sec: int, lock_sec: int) -> bool:
+        window_start = now_ts - window_sec
+        with self._lock:
+            attempts, lock_until = self._entries.pop(key, (deque(), 0.0))
+            attempts.append(now_ts)
+            while attempts and attempts[0] < window_start:
+                attempts.popleft()
+            if len(attempts) >= limit:
+                lock_until = now_ts + lock_sec
+                attempts.clear()
+            self._entries[key] = (attempts, lock_until)
+            self._evict(now_ts, window_start)
+            return lock_until > now_ts
+
+    def _evict(self, now_ts: float, window_start: float) -> None:
+        # Least recently active keys sit at the front: drop them once they can no longer
+        # affect a decision, and unconditionally when over the hard cap.
+        while self._entries:
+            key, (attempts, lock_until) = next(iter(self._entries.items()))
+            expired = lock_until <= now_ts and (not attempts or attempts[-1] < window_start)
+            if not expired and len(self._entries) <= self._max_entries:
+                break
+            del self._entries[key]
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def revoke(self, key: str, expires_at: float, now_ts: float) -> None:
+        with self._lock:
+            # Entries leave once the token would have expired anyway.
+            self._revoked = {k: exp for k, exp in self._revoked.items() if exp > now_ts}
+            self._revoked[key] = expires_at
+
+    def is_revoked(self, key: str, now_ts: float) -> bool:
+        with self._lock:
+            return self._revoked.get(key, 0.0) > now_ts
+
+
+class SqliteThrottleStore:
+    def __init__(self, path: str, max_entries: int = THROTTLE_MAX_ENTRIES) -> None:
+        self._path = path
+        self._max_entries = max(max_entries, 1)
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS login_attempts (key TEXT NOT NULL, ts REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS login_attempts_key ON login_attempts (key, ts)")
+            conn.execute("CREATE INDEX IF NOT EXISTS login_attempts_ts ON login_attempts (ts)")
+            conn.execute("CREATE TABLE IF NOT EXISTS login_locks (key TEXT PRIMARY KEY, until REAL NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS revoked_tokens (key TEXT PRIMARY KEY, until REAL NOT NULL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def is_locked(self, key: str, now_ts: float) -> bool:
+        row = self._connect().execute("SELECT until FROM login_locks WHERE key = ?", (key,)).fetchone()
+        return row is not None and row[0] > now_ts
+
+    def register_failure(self, key: str, now_ts: float, limit: int, window_sec: int, lock_sec: int) -> bool:
+        window_start = now_ts - window_sec
+        conn = self._connect()
+        # BEGIN IMMEDIATE serializes the read-count-lock sequence across workers.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM login_attempts WHERE ts < ?", (window_start,))
+            conn.execute("DELETE FROM login_locks WHERE until <= ?", (now_ts,))
+            conn.execute("INSERT INTO login_attempts (key, ts) VALUES (?, ?)", (key, now_ts))
+            count = conn.execute("SELECT COUNT(*) FROM login_attempts WHERE key = ?", (key,)).fetchone()[0]
+            locked = count >= limit
+            if locked:
+                conn.execute(
+                    "INSERT INTO login_locks (key, until) VALUES (?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET until = excluded.until",
+                    (key, now_ts + lock_sec),
+                )
+                conn.execute("DELETE FROM login_attempts WHERE key = ?", (key,))
+            conn.execute(
+                "DELETE FROM login_attempts WHERE rowid IN "
+                "(SELECT rowid FROM login_attempts ORDER BY ts DESC LIMIT -1 OFFSET ?)",
+                (self._max_entries,),
+            )
+            conn.execute(
+                "DELETE FROM login_locks WHERE key IN "
+                "(SELECT key FROM login_locks ORDER BY until DESC LIMIT -1 OFFSET ?)",
+                (self._max_entries,),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return locked or self.is_locked(key, now_ts)
+
+    def reset(self, key: str) -> None:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM login_attempts WHERE key = ?", (key,))
+            conn.execute("DELETE FROM login_locks WHERE key = ?", (key,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def revoke(self, key: str, expires_at: float, now_ts: float) -> None:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM revoked_tokens WHERE until <= ?", (now_ts,))
+            conn.execute(
+                "INSERT INTO revoked_tokens (key, until) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET until = excluded.until",
+                (key, expires_at),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def is_revoked(self, key: str, now_ts: float) -> bool:
+        row = self._connect().execute("SELECT until FROM revoked_tokens WHERE key = ?", (key,)).fetchone()
+        return row is not None and row[0] > now_ts
+
+
+def create_throttle_store(cfg: AppConfig) -> ThrottleStore:
+    if cfg.login_throttle_store == "sqlite":
+        return SqliteThrottleStore(cfg.login_throttle_path, max_entries=cfg.login_throttle_max_entries)
+    return MemoryThrottleStore(max_entries=cfg.login_throttle_max_entries)
@@ -18,3 +18,13 @@ export function withAuthHeader(token: string, base: Record<string, string> = {})
   }
   return { ...base, Authorization: `Bearer ${token}` };
 }
+
+// Keeps the backend's Retry-After on 503 so clients back off by the server's estimate.
+export function proxyHeaders(resp: Response): Record<string, string> {
+  const headers: Record<string, string> = { "Content-Type": resp.headers.get("content-type") ?? "application/json" };
+  const retryAfter = resp.headers.get("retry-after");
+  if (retryAfter) {
+    headers["Retry-After"] = retryAfter;
+  }
+  return headers;
+}
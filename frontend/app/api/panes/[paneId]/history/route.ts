@@ -0,0 +1,26 @@
+import { NextRequest, NextResponse } from "next/server";
+import { backendUrl, getAuthToken, withAuthHeader } from "../../../_shared";
+
+export async function GET(req: NextRequest, { params }: { params: Promise<{ paneId: string }> }) {
+  const { paneId } = await params;
+  const query = req.nextUrl.searchParams.toString();
+  const url = backendUrl(`/api/panes/${encodeURIComponent(paneId)}/history${query ? `?${query}` : ""}`);
+  const token = getAuthToken(req);
+
+  try {
+    const headers = withAuthHeader(token);
+    const resp = await fetch(url, { cache: "no-store", headers });
+    const passthrough: Record<string, string> = {
+      "Content-Type": resp.headers.get("content-type") ?? "text/plain",
+    };
+    const disposition = resp.headers.get("content-disposition");
+    if (disposition) {
+      passthrough["Content-Disposition"] = disposition;
+    }
+    // Pass the backend body through as a stream so large scrollbacks are never buffered here.
+    return new NextResponse(resp.body, { status: resp.status, headers: passthrough });
+  } catch (error) {
+    const message = error instanceof Error ? error.message : "network error";
+    return NextResponse.json({ ok: false, error: `backend request failed: ${message}` }, { status: 502 });
+  }
+}
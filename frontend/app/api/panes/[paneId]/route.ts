@@ -1,9 +1,10 @@
 import { NextRequest, NextResponse } from "next/server";
-import { backendUrl, getAuthToken, withAuthHeader } from "../../_shared";
+import { backendUrl, getAuthToken, proxyHeaders, withAuthHeader } from "../../_shared";
 
 export async function GET(req: NextRequest, { params }: { params: Promise<{ paneId: string }> }) {
   const { paneId } = await params;
-  const url = backendUrl(`/api/panes/${encodeURIComponent(paneId)}`);
+  const query = req.nextUrl.searchParams.toString();
+  const url = backendUrl(`/api/panes/${encodeURIComponent(paneId)}${query ? `?${query}` : ""}`);
   const token = getAuthToken(req);
 
   try {
@@ -13,7 +14,7 @@ export async function GET(req: NextRequest, { params }: { params: Promise<{ pane
     const text = await resp.text();
     return new NextResponse(text, {
       status: resp.status,
-      headers: { "Content-Type": resp.headers.get("content-type") ?? "application/json" },
+      headers: proxyHeaders(resp),
     });
   } catch (error) {
     const message = error instanceof Error ? error.message : "network error";
@@ -1,5 +1,5 @@
 import { NextRequest, NextResponse } from "next/server";
-import { backendUrl, getAuthToken, withAuthHeader } from "../_shared";
+import { backendUrl, getAuthToken, proxyHeaders, withAuthHeader } from "../_shared";
 
 export async function GET(req: NextRequest) {
   const url = backendUrl("/api/snapshot");
@@ -11,7 +11,7 @@ export async function GET(req: NextRequest) {
     const text = await resp.text();
     return new NextResponse(text, {
       status: resp.status,
-      headers: { "Content-Type": resp.headers.get("content-type") ?? "application/json" },
+      headers: proxyHeaders(resp),
     });
   } catch (error) {
     const message = error instanceof Error ? error.message : "network error";
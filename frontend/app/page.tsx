@@ -32,12 +32,22 @@ import HubIcon from "@mui/icons-material/Hub";
 import LanIcon from "@mui/icons-material/Lan";
 import BoltIcon from "@mui/icons-material/Bolt";
 import LogoutIcon from "@mui/icons-material/Logout";
-import { API_LABEL, fetchSession, fetchSnapshot, login, logout, type Snapshot } from "../lib/api";
+import {
+  API_LABEL,
+  BusyError,
+  DEFAULT_POLL_MS,
+  fetchSession,
+  fetchSnapshot,
+  login,
+  logout,
+  pollDelay,
+  type PaneOwner,
+  type Snapshot,
+  type SshForward,
+} from "../lib/api";
 import { dashboardTheme } from "../lib/theme";
 import { titleIcon } from "../lib/titleIcon";
 
-const POLL_MS = 3000;
-
 function sessionOrder(name: string): [number, string] {
   const m = name.match(/\d+/);
   if (!m) {
@@ -46,6 +56,15 @@ function sessionOrder(name: string): [number, string] {
   return [Number.parseInt(m[0], 10), name];
 }
 
+function ownerLabel(pane: PaneOwner | null): string {
+  return pane ? ` · ${pane.session}:${pane.window_index}.${pane.pane_index}` : "";
+}
+
+function forwardLabel(forward: SshForward): string {
+  const listen = [forward.bind_address, forward.port ?? ""].filter((part) => part !== "").join(":");
+  return forward.target ? `${forward.kind} ${listen} → ${forward.target}` : `${forward.kind} ${listen}`;
+}
+
 export default function Page() {
   const [snapshot, setSnapshot] = useState<Snapshot | null>(null);
   const [error, setError] = useState<string>("");
@@ -61,20 +80,26 @@ export default function Page() {
   const [selectedWindowId, setSelectedWindowId] = useState("");
   const router = useRouter();
 
-  async function load() {
+  async function load(): Promise<number> {
     try {
       setError("");
       const data = await fetchSnapshot();
       setSnapshot(data);
+      return pollDelay(data.next_poll_ms);
     } catch (e) {
+      if (e instanceof BusyError) {
+        // Shed by the backend: keep the last data on screen and retry when it says to.
+        return e.retryAfterMs;
+      }
       const message = e instanceof Error ? e.message : "failed to fetch snapshot";
       if (message === "unauthorized") {
         setIsAuthenticated(false);
         setCurrentUser("");
         setSnapshot(null);
-        return;
+        return DEFAULT_POLL_MS;
       }
       setError(message);
+      return DEFAULT_POLL_MS;
     }
   }
 
@@ -95,9 +120,19 @@ export default function Page() {
     if (!isAuthenticated) {
       return;
     }
-    load();
-    const timer = window.setInterval(load, POLL_MS);
-    return () => window.clearInterval(timer);
+    let cancelled = false;
+    let timer = 0;
+    async function poll() {
+      const delay = await load();
+      if (!cancelled) {
+        timer = window.setTimeout(poll, delay);
+      }
+    }
+    void poll();
+    return () => {
+      cancelled = true;
+      window.clearTimeout(timer);
+    };
   }, [isAuthenticated]);
 
   async function onLogin(e: FormEvent) {
@@ -297,6 +332,9 @@ export default function Page() {
                   {!snapshot ? <Typography>loading...</Typography> : null}
                   {snapshot?.tmux.available === false ? <Alert severity="warning">tmux not available</Alert> : null}
                   {snapshot?.tmux.running === false ? <Alert severity="info">{snapshot.tmux.error || "tmux server is not running"}</Alert> : null}
+                  {snapshot?.tmux.stale || snapshot?.network.stale ? (
+                    <Alert severity="warning">tmux or network commands are not responding; showing the last known state</Alert>
+                  ) : null}
 
                   <Stack spacing={1.5} sx={{ mt: 1.5 }}>
                     <Box
@@ -417,7 +455,7 @@ export default function Page() {
                   <List dense>
                     {snapshot?.network.listening_servers.map((item, idx) => (
                       <ListItem key={`${item.pid}-${idx}`} disableGutters>
-                        <ListItemText primary={`${item.command} (${item.pid})`} secondary={`${item.user} ${item.address}`} />
+                        <ListItemText primary={`${item.command} (${item.pid})`} secondary={`${item.user} ${item.address}${ownerLabel(item.pane)}`} />
                       </ListItem>
                     ))}
                   </List>
@@ -428,7 +466,7 @@ export default function Page() {
                   <List dense>
                     {snapshot?.network.ssh_connections.map((item) => (
                       <ListItem key={item.pid} disableGutters>
-                        <ListItemText primary={`pid ${item.pid}`} secondary={item.command} />
+                        <ListItemText primary={`pid ${item.pid}${ownerLabel(item.pane)}`} secondary={item.command} />
                       </ListItem>
                     ))}
                   </List>
@@ -439,7 +477,10 @@ export default function Page() {
                   <List dense>
                     {snapshot?.network.ssh_tunnels.map((item) => (
                       <ListItem key={item.pid} disableGutters>
-                        <ListItemText primary={`pid ${item.pid}`} secondary={item.command} />
+                        <ListItemText
+                          primary={`pid ${item.pid}${ownerLabel(item.pane)}`}
+                          secondary={item.forwards.map(forwardLabel).join(", ") || item.command}
+                        />
                       </ListItem>
                     ))}
                   </List>
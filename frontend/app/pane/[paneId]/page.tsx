@@ -31,13 +31,27 @@ import {
 import ExpandMoreIcon from "@mui/icons-material/ExpandMore";
 import TerminalIcon from "@mui/icons-material/Terminal";
 import LogoutIcon from "@mui/icons-material/Logout";
-import { API_LABEL, fetchPaneDetail, fetchSession, fetchSnapshot, logout, postAction, type PaneDetail } from "../../../lib/api";
+import {
+  API_LABEL,
+  BusyError,
+  DEFAULT_POLL_MS,
+  fetchPaneDetail,
+  fetchPaneScreen,
+  fetchSession,
+  fetchSnapshot,
+  logout,
+  pollDelay,
+  postAction,
+  type ActionState,
+  type PaneDetail,
+  type Snapshot,
+} from "../../../lib/api";
+import { applyScreenFrame, ScreenRows, type ScreenState } from "../../../lib/screen";
 import { dashboardTheme } from "../../../lib/theme";
 import { titleIcon } from "../../../lib/titleIcon";
 
-const POLL_MS = 3000;
-
 type PaneTab = PaneDetail["pane"];
+type SessionState = Snapshot["tmux"]["sessions"][number];
 type WindowTab = {
   id: string;
   index: number;
@@ -67,57 +81,120 @@ export default function PanePage() {
   const [isKeysFocused, setIsKeysFocused] = useState(false);
   const [paneInfoExpanded, setPaneInfoExpanded] = useState(true);
   const keysInputRef = useRef<HTMLTextAreaElement | null>(null);
+  const lastCaptureRef = useRef<{ paneId: string; captureToken: string; output: string } | null>(null);
+  const [screenMode, setScreenMode] = useState(false);
+  const [screen, setScreen] = useState<ScreenState | null>(null);
+  const screenRef = useRef<ScreenState | null>(null);
 
   const allowed = useMemo(() => new Set(allowedActions), [allowedActions]);
 
-  async function load(targetPaneId: string) {
+  function applyLayout(session: SessionState | undefined, current: PaneDetail, targetPaneId: string) {
+    const windows: WindowTab[] = (session?.windows ?? []).map((window) => ({
+      id: window.id,
+      index: window.index,
+      name: window.name,
+      active: window.active,
+      panes: window.panes as PaneTab[],
+    }));
+    const hasCurrentWindow = windows.some((window) => window.id === current.window.id);
+    if (!hasCurrentWindow) {
+      windows.push({
+        id: current.window.id,
+        index: current.window.index,
+        name: current.window.name,
+        active: current.window.active,
+        panes: [current.pane],
+      });
+    }
+    setSessionWindows(windows);
+
+    const currentWindow = windows.find((window) => window.id === current.window.id);
+    const panes = currentWindow?.panes ?? [current.pane];
+    setWindowPanes(panes);
+
+    if (!panes.some((pane) => pane.id === targetPaneId)) {
+      setActivePaneId(panes[0]?.id ?? targetPaneId);
+    }
+  }
+
+  // Structural actions return the session as tmux listed it right after the action, so the
+  // tabs update without another snapshot; the poll loop picks up the pane output as usual.
+  function applyActionState(state: ActionState) {
+    const windows = state.session?.windows ?? [];
+    const window =
+      windows.find((item) => item.id === detail?.window.id) ??
+      windows.find((item) => item.id === state.window_id) ??
+      windows[0];
+    if (!detail || !window) {
+      // The session (or its last window) is gone.
+      router.push("/");
+      return;
+    }
+    const panes = window.panes as PaneTab[];
+    const current: PaneDetail = {
+      ...detail,
+      window: { ...detail.window, id: window.id, index: window.index, name: window.name, active: window.active },
+      pane: panes.find((pane) => pane.id === detail.pane.id) ?? panes[0] ?? detail.pane,
+    };
+    applyLayout(state.session ?? undefined, current, state.pane_id || current.pane.id);
+    // A selected or newly split pane becomes the one shown.
+    if (state.pane_id !== activePaneId && panes.some((pane) => pane.id === state.pane_id)) {
+      setActivePaneId(state.pane_id);
+    }
+  }
+
+  async function load(targetPaneId: string, refreshLayout = true): Promise<number> {
     if (!targetPaneId) {
       setError("paneId is required");
-      return;
+      return DEFAULT_POLL_MS;
     }
 
     try {
       setError("");
-      const [paneDetail, snapshot] = await Promise.all([fetchPaneDetail(targetPaneId), fetchSnapshot()]);
+      // Send the last capture token so the backend can skip capture-pane when nothing changed.
+      const cached = lastCaptureRef.current?.paneId === targetPaneId ? lastCaptureRef.current : null;
+      // Screen mode asks only for rows changed since the last frame and merges them locally.
+      const previousScreen = screenRef.current?.paneId === targetPaneId ? screenRef.current : null;
+      const [fetched, snapshot, screenFrame] = await Promise.all([
+        fetchPaneDetail(targetPaneId, cached?.captureToken),
+        refreshLayout ? fetchSnapshot() : Promise.resolve(null),
+        screenMode ? fetchPaneScreen(targetPaneId, previousScreen?.frame) : Promise.resolve(null),
+      ]);
+      if (screenFrame) {
+        screenRef.current = applyScreenFrame(previousScreen, screenFrame);
+        setScreen(screenRef.current);
+      }
+      const paneDetail = fetched.unchanged && cached ? { ...fetched, output: cached.output } : fetched;
+      lastCaptureRef.current = {
+        paneId: targetPaneId,
+        captureToken: paneDetail.capture_token ?? "",
+        output: paneDetail.output,
+      };
       setDetail(paneDetail);
       setWindowTitle(paneDetail.window.name || "pane detail");
-      setAllowedActions(snapshot.allowed_actions);
-
-      const session = snapshot.tmux.sessions.find((item) => item.name === paneDetail.session.name);
-      const windows: WindowTab[] = (session?.windows ?? []).map((window) => ({
-        id: window.id,
-        index: window.index,
-        name: window.name,
-        active: window.active,
-        panes: window.panes as PaneTab[],
-      }));
-      const hasCurrentWindow = windows.some((window) => window.id === paneDetail.window.id);
-      if (!hasCurrentWindow) {
-        windows.push({
-          id: paneDetail.window.id,
-          index: paneDetail.window.index,
-          name: paneDetail.window.name,
-          active: paneDetail.window.active,
-          panes: [paneDetail.pane],
-        });
-      }
-      setSessionWindows(windows);
-
-      const currentWindow = windows.find((window) => window.id === paneDetail.window.id);
-      const panes = currentWindow?.panes ?? [paneDetail.pane];
-      setWindowPanes(panes);
-
-      if (!panes.some((pane) => pane.id === targetPaneId)) {
-        setActivePaneId(panes[0]?.id ?? targetPaneId);
+      if (snapshot) {
+        setAllowedActions(snapshot.allowed_actions);
+        applyLayout(
+          snapshot.tmux.sessions.find((item) => item.name === paneDetail.session.name),
+          paneDetail,
+          targetPaneId
+        );
       }
+      // The pane hint drives this page: it tightens while the pane is producing output.
+      return pollDelay(paneDetail.next_poll_ms);
     } catch (e) {
+      if (e instanceof BusyError) {
+        // Shed by the backend: keep the last data on screen and retry when it says to.
+        return e.retryAfterMs;
+      }
       const message = e instanceof Error ? e.message : "failed to load pane";
       if (message === "unauthorized") {
         setIsAuthenticated(false);
         setCurrentUser("");
-        return;
+        return DEFAULT_POLL_MS;
       }
       setError(message);
+      return DEFAULT_POLL_MS;
     }
   }
 
@@ -148,15 +225,21 @@ export default function PanePage() {
       return;
     }
 
-    void load(targetPaneId);
-    const timer = window.setInterval(() => {
-      if (!isKeysFocused) {
-        void load(targetPaneId);
+    let cancelled = false;
+    let timer = 0;
+    async function poll(initial: boolean) {
+      const delay = initial || !isKeysFocused ? await load(targetPaneId) : DEFAULT_POLL_MS;
+      if (!cancelled) {
+        timer = window.setTimeout(() => void poll(false), delay);
       }
-    }, POLL_MS);
+    }
+    void poll(true);
 
-    return () => window.clearInterval(timer);
-  }, [isAuthenticated, activePaneId, paneIdParam, isKeysFocused]);
+    return () => {
+      cancelled = true;
+      window.clearTimeout(timer);
+    };
+  }, [isAuthenticated, activePaneId, paneIdParam, isKeysFocused, screenMode]);
 
   async function runAction(action: string, payload: Record<string, unknown>) {
     const resolvedTargetPaneId = String(
@@ -175,11 +258,16 @@ export default function PanePage() {
     try {
       setBusy(true);
       setError("");
-      await postAction(action, normalizedPayload);
+      const result = await postAction(action, normalizedPayload);
+      if (result.state) {
+        applyActionState(result.state);
+        return;
+      }
       const rawTargetPaneId =
         normalizedPayload.target_pane ?? (activePaneId || detail?.pane.id || paneIdParam);
       const targetPaneId = String(rawTargetPaneId);
-      await load(targetPaneId);
+      // Keys only change the pane's output; the window and pane tabs stay as they are.
+      await load(targetPaneId, false);
     } catch (e) {
       const message = e instanceof Error ? e.message : "action failed";
       if (message === "unauthorized") {
@@ -461,7 +549,12 @@ export default function PanePage() {
                   </AccordionDetails>
                 </Accordion>
 
-                <Typography variant="h6" sx={{ mb: 1 }}>Current Output</Typography>
+                <Stack direction="row" alignItems="center" justifyContent="space-between" sx={{ mb: 1 }}>
+                  <Typography variant="h6">Current Output</Typography>
+                  <Button size="small" variant={screenMode ? "contained" : "outlined"} onClick={() => setScreenMode((value) => !value)}>
+                    {screenMode ? "Color screen" : "Scrollback"}
+                  </Button>
+                </Stack>
                 <Paper
                   variant="outlined"
                   sx={{
@@ -469,17 +562,17 @@ export default function PanePage() {
                     minWidth: 0,
                     fontFamily: "monospace",
                     fontSize: 13,
-                    whiteSpace: "pre-wrap",
-                    overflowWrap: "anywhere",
-                    wordBreak: "break-word",
+                    whiteSpace: screenMode ? "pre" : "pre-wrap",
+                    overflowWrap: screenMode ? "normal" : "anywhere",
+                    wordBreak: screenMode ? "normal" : "break-word",
                     maxHeight: 560,
-                    overflowX: "hidden",
+                    overflowX: screenMode ? "auto" : "hidden",
                     overflowY: "auto",
                     background: "#FCFDFF",
                     mb: 2,
                   }}
                 >
-                  {detail.output || "(empty)"}
+                  {screenMode && screen?.paneId === detail.pane.id ? <ScreenRows screen={screen} /> : detail.output || "(empty)"}
                 </Paper>
 
                 <Box
@@ -16,13 +16,41 @@ function buildApiUrl(path: string): string {
   return `${API_BASE}${path}`;
 }
 
+// The tmux pane whose process tree a listener or ssh process belongs to.
+export type PaneOwner = {
+  pane_id: string;
+  session: string;
+  window_id: string;
+  window_index: number;
+  pane_index: number;
+};
+
+export type SshForward = {
+  kind: "local" | "remote" | "dynamic" | "stdio";
+  bind_address: string;
+  port: number | null;
+  target: string;
+};
+
 export type Snapshot = {
   allowed_actions: string[];
   tmux: {
     available: boolean;
     running: boolean;
     error: string;
+    stale?: boolean;
+    top_panes?: Array<{
+      pane_id: string;
+      session: string;
+      window_id: string;
+      current_command: string;
+      cpu_percent: number;
+      rss_kb: number;
+      descendants: number;
+      top_command: string;
+    }>;
     sessions: Array<{
+      id: string;
       name: string;
       window_count: number;
       attached: boolean;
@@ -40,22 +68,49 @@ export type Snapshot = {
           current_command: string;
           current_path: string;
           title: string;
+          fingerprint?: string;
           process: {
             pid?: string;
             ppid?: string;
             user?: string;
             elapsed?: string;
+            cpu_percent?: string;
+            rss_kb?: string;
             command?: string;
           };
+          resources?: {
+            cpu_percent: number;
+            rss_kb: number;
+            descendants: number;
+            top_command: string;
+          };
         }>;
       }>;
     }>;
   };
   network: {
-    listening_servers: Array<{ command: string; pid: string; user: string; address: string }>;
-    ssh_connections: Array<{ pid: string; ppid: string; user: string; command: string }>;
-    ssh_tunnels: Array<{ pid: string; user: string; command: string; kind: string }>;
+    listening_servers: Array<{
+      command: string;
+      pid: string;
+      user: string;
+      address: string;
+      port: number | null;
+      pane: PaneOwner | null;
+    }>;
+    ssh_connections: Array<{ pid: string; ppid: string; user: string; command: string; pane: PaneOwner | null }>;
+    ssh_tunnels: Array<{
+      pid: string;
+      user: string;
+      command: string;
+      kind: string;
+      forwards: SshForward[];
+      pane: PaneOwner | null;
+    }>;
+    events?: Array<{ seq: number; kind: string; pid: string; command: string; address?: string; port?: number | null }>;
+    event_seq?: number;
+    stale?: boolean;
   };
+  next_poll_ms?: number;
 };
 
 export type AuthSession = {
@@ -82,17 +137,58 @@ export type PaneDetail = {
     current_command: string;
     current_path: string;
     title: string;
+    fingerprint?: string;
     process: {
       pid?: string;
       ppid?: string;
       user?: string;
       elapsed?: string;
+      cpu_percent?: string;
+      rss_kb?: string;
       command?: string;
     };
+    resources?: {
+      cpu_percent: number;
+      rss_kb: number;
+      descendants: number;
+      top_command: string;
+    };
   };
   output: string;
+  unchanged?: boolean;
+  capture_token?: string;
+  stale?: boolean;
+  next_poll_ms?: number;
 };
 
+export const DEFAULT_POLL_MS = 3000;
+
+// The backend sends next_poll_ms from recent change rate and load; older backends omit it.
+export function pollDelay(hint?: number): number {
+  if (typeof hint !== "number" || !Number.isFinite(hint) || hint <= 0) {
+    return DEFAULT_POLL_MS;
+  }
+  return Math.min(Math.max(hint, 500), 60000);
+}
+
+// Thrown for 503 from backend admission control; the poll loop waits retryAfterMs and tries again.
+export class BusyError extends Error {
+  constructor(
+    message: string,
+    readonly retryAfterMs: number,
+  ) {
+    super(message);
+  }
+}
+
+function busyError(resp: Response, url: string): BusyError | null {
+  if (resp.status !== 503) {
+    return null;
+  }
+  const seconds = Number.parseInt(resp.headers.get("retry-after") ?? "", 10);
+  return new BusyError(`server busy (${url})`, Number.isFinite(seconds) && seconds > 0 ? seconds * 1000 : DEFAULT_POLL_MS);
+}
+
 export async function fetchSnapshot(): Promise<Snapshot> {
   const url = buildApiUrl("/snapshot");
   let resp: Response;
@@ -106,14 +202,15 @@ export async function fetchSnapshot(): Promise<Snapshot> {
     if (resp.status === 401) {
       throw new Error("unauthorized");
     }
-    throw new Error(`snapshot request failed: ${resp.status} (${url})`);
+    throw busyError(resp, url) ?? new Error(`snapshot request failed: ${resp.status} (${url})`);
   }
   return (await resp.json()) as Snapshot;
 }
 
-export async function fetchPaneDetail(paneId: string): Promise<PaneDetail> {
+export async function fetchPaneDetail(paneId: string, since?: string): Promise<PaneDetail> {
   const encodedPaneId = encodeURIComponent(paneId);
-  const url = buildApiUrl(`/panes/${encodedPaneId}`);
+  const query = since ? `?since=${encodeURIComponent(since)}` : "";
+  const url = buildApiUrl(`/panes/${encodedPaneId}${query}`);
   let resp: Response;
   try {
     resp = await fetch(url, { cache: "no-store" });
@@ -125,17 +222,72 @@ export async function fetchPaneDetail(paneId: string): Promise<PaneDetail> {
     if (resp.status === 401) {
       throw new Error("unauthorized");
     }
-    throw new Error(`pane detail request failed: ${resp.status} (${url})`);
+    throw busyError(resp, url) ?? new Error(`pane detail request failed: ${resp.status} (${url})`);
   }
   const json = (await resp.json()) as { ok: boolean } & PaneDetail;
   return {
     session: json.session,
     window: json.window,
     pane: json.pane,
-    output: json.output,
+    output: json.output ?? "",
+    unchanged: Boolean(json.unchanged),
+    capture_token: json.capture_token,
+    stale: Boolean(json.stale),
+    next_poll_ms: json.next_poll_ms,
   };
 }
 
+export type ScreenSpan = {
+  text: string;
+  fg?: number | string;
+  bg?: number | string;
+  bold?: boolean;
+  dim?: boolean;
+  italic?: boolean;
+  underline?: boolean;
+  blink?: boolean;
+  reverse?: boolean;
+  hidden?: boolean;
+  strike?: boolean;
+};
+
+export type PaneScreenFrame = {
+  pane_id: string;
+  frame: string;
+  full: boolean;
+  width: number;
+  height: number;
+  cursor: { x: number; y: number; visible: boolean };
+  rows: Array<{ y: number; spans: ScreenSpan[] }>;
+};
+
+export async function fetchPaneScreen(paneId: string, since?: string): Promise<PaneScreenFrame> {
+  const query = since ? `?since=${encodeURIComponent(since)}` : "";
+  const url = buildApiUrl(`/panes/${encodeURIComponent(paneId)}/screen${query}`);
+  let resp: Response;
+  try {
+    resp = await fetch(url, { cache: "no-store" });
+  } catch (error) {
+    const msg = error instanceof Error ? error.message : "network error";
+    throw new Error(`pane screen request failed: ${msg} (${url})`);
+  }
+  if (!resp.ok) {
+    if (resp.status === 401) {
+      throw new Error("unauthorized");
+    }
+    throw new Error(`pane screen request failed: ${resp.status} (${url})`);
+  }
+  return (await resp.json()) as PaneScreenFrame;
+}
+
+// Structural actions return the affected session as listed right after the action ran.
+export type ActionState = {
+  session_id: string;
+  window_id: string;
+  pane_id: string;
+  session: Snapshot["tmux"]["sessions"][number] | null;
+};
+
 export async function postAction(action: string, payload: Record<string, unknown>) {
   const url = buildApiUrl(`/actions/${action}`);
   let resp: Response;
@@ -155,6 +307,7 @@ export async function postAction(action: string, payload: Record<string, unknown
     stderr?: string;
     stdout?: string;
     returncode?: number;
+    state?: ActionState;
   };
   if (!resp.ok) {
     if (resp.status === 401) {
@@ -0,0 +1,102 @@
+import { CSSProperties, JSX } from "react";
+import type { PaneScreenFrame, ScreenSpan } from "./api";
+
+export type ScreenState = {
+  paneId: string;
+  frame: string;
+  width: number;
+  height: number;
+  cursor: PaneScreenFrame["cursor"];
+  rows: ScreenSpan[][];
+};
+
+const BASE_COLORS = [
+  "#000000",
+  "#cd0000",
+  "#00cd00",
+  "#cdcd00",
+  "#0000ee",
+  "#cd00cd",
+  "#00cdcd",
+  "#e5e5e5",
+  "#7f7f7f",
+  "#ff0000",
+  "#00ff00",
+  "#ffff00",
+  "#5c5cff",
+  "#ff00ff",
+  "#00ffff",
+  "#ffffff",
+];
+const DEFAULT_FG = "#1f2933";
+const DEFAULT_BG = "#FCFDFF";
+
+function paletteColor(color: number | string | undefined): string | undefined {
+  if (color === undefined || typeof color === "string") {
+    return color;
+  }
+  if (color < 16) {
+    return BASE_COLORS[color];
+  }
+  if (color < 232) {
+    const index = color - 16;
+    const level = (value: number) => (value === 0 ? 0 : 55 + value * 40);
+    const [r, g, b] = [Math.floor(index / 36), Math.floor(index / 6) % 6, index % 6].map(level);
+    return `rgb(${r}, ${g}, ${b})`;
+  }
+  const gray = 8 + (color - 232) * 10;
+  return `rgb(${gray}, ${gray}, ${gray})`;
+}
+
+// Rows missing from a diff frame are unchanged, so they are kept from the previous state.
+export function applyScreenFrame(previous: ScreenState | null, frame: PaneScreenFrame): ScreenState {
+  const base = !frame.full && previous?.paneId === frame.pane_id ? previous.rows : [];
+  const rows = Array.from({ length: frame.height }, (_, y) => base[y] ?? []);
+  for (const row of frame.rows) {
+    if (row.y < rows.length) {
+      rows[row.y] = row.spans;
+    }
+  }
+  return {
+    paneId: frame.pane_id,
+    frame: frame.frame,
+    width: frame.width,
+    height: frame.height,
+    cursor: frame.cursor,
+    rows,
+  };
+}
+
+function spanStyle(span: ScreenSpan): CSSProperties {
+  let color = paletteColor(span.fg);
+  let background = paletteColor(span.bg);
+  if (span.reverse) {
+    [color, background] = [background ?? DEFAULT_BG, color ?? DEFAULT_FG];
+  }
+  const decorations = [span.underline ? "underline" : "", span.strike ? "line-through" : ""].filter(Boolean);
+  return {
+    color,
+    background,
+    fontWeight: span.bold ? 700 : undefined,
+    opacity: span.dim ? 0.6 : undefined,
+    fontStyle: span.italic ? "italic" : undefined,
+    textDecoration: decorations.length ? decorations.join(" ") : undefined,
+    visibility: span.hidden ? "hidden" : undefined,
+  };
+}
+
+export function ScreenRows({ screen }: { screen: ScreenState }): JSX.Element {
+  return (
+    <>
+      {screen.rows.map((spans, y) => (
+        <div key={y} style={{ minHeight: "1.2em" }}>
+          {spans.map((span, index) => (
+            <span key={index} style={spanStyle(span)}>
+              {span.text}
+            </span>
+          ))}
+        </div>
+      ))}
+    </>
+  );
+}